@@ -1,13 +1,22 @@
 import os
-import json
-from flask import Flask, jsonify, Response
+import hashlib
+import time
+from flask import Flask, jsonify, Response, request, g, stream_with_context
 from flask_caching import Cache
 from dotenv import load_dotenv
 import mysql.connector
-from datetime import datetime
-import time
-from dataclasses import dataclass, asdict
 from flask_cors import CORS
+from db_pool import get_pool, get_breaker, PoolTimeoutError
+from circuit_breaker import CircuitOpenError
+from coalescing import get_single_flight
+from metrics import get_metrics, stage, record, start_request, end_request
+from profiling import get_profiler, annotate, HEADER as PROFILE_HEADER
+from health import get_prober, readiness
+from seat_maps import get_seat_maps
+from assignments import assign_incrementally, assign_flights_incrementally, assign_pending_groups
+from repository import FlightRepository
+from serialization import (build_passenger, build_flight_data, passenger_json, flight_header_json,
+                           dumps_flight_response, dumps_flights_response)
 
 # Cargar variables de entorno desde .env
 load_dotenv()
@@ -16,214 +25,527 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app) 
 
-# Configurar caché para mejorar el rendimiento de los endpoints
-app.config['CACHE_TYPE'] = 'SimpleCache'
+# Configurar caché para mejorar el rendimiento de los endpoints.
+# Por defecto se comparte entre los workers del host (shared_cache.py).
+app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'shared_cache.SharedCache')
+app.config['CACHE_THRESHOLD'] = int(os.getenv('SHARED_CACHE_MAX_ENTRIES', 1000))
 app.config['CACHE_DEFAULT_TIMEOUT'] = 300  # 5 minutos
 cache = Cache(app)
 
-# Definir la estructura de datos para la respuesta con el orden exacto de las claves
-@dataclass
-class Passenger:
-    """Clase de datos para la información de un pasajero."""
-    passengerId: int
-    dni: str
-    name: str
-    age: int
-    country: str
-    boardingPassId: int
-    purchaseId: int
-    seatTypeId: int
-    seatId: int
-
-@dataclass
-class FlightData:
-    """Clase de datos para la información del vuelo y sus pasajeros."""
-    flightId: int
-    takeoffDateTime: int
-    takeoffAirport: str
-    landingDateTime: int
-    landingAirport: str
-    airplaneId: int
-    passengers: list[Passenger]
+# Tiempo máximo que se reutiliza la respuesta de pasajeros de una misma versión del vuelo
+PASSENGERS_CACHE_TIMEOUT = int(os.getenv("PASSENGERS_CACHE_TIMEOUT", 300))
+
+# Máximo de vuelos por petición en el endpoint masivo
+BULK_MAX_FLIGHTS = int(os.getenv("BULK_MAX_FLIGHTS", 200))
+
+# Paginación por cursor (?after=<boardingPassId>&limit=) y modo streaming (?stream=1)
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", 100))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", 1000))
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", 100))
+
+# /health/ready: un ping más antiguo que este factor por HEALTH_PROBE_INTERVAL se considera caducado,
+# y una saturación del pool (en uso / tamaño) por encima del máximo marca el worker como no listo
+HEALTH_PROBE_MAX_AGE_FACTOR = 3
+HEALTH_READY_MAX_SATURATION = float(os.getenv("HEALTH_READY_MAX_SATURATION", 1.0))
+
+STARTED_AT = time.monotonic()
 
 # Configuración de la base de datos
-def get_db_connection(max_retries=3, retry_delay=5):
+def get_db_connection():
     """
-    Establece conexión con la base de datos remota con reintentos para mayor robustez.
+    Presta una conexión del pool del proceso a través del disyuntor.
+    Si el circuito está abierto lanza CircuitOpenError sin esperar a la base de datos;
+    ante cualquier otro error devuelve None.
+    La conexión debe devolverse con release_db_connection().
     """
-    for attempt in range(max_retries):
-        try:
-            conn = mysql.connector.connect(
-                host=os.getenv("DB_HOST"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASS"),
-                database=os.getenv("DB_NAME"),
-                port=int(os.getenv("DB_PORT", 3306)),
-                connection_timeout=10
-            )
-            print(f"✅ Conexión a la base de datos remota exitosa en el intento {attempt + 1}")
-            return conn
-        except mysql.connector.Error as err:
-            print(f"❌ Intento {attempt + 1}/{max_retries}: Error de conexión: {err}")
-            if attempt < max_retries - 1:
-                print(f"⏳ Reintentando en {retry_delay} segundos...")
-                time.sleep(retry_delay)
-            else:
-                print("❌ Todos los intentos de conexión fallaron")
-                return None
-        except Exception as e:
-            print(f"❌ Error inesperado: {e}")
-            return None
+    try:
+        return get_breaker().call(get_pool().acquire)
+    except CircuitOpenError:
+        raise
+    except (mysql.connector.Error, PoolTimeoutError) as err:
+        print(f"❌ Error de conexión: {err}")
+        return None
+    except Exception as e:
+        print(f"❌ Error inesperado: {e}")
+        return None
+
+class DatabaseConnectionError(Exception):
+    """No se pudo obtener una conexión a la base de datos (get_db_connection devolvió None)."""
 
-# Helper para convertir datetime a timestamp epoch
-def to_epoch(dt):
+def circuit_open_response(err, body):
+    """Respuesta 503 inmediata cuando el disyuntor de la base de datos está abierto."""
+    response = jsonify(body)
+    response.status_code = 503
+    response.headers['Retry-After'] = str(max(int(err.retry_after + 0.999), 1))
+    return response
+
+def conditional_json_response(body, etag):
     """
-    Convierte un objeto datetime a un timestamp de época (epoch) en segundos.
-    Si ya es un entero, lo retorna directamente.
+    Respuesta JSON con ETag fuerte. Si el cliente envía un If-None-Match que coincide,
+    se responde 304 sin cuerpo. `no-cache` obliga a revalidar en cada consulta.
     """
-    if isinstance(dt, datetime):
-        return int(dt.timestamp())
-    elif isinstance(dt, int):
-        return dt  # Ya es un timestamp, lo retornamos sin cambios
-    elif dt is None:
-        return None
-    else:
-        # Intenta manejar otros formatos si es necesario
-        try:
-            return int(dt)
-        except (ValueError, TypeError):
-            return None
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def is_successful_response(rv):
+    """Solo se cachean las respuestas correctas; los errores deben reflejarse al instante."""
+    return not isinstance(rv, tuple)
+
+def cache_stats():
+    """Contadores de la caché de respuestas (compartidos entre workers con SharedCache)."""
+    backend = cache.cache
+    return backend.stats() if hasattr(backend, 'stats') else None
+
+def release_db_connection(conn):
+    """Devuelve una conexión prestada al pool (se descarta si quedó inutilizable)."""
+    if conn is not None:
+        get_pool().release(conn)
+
+def iter_flight_json(flight, rows, seats, limit=None):
+    """
+    Genera la respuesta JSON de un vuelo por partes a partir de un iterador de filas de
+    pasajeros, con el mismo orden de claves que FlightData. Solo se mantiene en memoria un
+    bloque de STREAM_CHUNK_ROWS pasajeros.
+
+    - `seats` ({boarding_pass_id: seat_id}) completa las filas cuyo asiento todavía no
+      consta en la base de datos.
+    - `nextAfter` es el cursor de la página siguiente, o null si no quedan pasajeros.
+    """
+    yield '{"code":200,"data":' + flight_header_json(build_flight_data(flight, []))
+
+    chunk = []
+    count = 0
+    last_id = None
+    for row in rows:
+        if row['seat_id'] is None:
+            row['seat_id'] = seats.get(row['boarding_pass_id'])
+        chunk.append(passenger_json(build_passenger(row)))
+        count += 1
+        last_id = row['boarding_pass_id']
+        if len(chunk) >= STREAM_CHUNK_ROWS:
+            yield ("" if count == len(chunk) else ",") + ",".join(chunk)
+            chunk = []
+    if chunk:
+        yield ("" if count == len(chunk) else ",") + ",".join(chunk)
+
+    next_after = last_id if limit is not None and count == limit else None
+    yield ']},"nextAfter":' + ("null" if next_after is None else str(next_after)) + "}"
+
+def parse_page_args(args):
+    """
+    Lee ?after=<boardingPassId>&limit= y devuelve (after, limit). Sin `limit` ni `after`
+    el límite es None (todos los pasajeros); con `after` solo, PAGE_DEFAULT_LIMIT.
+    """
+    after = args.get('after', '0')
+    limit = args.get('limit')
+    if not after.isdigit():
+        raise ValueError("after must be a boardingPassId")
+    if limit is None:
+        return int(after), (PAGE_DEFAULT_LIMIT if 'after' in args else None)
+    if not limit.isdigit() or not 1 <= int(limit) <= PAGE_MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {PAGE_MAX_LIMIT}")
+    return int(after), int(limit)
+
+def parse_flight_ids(raw_ids):
+    """Convierte el parámetro ids=1,2,3 en una lista de enteros sin duplicados (en orden)."""
+    flight_ids = []
+    for part in raw_ids.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise ValueError(f"invalid flight id: {part}")
+        if int(part) not in flight_ids:
+            flight_ids.append(int(part))
+    if not flight_ids:
+        raise ValueError("ids is required")
+    if len(flight_ids) > BULK_MAX_FLIGHTS:
+        raise ValueError(f"at most {BULK_MAX_FLIGHTS} flights per request")
+    return flight_ids
 
 @app.route('/health', methods=['GET'])
-@cache.cached(timeout=30)
+@cache.cached(timeout=30, response_filter=is_successful_response)
 def health_check():
     """Endpoint para verificar el estado del servicio y la conexión a la base de datos."""
-    conn = get_db_connection()
+    try:
+        conn = get_db_connection()
+    except CircuitOpenError as err:
+        return circuit_open_response(err, {
+            "status": "error",
+            "message": "Base de datos no disponible (circuito abierto)",
+            "circuit": get_breaker().status()
+        }), 503
     if conn is None:
-        return jsonify({"status": "error", "message": "No se pudo conectar a la base de datos remota"}), 500
+        return jsonify({
+            "status": "error",
+            "message": "No se pudo conectar a la base de datos remota",
+            "circuit": get_breaker().status()
+        }), 500
     
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT 1")
-        return jsonify({"status": "success", "message": "Conexión a la base de datos remota exitosa"})
+        cursor.fetchall()
+        return jsonify({
+            "status": "success",
+            "message": "Conexión a la base de datos remota exitosa",
+            "pool": get_pool().stats(),
+            "circuit": get_breaker().status(),
+            "cache": cache_stats(),
+            "coalescing": get_single_flight().stats()
+        })
     except mysql.connector.Error as err:
         return jsonify({"status": "error", "message": f"Error en la base de datos: {err}"}), 500
     finally:
-        # Asegurarse de cerrar la conexión
+        # Asegurarse de cerrar el cursor y devolver la conexión al pool
         try:
             if 'cursor' in locals():
                 cursor.close()
-            if conn and conn.is_connected():
-                conn.close()
         except Exception:
             pass
+        release_db_connection(conn)
+
+@app.route('/health/live', methods=['GET'])
+def health_live():
+    """Liveness: el proceso atiende peticiones. Nunca consulta la base de datos."""
+    return jsonify({"status": "alive", "pid": os.getpid(), "uptime_s": round(time.monotonic() - STARTED_AT, 3)})
+
+@app.route('/health/ready', methods=['GET'])
+def health_ready():
+    """
+    Readiness: último ping del prober en segundo plano (health.py), estado del disyuntor y
+    saturación del pool. Responde 503 si el worker no debe recibir tráfico. No abre
+    conexiones ni espera a la base de datos.
+    """
+    prober = get_prober()
+    probe = prober.status()
+    pool = get_pool().stats()
+    circuit = get_breaker().status()
+    ready, reasons = readiness(probe, pool, circuit, max_age=HEALTH_PROBE_MAX_AGE_FACTOR * prober.interval,
+                               max_saturation=HEALTH_READY_MAX_SATURATION)
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "reasons": reasons,
+        "database": probe,
+        "pool": {"size": pool["size"], "in_use": pool["in_use"], "idle": pool["idle"],
+                 "saturation": round(pool["in_use"] / pool["size"], 3) if pool["size"] else 0.0},
+        "circuit": circuit,
+    }
+    return jsonify(body), 200 if ready else 503
 
 @app.route('/flights/<int:flight_id>/passengers', methods=['GET'])
 def get_passengers(flight_id):
     """
     Endpoint principal para obtener información de un vuelo y sus pasajeros.
-    Retorna los datos con las claves en el orden especificado.
+    Retorna los datos con las claves en el orden especificado, en JSON compacto
+    (indentado con ?pretty=1).
+    Con ?stream=1 o ?after=/&limit= responde en modo streaming/paginado (get_passengers_page).
+    """
+    if request.args.get('stream') == '1' or 'after' in request.args or 'limit' in request.args:
+        return get_passengers_page(flight_id)
+
+    pretty = request.args.get('pretty') == '1'
+
+    # Las peticiones simultáneas del mismo vuelo (y formato) comparten un único cálculo
+    started = time.perf_counter()
+    try:
+        result, shared = get_single_flight().do(
+            ('passengers', flight_id, pretty), lambda: load_passengers_response(flight_id, pretty)
+        )
+    except CircuitOpenError as err:
+        return circuit_open_response(err, {"code": 503, "errors": "database unavailable"}), 503
+    except DatabaseConnectionError:
+        return jsonify({"code": 400, "errors": "could not connect to db"}), 400
+    except Exception as e:
+        # Manejo de errores genérico para evitar fallas completas de la API
+        print(f"Error inesperado: {e}")
+        return jsonify({"code": 500, "errors": "internal server error"}), 500
+
+    g.coalesced = shared
+    if shared:
+        record("coalesced", time.perf_counter() - started)
+    if result is None:
+        return jsonify({"code": 404, "data": {}}), 404
+    return conditional_json_response(*result)
+
+def load_passengers_response(flight_id, pretty):
+    """
+    Calcula la respuesta de /flights/<flight_id>/passengers: devuelve (json, etag), o None
+    si el vuelo no existe. Lanza CircuitOpenError o DatabaseConnectionError si no hay
+    conexión a la base de datos.
     """
     conn = None
-    cursor = None
     
     try:
         # Establecer conexión
-        conn = get_db_connection()
+        with stage("connect"):
+            conn = get_db_connection()
         if conn is None:
-            return jsonify({"code": 400, "errors": "could not connect to db"}), 400
+            raise DatabaseConnectionError()
         
-        cursor = conn.cursor(dictionary=True)
-
-        # 1. Obtener información del vuelo
-        cursor.execute("""
-            SELECT flight_id, takeoff_date_time, takeoff_airport, 
-                   landing_date_time, landing_airport, airplane_id 
-            FROM flight 
-            WHERE flight_id = %s
-        """, (flight_id,))
-        flight = cursor.fetchone()
+        repository = g.repository = FlightRepository(conn)
+
+        # 0. Huella de versión del vuelo: solo cambia cuando cambian sus pases de abordar.
+        # Si ya hay una respuesta para esta versión se reutiliza (o se responde 304).
+        with stage("version"):
+            version = repository.version(flight_id)
+        cache_key = f"passengers/{flight_id}/{version['total']}/{version['last_id']}" + ("/pretty" if pretty else "")
+        with stage("cache"):
+            cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # 1. Obtener el vuelo y sus pasajeros en una sola ida y vuelta
+        with stage("flight"):
+            flight, passengers = repository.load_flight(flight_id)
+        annotate(passengers=len(passengers))
         
+        if not flight:
+            return None
+
+        # 2. Obtener el mapa de asientos del avión (cacheado por airplane_id)
+        with stage("seats"):
+            seats = get_seat_maps().get(flight['airplane_id'], repository.load_seats)
+
+        # 3. Asignar asiento solo a los pases nuevos y guardarlo en boarding_pass
+        passengers_assigned = assign_incrementally(repository, flight_id, passengers, seats)
+
+        # 4. Construir el objeto del vuelo con los campos en el orden correcto
+        flight_data_obj = build_flight_data(flight, passengers_assigned)
+
+        # 5. Serializar con el orden fijo de claves, sin diccionarios intermedios
+        # Esto evita cualquier reordenamiento potencial de `jsonify`
+        with stage("serialize"):
+            json_string = dumps_flight_response(flight_data_obj, pretty)
+            etag = hashlib.sha1(json_string.encode('utf-8')).hexdigest()
+        cache.set(cache_key, (json_string, etag), timeout=PASSENGERS_CACHE_TIMEOUT)
+        return json_string, etag
+
+    finally:
+        # Devolver la conexión al pool
+        release_db_connection(conn)
+
+def get_passengers_page(flight_id):
+    """
+    Modo streaming/paginado de /flights/<flight_id>/passengers para vuelos muy grandes.
+
+    - Primero asigna y guarda los asientos de los grupos con pases pendientes, sin cargar
+      el vuelo completo (assign_pending_groups).
+    - Luego recorre los pasajeros ordenados por boarding_pass_id desde un cursor sin buffer
+      y genera el JSON por partes, así que la memoria no crece con el número de pasajeros.
+    - ?after=<boardingPassId>&limit= devuelve una página; `nextAfter` indica el cursor de
+      la siguiente. Con ?stream=1 la respuesta se envía a medida que se generan las partes.
+    """
+    try:
+        after, limit = parse_page_args(request.args)
+    except ValueError as err:
+        return jsonify({"code": 400, "errors": str(err)}), 400
+    stream = request.args.get('stream') == '1'
+
+    conn = None
+    streaming = False
+
+    try:
+        # Establecer conexión
+        try:
+            with stage("connect"):
+                conn = get_db_connection()
+        except CircuitOpenError as err:
+            return circuit_open_response(err, {"code": 503, "errors": "database unavailable"}), 503
+        if conn is None:
+            return jsonify({"code": 400, "errors": "could not connect to db"}), 400
+
+        repository = g.repository = FlightRepository(conn)
+
+        # 1. Obtener solo la fila del vuelo
+        with stage("flight"):
+            flight = repository.load_flight_row(flight_id)
         if not flight:
             return jsonify({"code": 404, "data": {}}), 404
 
-        # 2. Obtener pasajeros del vuelo
-        cursor.execute("""
-            SELECT 
-                p.passenger_id, p.dni, p.name, p.age, p.country,
-                bp.boarding_pass_id, bp.purchase_id, bp.seat_type_id, bp.seat_id
-            FROM passenger p
-            JOIN boarding_pass bp ON p.passenger_id = bp.passenger_id
-            WHERE bp.flight_id = %s
-        """, (flight_id,))
-        passengers = cursor.fetchall()
-
-        # 3. Obtener asientos disponibles
-        cursor.execute("SELECT * FROM seat WHERE airplane_id = %s", (flight['airplane_id'],))
-        seats = cursor.fetchall()
-
-        # 4. Aplicar lógica de asignación de asientos
-        # Nota: La función 'assign_seats' no se proporciona, por lo que se asume que existe y funciona correctamente.
-        from seating import assign_seats
-        passengers_assigned = assign_seats(passengers, seats)
-
-        # 5. Construir la lista de objetos Passenger para garantizar el orden de los campos
-        passengers_list = []
-        for p in passengers_assigned:
-            passengers_list.append(Passenger(
-                passengerId=p['passenger_id'],
-                dni=str(p['dni']),
-                name=p['name'],
-                age=p['age'],
-                country=p['country'],
-                boardingPassId=p['boarding_pass_id'],
-                purchaseId=p['purchase_id'],
-                seatTypeId=p['seat_type_id'],
-                seatId=p['seat_id']
-            ))
-
-        # 6. Construir el objeto principal del vuelo con los campos en el orden correcto
-        flight_data_obj = FlightData(
-            flightId=flight['flight_id'],
-            takeoffDateTime=to_epoch(flight['takeoff_date_time']),
-            takeoffAirport=flight['takeoff_airport'],
-            landingDateTime=to_epoch(flight['landing_date_time']),
-            landingAirport=flight['landing_airport'],
-            airplaneId=flight['airplane_id'],
-            passengers=passengers_list
+        # 2. Asignar y guardar los asientos de los grupos con pases pendientes
+        with stage("pending"):
+            affected, occupied = repository.load_pending_groups(flight_id)
+        annotate(pending_group_passengers=len(affected), occupied_seats=len(occupied))
+        seats = {}
+        if affected:
+            with stage("seats"):
+                seat_map = get_seat_maps().get(flight['airplane_id'], repository.load_seats)
+            seats = assign_pending_groups(repository, flight_id, affected, occupied, seat_map)
+
+        # 3. Recorrer los pasajeros con un cursor sin buffer y serializar por partes
+        rows = repository.iter_passengers(flight_id, after, limit)
+        chunks = iter_flight_json(flight, rows, seats, limit)
+        if not stream:
+            try:
+                return Response("".join(chunks), mimetype='application/json')
+            finally:
+                rows.close()
+
+        def close():
+            # La conexión sigue prestada hasta que el servidor cierra la respuesta: al terminar
+            # el envío, si el cliente corta o si nunca se itera (HEAD)
+            rows.close()
+            release_db_connection(conn)
+
+        response = Response(stream_with_context(chunks), mimetype='application/json')
+        response.call_on_close(close)
+        streaming = True
+        return response
+
+    except Exception as e:
+        # Manejo de errores genérico para evitar fallas completas de la API
+        print(f"Error inesperado: {e}")
+        return jsonify({"code": 500, "errors": "internal server error"}), 500
+
+    finally:
+        # Devolver la conexión al pool (en streaming se devuelve al cerrar la respuesta)
+        if not streaming:
+            release_db_connection(conn)
+
+@app.route('/flights/passengers', methods=['GET'])
+def get_passengers_bulk():
+    """
+    Endpoint masivo para obtener varios vuelos y sus pasajeros (?ids=1,2,3).
+    Carga vuelos, pases de abordar y mapas de asientos con consultas IN (...), asigna
+    asientos por vuelo y devuelve cada vuelo con la misma estructura que el endpoint individual.
+    """
+    try:
+        flight_ids = parse_flight_ids(request.args.get('ids', ''))
+    except ValueError as err:
+        return jsonify({"code": 400, "errors": str(err)}), 400
+
+    conn = None
+
+    try:
+        # Establecer conexión
+        try:
+            with stage("connect"):
+                conn = get_db_connection()
+        except CircuitOpenError as err:
+            return circuit_open_response(err, {"code": 503, "errors": "database unavailable"}), 503
+        if conn is None:
+            return jsonify({"code": 400, "errors": "could not connect to db"}), 400
+
+        repository = g.repository = FlightRepository(conn)
+
+        # 1. Obtener los vuelos y sus pasajeros en una sola ida y vuelta
+        with stage("flight"):
+            flights, passengers_by_flight = repository.load_flights(flight_ids)
+        found_ids = [flight_id for flight_id in flight_ids if flight_id in flights]
+        annotate(flights=len(found_ids), passengers=sum(len(passengers_by_flight[f]) for f in found_ids))
+
+        # 2. Obtener los mapas de asientos de todos los aviones (cacheados por airplane_id)
+        with stage("seats"):
+            seat_maps = get_seat_maps().get_many({flights[f]['airplane_id'] for f in found_ids},
+                                                 repository.load_seats)
+        seat_map_by_flight = {f: seat_maps[flights[f]['airplane_id']] for f in found_ids}
+
+        # 3. Asignar asientos por vuelo (en paralelo si hay pool de procesos) y guardarlos
+        assigned = assign_flights_incrementally(
+            repository, {f: passengers_by_flight[f] for f in found_ids}, seat_map_by_flight
         )
 
-        # 7. Serializar el objeto de datos a un diccionario
-        final_response_dict = {
-            "code": 200,
-            "data": asdict(flight_data_obj)
-        }
-        
-        # 8. Devolver la respuesta como una cadena JSON con un tipo de contenido explícito
-        # Esto evita cualquier reordenamiento potencial de `jsonify`
-        json_string = json.dumps(final_response_dict, indent=4)
+        # 4. Serializar en el orden de los ids solicitados
+        with stage("serialize"):
+            json_string = dumps_flights_response(
+                [build_flight_data(flights[f], assigned[f]) for f in found_ids],
+                [flight_id for flight_id in flight_ids if flight_id not in flights],
+                pretty=request.args.get('pretty') == '1'
+            )
         return Response(json_string, mimetype='application/json')
 
     except Exception as e:
         # Manejo de errores genérico para evitar fallas completas de la API
         print(f"Error inesperado: {e}")
         return jsonify({"code": 500, "errors": "internal server error"}), 500
-    
+
     finally:
-        # Asegurarse de cerrar el cursor y la conexión de la base de datos
-        try:
-            if cursor:
-                cursor.close()
-        except Exception:
-            pass
-        
-        try:
-            if conn and conn.is_connected():
-                conn.close()
-        except Exception:
-            pass
+        # Devolver la conexión al pool
+        release_db_connection(conn)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Histogramas por etapa y contadores del pool y las cachés en formato Prometheus (todos los workers)."""
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
+
+@app.before_request
+def start_request_timer():
+    """Empieza a medir las etapas de la petición (metrics.stage)."""
+    g.timer, g.timer_token = start_request()
+
+@app.before_request
+def start_request_profile():
+    """Perfila la petición con cProfile si le toca por muestreo o trae X-Profile firmada (profiling.py)."""
+    profiler = get_profiler()
+    if not profiler.enabled:
+        return
+    reason = profiler.reason(request.path, request.headers.get(PROFILE_HEADER))
+    started = profiler.start(reason) if reason else None
+    if started is not None:
+        g.profile, g.profile_token = started
+
+def finish_request_profile(status):
+    """Detiene el perfil de la petición (si lo hay) y lo guarda con sus datos; devuelve el archivo."""
+    profile = g.pop('profile', None)
+    if profile is None:
+        return None
+    repository = g.get('repository')
+    timer = g.get('timer')
+    return get_profiler().finish(
+        profile, g.pop('profile_token'),
+        endpoint=request.endpoint or 'not_found',
+        path=request.full_path.rstrip('?'),
+        flight_id=(request.view_args or {}).get('flight_id'),
+        status=status,
+        round_trips=repository.round_trips if repository is not None else 0,
+        stages_ms={name: round(seconds * 1000, 3) for name, seconds in timer.totals().items()} if timer else {},
+    )
+
+@app.after_request
+def save_request_profile(response):
+    name = finish_request_profile(response.status_code)
+    if name is not None:
+        response.headers['X-Profile-File'] = name
+    return response
+
+@app.after_request
+def add_round_trips_header(response):
+    """Informa cuántas idas y vueltas a la base de datos hizo la petición."""
+    repository = g.get('repository')
+    if repository is not None:
+        response.headers['X-DB-Round-Trips'] = str(repository.round_trips)
+    if g.get('coalesced'):
+        # La respuesta reutilizó el cálculo de otra petición simultánea del mismo vuelo
+        response.headers['X-Coalesced'] = '1'
+    timer = g.get('timer')
+    if timer is not None:
+        response.headers['Server-Timing'] = timer.server_timing()
+        get_metrics().observe_request(request.endpoint or 'not_found', response.status_code, timer)
+    return response
+
+@app.teardown_request
+def end_request_timer(exc):
+    # Si la petición terminó con una excepción no hubo after_request: guardar el perfil aquí
+    finish_request_profile(500)
+    token = g.pop('timer_token', None)
+    if token is not None:
+        end_request(token)
+
+# Contadores de otros componentes expuestos en /metrics
+get_metrics().register('pool', lambda: get_pool().stats(),
+                       gauges=('size', 'open', 'in_use', 'idle'),
+                       counters=('acquired', 'created', 'recycled', 'invalid', 'timeouts', 'waits'))
+get_metrics().register('coalescing', lambda: get_single_flight().stats(),
+                       gauges=('in_flight',), counters=('computed', 'coalesced', 'failed'))
+get_metrics().register('seat_map_cache', lambda: get_seat_maps().stats(),
+                       gauges=('entries',), counters=('hits', 'misses'))
+get_metrics().register('response_cache', cache_stats, gauges=('entries', 'threshold'),
+                       counters=('hits', 'misses', 'evictions'), per_worker=False)
 
 if __name__ == '__main__':
-    # Obtener el puerto de las variables de entorno para su despliegue en Render
+    # Servidor de desarrollo; en producción se usa gunicorn con wsgi.py (ver gunicorn.conf.py)
     port = int(os.environ.get('PORT', 3000))
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG', '1') == '1')
\ No newline at end of file
@@ -0,0 +1,392 @@
+"""
+Variante asíncrona (ASGI) de la API de vuelos.
+
+Sirve las mismas rutas que app.py (`/health` y `/flights/<flight_id>/passengers`) sobre
+un servidor ASGI con aiomysql y su pool de conexiones asíncrono, así que un solo
+proceso atiende cientos de peticiones concurrentes mientras la base de datos responde:
+
+- Las consultas independientes (mapa de asientos y pasajeros del vuelo) se lanzan a la vez,
+  cada una con su propia conexión del pool.
+- assign_seats (CPU) se ejecuta fuera del bucle de eventos: en el pool de procesos de
+  assignments.get_executor() si ASSIGNMENT_WORKERS >= 2, o en el pool de hilos por defecto.
+- Se reutilizan las consultas de repository.py, la caché de mapas de asientos, las
+  instantáneas de ocupación y el serializador de la versión síncrona.
+- La caché compartida (SQLite con BEGIN IMMEDIATE y hasta 5 s de espera por el bloqueo)
+  se consulta en el pool de hilos con asyncio.to_thread, nunca en el bucle de eventos.
+
+Requiere `pip install -r requirements-async.txt`. Ejecución:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 3000
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs
+
+import aiomysql
+import pymysql
+from dotenv import load_dotenv
+
+from assignments import (apply_snapshot, apply_seats, compute_pending_seats, get_executor,
+                         get_snapshots, should_persist)
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from coalescing import AsyncSingleFlight
+from db_pool import probe_from_env
+from repository import (FLIGHT_VERSION_SQL, SINGLE_FLIGHT_SQL, SEATS_BY_FLIGHT_SQL, SEATS_SQL,
+                        STORED_SEATS_SQL, FlightRepository, in_placeholders)
+from seat_maps import get_seat_maps
+from seating import Seat, SeatMap, group_order
+from serialization import build_flight_data, dumps_flight_response
+from shared_cache import get_shared_cache
+
+# Cargar variables de entorno desde .env
+load_dotenv()
+
+PASSENGERS_CACHE_TIMEOUT = int(os.getenv("PASSENGERS_CACHE_TIMEOUT", 300))
+HEALTH_CACHE_TIMEOUT = 30
+
+PASSENGERS_ROUTE = re.compile(r"^/flights/(\d+)/passengers$")
+
+PERSIST_SQL = "UPDATE boarding_pass SET seat_id = %s WHERE boarding_pass_id = %s AND seat_id IS NULL"
+
+
+class AsyncDatabase:
+    """
+    Pool de aiomysql protegido por el mismo disyuntor que la versión síncrona.
+    Cada consulta toma una conexión solo mientras dura, así que las consultas concurrentes
+    de una petición nunca esperan por una conexión teniendo otra prestada.
+    """
+
+    def __init__(self, pool_size=20, acquire_timeout=10):
+        self.pool_size = pool_size
+        self.acquire_timeout = acquire_timeout
+        self.pool = None
+        self.breaker = CircuitBreaker(
+            probe_from_env,
+            failure_threshold=int(os.getenv("DB_BREAKER_THRESHOLD", 3)),
+            base_delay=float(os.getenv("DB_BREAKER_BASE_DELAY", 1)),
+            max_delay=float(os.getenv("DB_BREAKER_MAX_DELAY", 60)),
+            failure_types=(pymysql.err.MySQLError, OSError),
+            name="asgi-db",
+        )
+
+    async def start(self):
+        self.pool = await aiomysql.create_pool(
+            host=os.getenv("DB_HOST"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASS"),
+            db=os.getenv("DB_NAME"),
+            port=int(os.getenv("DB_PORT", 3306)),
+            connect_timeout=10,
+            autocommit=True,
+            minsize=0,
+            maxsize=self.pool_size,
+            pool_recycle=int(os.getenv("DB_POOL_MAX_LIFETIME", 1800)),
+        )
+
+    async def stop(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Presta una conexión a través del disyuntor; lanza CircuitOpenError o asyncio.TimeoutError.
+        Agotar la espera con el pool lleno no cuenta como fallo de la base de datos (como
+        PoolTimeoutError en la versión síncrona), aunque asyncio.TimeoutError sea un OSError.
+        """
+        self.breaker.check()
+        try:
+            conn = await asyncio.wait_for(self.pool.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise
+        except self.breaker.failure_types as err:
+            self.breaker.record_failure(err)
+            raise
+        self.breaker.record_success()
+        try:
+            yield conn
+        finally:
+            self.pool.release(conn)
+
+    async def fetchall(self, sql, params=None, dictionary=True):
+        """Filas como diccionarios o, con dictionary=False, como tuplas en el orden del SELECT."""
+        async with self.connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor if dictionary else aiomysql.Cursor) as cursor:
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
+
+    async def persist_assignments(self, assignments):
+        """Versión asíncrona de assignments.persist_assignments (una transacción con executemany)."""
+        async with self.connection() as conn:
+            try:
+                await conn.begin()
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(PERSIST_SQL, assignments)
+                    updated = cursor.rowcount
+                await conn.commit()
+                return updated
+            except Exception:
+                await conn.rollback()
+                raise
+
+    def stats(self):
+        if self.pool is None:
+            return {"size": self.pool_size, "open": 0, "idle": 0}
+        return {"size": self.pool.maxsize, "open": self.pool.size, "idle": self.pool.freesize}
+
+
+class AsyncFlightRepository:
+    """Las consultas de FlightRepository sobre AsyncDatabase."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def version(self, flight_id):
+        rows = await self.db.fetchall(FLIGHT_VERSION_SQL, (flight_id,))
+        return rows[0] if rows else {"total": 0, "last_id": None}
+
+    async def load_flight(self, flight_id):
+        rows = await self.db.fetchall(SINGLE_FLIGHT_SQL, (flight_id,), dictionary=False)
+        flights, passengers_by_flight = FlightRepository._split_rows(rows)
+        if flight_id not in flights:
+            return None, []
+        return flights[flight_id], passengers_by_flight[flight_id]
+
+    async def load_seats(self, airplane_ids):
+        rows = await self.db.fetchall(SEATS_SQL.format(placeholders=in_placeholders(airplane_ids)),
+                                      tuple(airplane_ids), dictionary=False)
+        return [Seat._make(row) for row in rows]
+
+    async def load_seats_by_flight(self, flight_id):
+        return [Seat._make(row) for row in await self.db.fetchall(SEATS_BY_FLIGHT_SQL, (flight_id,), dictionary=False)]
+
+
+class AirplaneIndex:
+    """
+    Recuerda el airplane_id de cada vuelo (LRU) para encontrar su mapa de asientos en
+    caché antes de leer el vuelo; si no se conoce, los asientos se consultan por flight_id
+    a la vez que los pasajeros.
+    """
+
+    def __init__(self, max_flights=10000):
+        self.max_flights = max_flights
+        self._airplanes = OrderedDict()
+
+    def get(self, flight_id):
+        airplane_id = self._airplanes.get(flight_id)
+        if airplane_id is not None:
+            self._airplanes.move_to_end(flight_id)
+        return airplane_id
+
+    def put(self, flight_id, airplane_id):
+        self._airplanes[flight_id] = airplane_id
+        self._airplanes.move_to_end(flight_id)
+        while len(self._airplanes) > self.max_flights:
+            self._airplanes.popitem(last=False)
+
+
+db = AsyncDatabase(pool_size=int(os.getenv("ASGI_DB_POOL_SIZE", 20)),
+                   acquire_timeout=float(os.getenv("DB_POOL_TIMEOUT", 10)))
+repository = AsyncFlightRepository(db)
+airplanes = AirplaneIndex()
+cache = get_shared_cache()
+single_flight = AsyncSingleFlight()
+
+
+async def load_seat_map(flight_id):
+    """Mapa de asientos del vuelo: de la caché si se conoce su avión, si no consultado por flight_id."""
+    airplane_id = airplanes.get(flight_id)
+    if airplane_id is not None:
+        seat_map = get_seat_maps().peek(airplane_id)
+        if seat_map is not None:
+            return seat_map
+    seats = await repository.load_seats_by_flight(flight_id)
+    if not seats:
+        return None
+    seat_map = SeatMap(seats)
+    get_seat_maps().put(seats[0].airplane_id, seat_map)
+    return seat_map
+
+
+async def assign_incrementally_async(flight_id, passengers, seat_map):
+    """
+    Igual que assignments.assign_incrementally, pero calcula los asientos fuera del bucle
+    de eventos y los guarda con el pool asíncrono.
+    """
+    to_persist = apply_snapshot(flight_id, passengers)
+    if any(p['seat_id'] is None for p in passengers):
+        loop = asyncio.get_running_loop()
+        seats = await loop.run_in_executor(get_executor(), compute_pending_seats, passengers, seat_map)
+        to_persist += apply_seats(passengers, seats)
+
+    if should_persist() and to_persist:
+        try:
+            updated = await db.persist_assignments(to_persist)
+        except Exception as e:
+            print(f"❌ No se pudieron guardar los asientos de vuelo {flight_id}: {e}")
+        else:
+            if updated < len(to_persist):
+                # Como assignments.save_assignments: reflejar el asiento que otro guardó antes
+                print(f"⚠️ vuelo {flight_id}: {len(to_persist) - updated} pases ya tenían asiento en la BD")
+                ids = [bp for _, bp in to_persist]
+                stored = dict(await db.fetchall(STORED_SEATS_SQL.format(placeholders=in_placeholders(ids)),
+                                                tuple(ids), dictionary=False))
+                apply_seats(passengers, {bp: stored[bp] for seat_id, bp in to_persist
+                                         if bp in stored and stored[bp] != seat_id})
+
+    get_snapshots().update(flight_id, passengers)
+    return group_order(passengers)
+
+
+def json_body(data):
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def circuit_open_headers(err):
+    return [(b"retry-after", str(max(int(err.retry_after + 0.999), 1)).encode())]
+
+
+async def health_check(query):
+    """Endpoint para verificar el estado del servicio y la conexión a la base de datos."""
+    cached = await asyncio.to_thread(cache.get, "health")
+    if cached is not None:
+        return cached
+    try:
+        await db.fetchall("SELECT 1")
+    except CircuitOpenError as err:
+        return 503, json_body({
+            "status": "error",
+            "message": "Base de datos no disponible (circuito abierto)",
+            "circuit": db.breaker.status()
+        }), circuit_open_headers(err)
+    except (pymysql.err.MySQLError, OSError, asyncio.TimeoutError) as err:
+        return 500, json_body({"status": "error", "message": f"Error en la base de datos: {err}"}), []
+
+    result = (200, json_body({
+        "status": "success",
+        "message": "Conexión a la base de datos remota exitosa",
+        "pool": db.stats(),
+        "circuit": db.breaker.status(),
+        "cache": await asyncio.to_thread(cache.stats),
+        "coalescing": single_flight.stats()
+    }), [])
+    await asyncio.to_thread(cache.set, "health", result, timeout=HEALTH_CACHE_TIMEOUT)
+    return result
+
+
+async def load_passengers_response(flight_id, pretty):
+    """Devuelve (json, etag) de los pasajeros del vuelo, o None si no existe."""
+    # 0. Huella de versión del vuelo y respuesta cacheada de esa versión
+    version = await repository.version(flight_id)
+    cache_key = f"passengers/{flight_id}/{version['total']}/{version['last_id']}" + ("/pretty" if pretty else "")
+    cached = await asyncio.to_thread(cache.get, cache_key)
+    if cached is not None:
+        return cached
+
+    # 1. Pasajeros y mapa de asientos a la vez
+    (flight, passengers), seat_map = await asyncio.gather(
+        repository.load_flight(flight_id), load_seat_map(flight_id)
+    )
+    if not flight:
+        return None
+    airplanes.put(flight_id, flight['airplane_id'])
+    if seat_map is None:
+        seat_map = SeatMap([])
+
+    # 2. Asignar asiento solo a los pases nuevos (fuera del bucle de eventos) y guardarlo
+    passengers_assigned = await assign_incrementally_async(flight_id, passengers, seat_map)
+
+    # 3. Serializar con el orden fijo de claves
+    body = dumps_flight_response(build_flight_data(flight, passengers_assigned), pretty)
+    cached = (body, hashlib.sha1(body.encode('utf-8')).hexdigest())
+    await asyncio.to_thread(cache.set, cache_key, cached, timeout=PASSENGERS_CACHE_TIMEOUT)
+    return cached
+
+
+async def get_passengers(flight_id, query, if_none_match):
+    """
+    Versión asíncrona de app.get_passengers (sin los modos streaming/paginado). Las
+    peticiones simultáneas del mismo vuelo (y formato) comparten un único cálculo.
+    """
+    pretty = query.get('pretty') == ['1']
+    try:
+        cached, shared = await single_flight.do(
+            ('passengers', flight_id, pretty), lambda: load_passengers_response(flight_id, pretty)
+        )
+    except CircuitOpenError as err:
+        return 503, json_body({"code": 503, "errors": "database unavailable"}), circuit_open_headers(err)
+    except asyncio.TimeoutError:
+        print("❌ Error de conexión: tiempo de espera agotado esperando una conexión")
+        return 400, json_body({"code": 400, "errors": "could not connect to db"}), []
+    except Exception as e:
+        # Manejo de errores genérico para evitar fallas completas de la API
+        print(f"Error inesperado: {e}")
+        return 500, json_body({"code": 500, "errors": "internal server error"}), []
+
+    if cached is None:
+        return 404, json_body({"code": 404, "data": {}}), []
+    body, etag = cached
+    headers = [(b"etag", f'"{etag}"'.encode()), (b"cache-control", b"no-cache")]
+    if shared:
+        headers.append((b"x-coalesced", b"1"))
+    if if_none_match and etag in [tag.strip().strip('"') for tag in if_none_match.split(',')]:
+        return 304, b"", headers
+    return 200, body.encode('utf-8'), headers
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await db.start()
+            except Exception as e:
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message['type'] == 'lifespan.shutdown':
+            await db.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """Aplicación ASGI: enruta /health y /flights/<flight_id>/passengers."""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path']
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    headers = dict(scope.get('headers', []))
+    match = PASSENGERS_ROUTE.match(path)
+
+    if scope['method'] not in ('GET', 'HEAD'):
+        status, body, extra = 405, json_body({"code": 405, "errors": "method not allowed"}), []
+    elif path == '/health':
+        status, body, extra = await health_check(query)
+    elif match:
+        if_none_match = headers.get(b'if-none-match', b'').decode('latin-1')
+        status, body, extra = await get_passengers(int(match.group(1)), query, if_none_match)
+    else:
+        status, body, extra = 404, json_body({"code": 404, "errors": "not found"}), []
+
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"access-control-allow-origin", b"*"),
+                    (b"content-length", str(len(body)).encode())] + extra,
+    })
+    await send({"type": "http.response.body", "body": b"" if scope['method'] == 'HEAD' else body})
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run("asgi_app:app", host='0.0.0.0', port=int(os.environ.get('PORT', 3000)))
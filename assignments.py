@@ -0,0 +1,287 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics import stage
+from repository import in_placeholders, STORED_SEATS_SQL
+from seating import assign_seats, group_order
+
+
+class OccupancySnapshots:
+    """
+    Instantáneas de ocupación por vuelo (boarding_pass_id -> seat_id de la última
+    asignación), acotadas con LRU. Mantienen estables los asientos ya calculados aunque
+    la escritura en la base de datos falle o todavía no sea visible.
+    """
+
+    def __init__(self, max_flights=1024):
+        self.max_flights = max_flights
+        self._lock = threading.Lock()
+        self._snapshots = OrderedDict()
+
+    def get(self, flight_id):
+        with self._lock:
+            snapshot = self._snapshots.get(flight_id)
+            if snapshot is not None:
+                self._snapshots.move_to_end(flight_id)
+            return snapshot
+
+    def update(self, flight_id, passengers):
+        seats = {p['boarding_pass_id']: p['seat_id'] for p in passengers if p['seat_id'] is not None}
+        with self._lock:
+            self._snapshots[flight_id] = seats
+            self._snapshots.move_to_end(flight_id)
+            while len(self._snapshots) > self.max_flights:
+                self._snapshots.popitem(last=False)
+
+    def merge(self, flight_id, seats):
+        """Añade asientos {boarding_pass_id: seat_id} a la instantánea del vuelo."""
+        with self._lock:
+            self._snapshots.setdefault(flight_id, {}).update(seats)
+            self._snapshots.move_to_end(flight_id)
+            while len(self._snapshots) > self.max_flights:
+                self._snapshots.popitem(last=False)
+
+    def invalidate(self, flight_id=None):
+        with self._lock:
+            if flight_id is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(flight_id, None)
+
+
+_snapshots = None
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshots():
+    """Devuelve las instantáneas de ocupación del proceso, creándolas la primera vez."""
+    global _snapshots
+    if _snapshots is None:
+        with _snapshots_lock:
+            if _snapshots is None:
+                _snapshots = OccupancySnapshots(max_flights=int(os.getenv("OCCUPANCY_SNAPSHOTS", 1024)))
+    return _snapshots
+
+
+def persist_assignments(conn, assignments):
+    """
+    Guarda asientos calculados en boarding_pass en una sola transacción con executemany.
+    `assignments` es una lista de tuplas (seat_id, boarding_pass_id). Solo se escriben los
+    pases que siguen sin asiento, para no pisar asignaciones hechas en paralelo.
+    Devuelve cuántas filas se actualizaron.
+    """
+    if not assignments:
+        return 0
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        cursor.executemany(
+            "UPDATE boarding_pass SET seat_id = %s WHERE boarding_pass_id = %s AND seat_id IS NULL",
+            assignments
+        )
+        updated = cursor.rowcount
+        conn.commit()
+        return updated
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def load_stored_seats(conn, boarding_pass_ids):
+    """Lee el seat_id que consta en boarding_pass para cada pase: {boarding_pass_id: seat_id}."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(STORED_SEATS_SQL.format(placeholders=in_placeholders(boarding_pass_ids)), tuple(boarding_pass_ids))
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def apply_snapshot(flight_id, passengers, occupied=None):
+    """
+    Reutiliza los asientos calculados previamente que aún no constan en la base de datos.
+    `occupied` añade asientos tomados por pasajeros que no están en `passengers`.
+    Devuelve las tuplas (seat_id, boarding_pass_id) que quedan pendientes de guardar.
+    """
+    snapshot = get_snapshots().get(flight_id)
+    if snapshot is None:
+        return []
+    taken = set(occupied or ())
+    taken.update(p['seat_id'] for p in passengers if p['seat_id'] is not None)
+    carried = []
+    for p in passengers:
+        if p['seat_id'] is None:
+            seat_id = snapshot.get(p['boarding_pass_id'])
+            if seat_id is not None and seat_id not in taken:
+                p['seat_id'] = seat_id
+                taken.add(seat_id)
+                carried.append((seat_id, p['boarding_pass_id']))
+    return carried
+
+
+def compute_pending_seats(passengers, seat_map, engine=None):
+    """
+    Ejecuta assign_seats solo sobre los grupos de compra con pases sin asiento, con el
+    resto de asientos del vuelo marcados como ocupados.
+    Devuelve {boarding_pass_id: seat_id} de los pases que recibieron asiento. No usa la
+    base de datos, así que puede ejecutarse en otro proceso.
+    """
+    pending = [p for p in passengers if p['seat_id'] is None]
+    if not pending:
+        return {}
+    pending_groups = {p['purchase_id'] for p in pending}
+    affected = [p for p in passengers if p['purchase_id'] in pending_groups]
+    others_occupied = {
+        p['seat_id'] for p in passengers
+        if p['purchase_id'] not in pending_groups and p['seat_id'] is not None
+    }
+    assign_seats(affected, seat_map, engine=engine, occupied=others_occupied)
+    return {p['boarding_pass_id']: p['seat_id'] for p in pending if p['seat_id'] is not None}
+
+
+def apply_seats(passengers, seats):
+    """Aplica {boarding_pass_id: seat_id} y devuelve las tuplas (seat_id, boarding_pass_id) a guardar."""
+    for p in passengers:
+        seat_id = seats.get(p['boarding_pass_id'])
+        if seat_id is not None:
+            p['seat_id'] = seat_id
+    return [(seat_id, bp) for bp, seat_id in seats.items()]
+
+
+def should_persist(persist=None):
+    """Indica si se guardan los asientos calculados (PERSIST_SEAT_ASSIGNMENTS, activado por defecto)."""
+    if persist is None:
+        return os.getenv("PERSIST_SEAT_ASSIGNMENTS", "1") == "1"
+    return persist
+
+
+def save_assignments(conn, label, to_persist, persist=None):
+    """
+    Guarda los asientos nuevos si la persistencia está activada; los errores al guardar solo
+    se registran. Si algún pase ya tenía asiento en la BD (otra petición o proceso lo guardó
+    antes) vuelve a leerlos y devuelve {boarding_pass_id: seat_id} con el asiento guardado de
+    los que no coinciden, para que la respuesta, la caché y la instantánea reflejen la BD.
+    """
+    if not should_persist(persist) or not to_persist:
+        return {}
+    try:
+        with stage("persist"):
+            updated = persist_assignments(conn, to_persist)
+    except Exception as e:
+        print(f"❌ No se pudieron guardar los asientos de {label}: {e}")
+        return {}
+    if updated == len(to_persist):
+        return {}
+
+    print(f"⚠️ {label}: {len(to_persist) - updated} pases ya tenían asiento en la BD")
+    with stage("persist"):
+        stored = load_stored_seats(conn, [bp for _, bp in to_persist])
+    return {bp: stored[bp] for seat_id, bp in to_persist if bp in stored and stored[bp] != seat_id}
+
+
+def assign_incrementally(conn, flight_id, passengers, seat_map, engine=None, persist=None):
+    """
+    Asigna asientos solo a los pases de abordar nuevos de un vuelo y los persiste.
+
+    - Los pases que ya tienen asiento en la base de datos no se tocan.
+    - Los que se calcularon antes pero aún no constan en la base de datos se toman de la
+      instantánea del vuelo, para que el resultado sea estable entre peticiones.
+    - assign_seats se ejecuta solo sobre los grupos de compra con pases pendientes,
+      con el resto de asientos del vuelo marcados como ocupados.
+
+    Devuelve los pasajeros en el mismo orden que assign_seats.
+    """
+    # 1. Reutilizar asientos calculados previamente que aún no están en la base de datos
+    to_persist = apply_snapshot(flight_id, passengers)
+
+    # 2. Asignar solo los grupos de compra con pases pendientes
+    with stage("assign"):
+        to_persist += apply_seats(passengers, compute_pending_seats(passengers, seat_map, engine))
+
+    # 3. Guardar los asientos nuevos en boarding_pass (con el asiento de la BD si otro llegó antes)
+    apply_seats(passengers, save_assignments(conn, f"vuelo {flight_id}", to_persist, persist))
+
+    get_snapshots().update(flight_id, passengers)
+    return group_order(passengers)
+
+
+def assign_pending_groups(conn, flight_id, affected, occupied, seat_map, engine=None, persist=None):
+    """
+    Variante de assign_incrementally para el modo streaming/paginado, que no carga el vuelo
+    completo: recibe solo los pasajeros de los grupos con pases pendientes (`affected`) y
+    los seat_id ocupados del vuelo.
+    Devuelve {boarding_pass_id: seat_id} de los grupos afectados, para completar las filas
+    que aún no tengan el asiento guardado en la base de datos.
+    """
+    to_persist = apply_snapshot(flight_id, affected, occupied)
+    pending = [p for p in affected if p['seat_id'] is None]
+    if pending:
+        with stage("assign"):
+            assign_seats(affected, seat_map, engine=engine, occupied=occupied)
+        to_persist += [(p['seat_id'], p['boarding_pass_id']) for p in pending if p['seat_id'] is not None]
+
+    apply_seats(affected, save_assignments(conn, f"vuelo {flight_id}", to_persist, persist))
+
+    seats = {p['boarding_pass_id']: p['seat_id'] for p in affected if p['seat_id'] is not None}
+    get_snapshots().merge(flight_id, seats)
+    return seats
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Devuelve el pool de procesos para repartir asignaciones de varios vuelos, o None si
+    ASSIGNMENT_WORKERS es menor que 2 (asignación secuencial en el propio proceso).
+    """
+    global _executor
+    workers = int(os.getenv("ASSIGNMENT_WORKERS", 0))
+    if workers < 2:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=workers)
+    return _executor
+
+
+def assign_flights_incrementally(conn, passengers_by_flight, seat_map_by_flight, engine=None, persist=None):
+    """
+    Versión de assign_incrementally para varios vuelos a la vez.
+    Las asignaciones de cada vuelo se reparten entre el pool de procesos (si está
+    configurado) y todos los asientos nuevos se guardan en una única transacción.
+    Devuelve {flight_id: pasajeros en el orden de assign_seats}.
+    """
+    flight_ids = list(passengers_by_flight)
+    to_persist = []
+    for flight_id in flight_ids:
+        to_persist += apply_snapshot(flight_id, passengers_by_flight[flight_id])
+
+    pending_ids = [
+        flight_id for flight_id in flight_ids
+        if any(p['seat_id'] is None for p in passengers_by_flight[flight_id])
+    ]
+    args = ([passengers_by_flight[f] for f in pending_ids],
+            [seat_map_by_flight[f] for f in pending_ids],
+            [engine] * len(pending_ids))
+    executor = get_executor() if len(pending_ids) > 1 else None
+    with stage("assign"):
+        results = executor.map(compute_pending_seats, *args) if executor else map(compute_pending_seats, *args)
+        for flight_id, seats in zip(pending_ids, results):
+            to_persist += apply_seats(passengers_by_flight[flight_id], seats)
+
+    stored = save_assignments(conn, f"{len(flight_ids)} vuelos", to_persist, persist)
+
+    ordered = {}
+    for flight_id in flight_ids:
+        if stored:
+            apply_seats(passengers_by_flight[flight_id], stored)
+        get_snapshots().update(flight_id, passengers_by_flight[flight_id])
+        ordered[flight_id] = group_order(passengers_by_flight[flight_id])
+    return ordered
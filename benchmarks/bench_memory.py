@@ -0,0 +1,123 @@
+"""
+Benchmark de memoria de la representación de filas en el camino de datos.
+
+Compara, con tracemalloc, las filas como las devolvía un cursor con diccionario
+(`cursor(dictionary=True)` y `SELECT *`) con las filas compactas actuales (tuplas con
+columnas explícitas y asientos como seating.Seat), sobre una cabina grande llena:
+
+- asientos leídos de `seat` y el SeatMap construido a partir de ellos;
+- filas del JOIN vuelo + pasajeros y su separación en vuelo y pasajeros (los diccionarios
+  de pasajero se conservan en ambos casos; la diferencia está en el pico).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_memory.py [--rows 200] [--columns ABCDEFGHJK] [--load 0.9]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_seating import make_cabin, make_passengers  # noqa: E402
+from repository import FLIGHT_COLUMNS, FlightRepository, PASSENGER_COLUMNS  # noqa: E402
+from seating import Seat, SeatMap  # noqa: E402
+
+FLIGHT = {
+    'flight_id': 1, 'takeoff_date_time': 1704067200, 'takeoff_airport': 'SCL',
+    'landing_date_time': 1704074400, 'landing_airport': 'EZE', 'airplane_id': 1,
+}
+
+
+def dict_seat_rows(seats):
+    """Asientos como los devolvía SELECT * con cursor(dictionary=True): las 5 columnas de `seat`."""
+    return [dict(s._asdict()) for s in seats]
+
+
+def dict_joined_rows(passengers):
+    return [dict(FLIGHT, **p) for p in passengers]
+
+
+def tuple_joined_rows(passengers):
+    return [tuple(FLIGHT[c] for c in FLIGHT_COLUMNS) + tuple(p[c] for c in PASSENGER_COLUMNS) for p in passengers]
+
+
+def legacy_seat_map(rows):
+    """Estructuras que guardaba el SeatMap anterior sobre filas con diccionario."""
+    ordered = tuple(sorted(rows, key=lambda x: (x['seat_row'], x['seat_column'])))
+    by_type = {}
+    for s in ordered:
+        by_type.setdefault(s['seat_type_id'], []).append(s)
+    return ordered, {s['seat_id']: s for s in rows}, {t: tuple(v) for t, v in by_type.items()}
+
+
+def legacy_split_rows(rows):
+    """Separación anterior del JOIN, sobre filas con diccionario."""
+    flights = {}
+    passengers_by_flight = {}
+    for row in rows:
+        flight_id = row['flight_id']
+        if flight_id not in flights:
+            flights[flight_id] = {column: row[column] for column in FLIGHT_COLUMNS}
+            passengers_by_flight[flight_id] = []
+        if row['boarding_pass_id'] is not None:
+            passengers_by_flight[flight_id].append({column: row[column] for column in PASSENGER_COLUMNS})
+    return flights, passengers_by_flight
+
+
+def measure(build):
+    """Devuelve (bytes retenidos por el resultado, pico durante la construcción)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        # Una recolección completa vacía las listas libres (p. ej. de tuplas), que si no
+        # seguirían contando como memoria en uso
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200, help="filas de la cabina")
+    parser.add_argument("--columns", default="ABCDEFGHJK")
+    parser.add_argument("--load", type=float, default=0.9, help="ocupación de la cabina")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    seats = make_cabin(args.rows, args.columns, ((6, 1), (20, 2), (None, 3)), rng)
+    passengers = make_passengers(seats, rng, args.load, {1: 5, 2: 4, 3: 3, 4: 2, 5: 1}, 0.25, 0.2)
+    dict_seats = dict_seat_rows(seats)
+    dict_rows = dict_joined_rows(passengers)
+    tuple_rows = tuple_joined_rows(passengers)
+
+    # Cada caso construye filas nuevas, como las entregaría el cursor
+    cases = [
+        ("filas de asientos", lambda: [dict(s) for s in dict_seats], lambda: [Seat._make(s) for s in seats]),
+        ("mapa de asientos", lambda: legacy_seat_map([dict(s) for s in dict_seats]),
+         lambda: SeatMap([Seat._make(s) for s in seats])),
+        ("filas del JOIN", lambda: [dict(r) for r in dict_rows], lambda: [tuple([*r]) for r in tuple_rows]),
+        ("JOIN + separación", lambda: legacy_split_rows([dict(r) for r in dict_rows]),
+         lambda: FlightRepository._split_rows([tuple([*r]) for r in tuple_rows])),
+    ]
+
+    print(f"💺 Cabina de {len(seats)} asientos y {len(passengers)} pasajeros\n")
+    print(f"{'caso':<22} {'dict KB':>10} {'compacto KB':>12} {'ahorro':>8} {'pico dict':>10} {'pico comp.':>11}")
+    for name, legacy, compact in cases:
+        legacy_current, legacy_peak = measure(legacy)
+        compact_current, compact_peak = measure(compact)
+        saving = 1 - compact_current / legacy_current if legacy_current else 0
+        print(f"{name:<22} {legacy_current / 1024:>10.1f} {compact_current / 1024:>12.1f} {saving:>8.0%} "
+              f"{legacy_peak / 1024:>10.1f} {compact_peak / 1024:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
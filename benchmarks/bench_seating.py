@@ -0,0 +1,251 @@
+"""
+Benchmark de seating.py sobre cabinas sintéticas.
+
+Genera aviones desde un jet regional hasta un fuselaje ancho de 800 asientos, con una
+mezcla configurable de tamaños de grupo de compra, menores y asientos ya asignados, y
+mide assign_seats (por motor) y find_seat_block. Informa la curva de escalado (exponente
+del ajuste log-log entre tamaños) y compara con una línea base guardada.
+
+Los tiempos se guardan normalizados por una carga de calibración en Python puro, para que
+la línea base sea comparable entre máquinas distintas.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_seating.py                     # medir e informar
+    python benchmarks/bench_seating.py --check             # falla si hay regresiones
+    python benchmarks/bench_seating.py --save-baseline     # actualizar la línea base
+    python benchmarks/bench_seating.py --large --repeat 1  # añadir cabinas de 4000 y 20000 asientos
+    python benchmarks/bench_seating.py --groups 1:4,2:3,3:2,4:1 --minors 0.3 --preassigned 0.5
+"""
+import argparse
+import copy
+import importlib.util
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seating import assign_seats, find_seat_block, Seat, SeatMap  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_seating.json")
+
+# (nombre, filas, columnas, filas de cada tipo de asiento)
+AIRCRAFT = [
+    ("regional-76", 19, "ABCD", ((2, 1), (5, 2), (None, 3))),
+    ("narrow-180", 30, "ABCDEF", ((3, 1), (8, 2), (None, 3))),
+    ("wide-400", 40, "ABCDEFGHJK", ((4, 1), (12, 2), (None, 3))),
+    ("wide-800", 80, "ABCDEFGHJK", ((6, 1), (20, 2), (None, 3))),
+]
+# Cabinas mucho mayores (p. ej. para elegir SEATING_ENGINE); solo con --large, fuera de la línea base
+LARGE_AIRCRAFT = [
+    ("large-4000", 400, "ABCDEFGHJK", ((30, 1), (100, 2), (None, 3))),
+    ("large-20000", 2000, "ABCDEFGHJK", ((150, 1), (500, 2), (None, 3))),
+]
+
+
+def make_cabin(rows, columns, type_rows, rng):
+    """Cabina sintética con los asientos (filas Seat) desordenados, como llegarían de la base de datos."""
+    seats = []
+    for row in range(1, rows + 1):
+        seat_type_id = next(t for limit, t in type_rows if limit is None or row <= limit)
+        for column in columns:
+            seats.append(Seat(len(seats) + 1, column, row, seat_type_id, 1))
+    rng.shuffle(seats)
+    return seats
+
+
+def make_passengers(seats, rng, load_factor, group_weights, minor_ratio, preassigned_ratio):
+    """
+    Pasajeros hasta `load_factor` de la cabina, en grupos de compra de un solo tipo de
+    asiento, con tamaños según `group_weights` ({tamaño: peso}).
+    """
+    capacity = {}
+    for s in seats:
+        capacity[s.seat_type_id] = capacity.get(s.seat_type_id, 0) + 1
+    free_by_type = {t: [s.seat_id for s in seats if s.seat_type_id == t] for t in capacity}
+    for ids in free_by_type.values():
+        rng.shuffle(ids)
+
+    sizes, weights = zip(*sorted(group_weights.items()))
+    passengers = []
+    purchase_id = 0
+    target = int(len(seats) * load_factor)
+    while len(passengers) < target:
+        purchase_id += 1
+        seat_type_id = rng.choice(list(capacity))
+        size = min(rng.choices(sizes, weights)[0], target - len(passengers))
+        if capacity[seat_type_id] < size:
+            continue
+        capacity[seat_type_id] -= size
+        for i in range(size):
+            passenger_id = len(passengers) + 1
+            # El primero de cada grupo siempre es adulto
+            minor = i > 0 and rng.random() < minor_ratio
+            seat_id = None
+            if rng.random() < preassigned_ratio:
+                seat_id = free_by_type[seat_type_id].pop()
+            passengers.append({
+                'passenger_id': passenger_id, 'dni': str(10000000 + passenger_id),
+                'name': f"Pasajero {passenger_id}", 'age': rng.randint(2, 17) if minor else rng.randint(18, 80),
+                'country': 'Chile', 'boarding_pass_id': passenger_id, 'purchase_id': purchase_id,
+                'seat_type_id': seat_type_id, 'seat_id': seat_id,
+            })
+    return passengers
+
+
+def calibrate(repeat=5):
+    """Tiempo (s) de una carga fija en Python puro; sirve de unidad para normalizar."""
+    def workload():
+        data = {}
+        for i in range(200000):
+            data[i % 1000] = data.get(i % 1000, 0) + i
+        return sorted(data.values())
+    return min(timed(workload) for _ in range(repeat))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def measure(fn, make_args, repeat, min_batch=0.01):
+    """
+    Mejor tiempo por llamada de `repeat` lotes. Cada lote agrupa las llamadas necesarias
+    para durar al menos `min_batch` segundos (como timeit.autorange), y los argumentos se
+    preparan antes de medirlo.
+    """
+    number = max(1, int(min_batch / max(timed(fn, *make_args()), 1e-6)))
+    best = float("inf")
+    for _ in range(repeat):
+        batch = [make_args() for _ in range(number)]
+        start = time.perf_counter()
+        for args in batch:
+            fn(*args)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def engines():
+    available = ["python"]
+    if importlib.util.find_spec("numpy") is not None:
+        available.append("numpy")
+    return available
+
+
+def run_cases(args):
+    """Devuelve {caso: segundos} para todos los aviones, motores y tamaños de bloque."""
+    results = {}
+    for name, rows, columns, type_rows in AIRCRAFT + (LARGE_AIRCRAFT if args.large else []):
+        rng = random.Random(args.seed)
+        seats = make_cabin(rows, columns, type_rows, rng)
+        passengers = make_passengers(seats, rng, args.load, args.groups, args.minors, args.preassigned)
+        seat_map = SeatMap(seats)
+
+        for engine in engines():
+            for group_blocks in (False, True):
+                key = f"assign_seats/{engine}/{'blocks' if group_blocks else 'simple'}/{name}"
+                results[key] = (len(seats), measure(
+                    lambda ps, e=engine, gb=group_blocks: assign_seats(ps, seat_map, group_blocks=gb, engine=e),
+                    lambda: (copy.deepcopy(passengers),), args.repeat))
+
+        # find_seat_block sobre la cabina con la mitad de los asientos ocupados
+        occupied = set(rng.sample([s.seat_id for s in seats], len(seats) // 2))
+        available = [s for s in seats if s.seat_id not in occupied]
+        for size in (2, 4, 6):
+            key = f"find_seat_block/{size}/{name}"
+            results[key] = (len(seats), measure(find_seat_block, lambda s=size: (available, s), args.repeat))
+    return results
+
+
+def scaling(results):
+    """Exponente k de tiempo ∝ asientos^k por función/motor (ajuste log-log por mínimos cuadrados)."""
+    series = {}
+    for key, (seats, seconds) in results.items():
+        series.setdefault(key.rsplit("/", 1)[0], []).append((math.log(seats), math.log(max(seconds, 1e-9))))
+    exponents = {}
+    for key, points in series.items():
+        mean_x = statistics.fmean(x for x, _ in points)
+        mean_y = statistics.fmean(y for _, y in points)
+        var_x = sum((x - mean_x) ** 2 for x, _ in points)
+        exponents[key] = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x if var_x else 0.0
+    return exponents
+
+
+def parse_groups(raw):
+    """'1:4,2:3,3:2' -> {1: 4.0, 2: 3.0, 3: 2.0}"""
+    groups = {}
+    for part in raw.split(","):
+        size, weight = part.split(":")
+        groups[int(size)] = float(weight)
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=parse_groups, default=parse_groups("1:5,2:4,3:3,4:2,5:1"),
+                        help="tamaños de grupo de compra y sus pesos (tamaño:peso,...)")
+    parser.add_argument("--minors", type=float, default=0.25, help="proporción de acompañantes menores de edad")
+    parser.add_argument("--preassigned", type=float, default=0.2, help="proporción de pases con asiento ya asignado")
+    parser.add_argument("--load", type=float, default=0.9, help="ocupación de la cabina")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--check", action="store_true", help="falla si algún caso empeora más que --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="empeoramiento relativo permitido (0.3 = +30%%)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--large", action="store_true", help="añade cabinas de 4000 y 20000 asientos (lento)")
+    args = parser.parse_args()
+
+    unit = calibrate()
+    results = run_cases(args)
+    normalized = {key: seconds / unit for key, (_, seconds) in results.items()}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["cases"]
+
+    print(f"⏱️  Unidad de calibración: {unit * 1000:.1f} ms\n")
+    print(f"{'caso':<44} {'asientos':>8} {'ms':>9} {'vs base':>8}")
+    regressions = []
+    for key, (seats, seconds) in results.items():
+        change = ""
+        if key in baseline:
+            ratio = normalized[key] / baseline[key]
+            change = f"{(ratio - 1) * 100:+.0f}%"
+            if ratio > 1 + args.tolerance:
+                regressions.append((key, ratio))
+        print(f"{key:<44} {seats:>8} {seconds * 1000:>9.3f} {change:>8}")
+
+    print("\n📈 Escalado (tiempo ∝ asientos^k):")
+    for key, exponent in scaling(results).items():
+        print(f"   {key:<36} k = {exponent:.2f}")
+
+    if args.save_baseline:
+        large = {name for name, *_ in LARGE_AIRCRAFT}
+        cases = {key: value for key, value in normalized.items() if key.rsplit("/", 1)[1] not in large}
+        with open(args.baseline, "w") as f:
+            json.dump({"unit": "calibración", "cases": cases}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n💾 Línea base guardada en {args.baseline}")
+
+    if args.check:
+        if not baseline:
+            print("\n❌ No hay línea base; ejecuta primero con --save-baseline")
+            return 1
+        if regressions:
+            print("\n❌ Regresiones respecto a la línea base:")
+            for key, ratio in regressions:
+                print(f"   {key}: x{ratio:.2f}")
+            return 1
+        print("\n✅ Sin regresiones respecto a la línea base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark del coste de serialización por pasajero.
+
+Compara la serialización anterior (dataclasses.asdict + json.dumps(indent=4)) con el
+serializador de serialization.py, en formato compacto e indentado.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_serialization.py [--passengers 200 1000 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serialization import Passenger, FlightData, dumps_flight_response  # noqa: E402
+
+
+def make_flight(passenger_count):
+    passengers = [
+        Passenger(passengerId=i, dni=str(10000000 + i), name=f"Pasajero {i}", age=18 + i % 60,
+                  country="Chile", boardingPassId=i, purchaseId=i // 3, seatTypeId=1 + i % 3, seatId=i)
+        for i in range(passenger_count)
+    ]
+    return FlightData(flightId=1, takeoffDateTime=1672531200, takeoffAirport="SCL",
+                      landingDateTime=1672538400, landingAirport="EZE", airplaneId=101,
+                      passengers=passengers)
+
+
+def previous_serializer(flight):
+    return json.dumps({"code": 200, "data": asdict(flight)}, indent=4)
+
+
+SERIALIZERS = {
+    "asdict + indent=4 (anterior)": previous_serializer,
+    "serializer compacto": dumps_flight_response,
+    "serializer pretty=True": lambda flight: dumps_flight_response(flight, pretty=True),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--passengers", type=int, nargs="+", default=[200, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for count in args.passengers:
+        flight = make_flight(count)
+        number = max(1, 20000 // count)
+        baseline = None
+        print(f"\n✈️  {count} pasajeros")
+        for label, serialize in SERIALIZERS.items():
+            best = min(timeit.repeat(lambda: serialize(flight), number=number, repeat=args.repeat)) / number
+            per_passenger_us = best / count * 1e6
+            size = len(serialize(flight))
+            baseline = baseline or per_passenger_us
+            print(f"   {label:<30} {per_passenger_us:7.2f} µs/pasajero  "
+                  f"{size / 1024:9.1f} KiB  x{baseline / per_passenger_us:.1f}")
+
+
+if __name__ == "__main__":
+    main()
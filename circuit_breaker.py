@@ -0,0 +1,129 @@
+import random
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Se lanza cuando el circuito está abierto y la llamada se rechaza sin intentarla."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Circuito abierto; reintentar en {retry_after:.1f} segundos")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Disyuntor con estados cerrado, abierto y semiabierto.
+
+    - Cerrado: las llamadas pasan; tras `failure_threshold` fallos seguidos se abre.
+    - Abierto: las llamadas fallan de inmediato con CircuitOpenError.
+    - Semiabierto: un único hilo en segundo plano ejecuta `probe`; si tiene éxito
+      el circuito se cierra y si falla vuelve a abrirse con un retardo mayor.
+
+    El retardo antes de cada sonda crece exponencialmente desde `base_delay`
+    hasta `max_delay`, con jitter para que varios procesos no sondeen a la vez.
+    """
+
+    def __init__(self, probe, failure_threshold=3, base_delay=1.0, max_delay=60.0,
+                 failure_types=(Exception,), name="db"):
+        self._probe = probe
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_types = failure_types
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._attempt = 0
+        self._retry_at = 0.0
+        self._trips = 0
+        self._last_error = None
+        self._probing = False
+
+    def check(self):
+        """Lanza CircuitOpenError si el circuito no está cerrado."""
+        with self._lock:
+            if self._state != CLOSED:
+                raise CircuitOpenError(max(self._retry_at - time.monotonic(), 0.0))
+
+    def call(self, fn, *args, **kwargs):
+        """Ejecuta `fn` si el circuito está cerrado; si no, falla rápido."""
+        self.check()
+        try:
+            result = fn(*args, **kwargs)
+        except self.failure_types as err:
+            self.record_failure(err)
+            raise
+        self.record_success()
+        return result
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+
+    def record_failure(self, err):
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(err)
+            if self._state == CLOSED and self._failures >= self.failure_threshold:
+                self._trip()
+
+    def _trip(self):
+        """Abre el circuito y lanza la sonda en segundo plano (con el lock tomado)."""
+        self._state = OPEN
+        self._trips += 1
+        self._schedule_retry()
+        if not self._probing:
+            self._probing = True
+            threading.Thread(target=self._probe_loop, name=f"{self.name}-breaker-probe",
+                             daemon=True).start()
+
+    def _schedule_retry(self):
+        delay = min(self.max_delay, self.base_delay * (2 ** self._attempt))
+        delay = random.uniform(delay / 2, delay)
+        self._attempt += 1
+        self._retry_at = time.monotonic() + delay
+
+    def _probe_loop(self):
+        while True:
+            with self._lock:
+                wait = self._retry_at - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            with self._lock:
+                self._state = HALF_OPEN
+            try:
+                self._probe()
+            except Exception as err:
+                with self._lock:
+                    self._state = OPEN
+                    self._last_error = str(err)
+                    self._schedule_retry()
+                continue
+
+            with self._lock:
+                self._state = CLOSED
+                self._failures = 0
+                self._attempt = 0
+                self._last_error = None
+                self._probing = False
+            return
+
+    def status(self):
+        """Devuelve el estado del circuito para exponerlo en /health."""
+        with self._lock:
+            return {
+                "state": self._state,
+                "failures": self._failures,
+                "trips": self._trips,
+                "retry_in": round(max(self._retry_at - time.monotonic(), 0.0), 3)
+                if self._state != CLOSED else 0.0,
+                "last_error": self._last_error,
+            }
@@ -0,0 +1,141 @@
+"""
+Coalescencia de peticiones concurrentes ("single flight").
+
+Mientras una petición calcula el resultado de una clave (p. ej. los pasajeros de un vuelo),
+las peticiones idénticas que llegan esperan ese mismo cálculo y comparten su resultado, o
+su excepción, en lugar de repetir las consultas y assign_seats. Al terminar el cálculo la
+clave se olvida: guardar resultados es tarea de las cachés de respuestas.
+
+- SingleFlight: para hilos (app.py con gunicorn gthread).
+- AsyncSingleFlight: para el bucle de eventos (asgi_app.py).
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    """Un cálculo en curso y lo que necesitan quienes lo esperan."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave en un único cálculo.
+
+    - `computed` cuenta los cálculos realizados y `coalesced` las llamadas que reutilizaron
+      uno en curso (consultas y CPU ahorradas).
+    - Si el cálculo falla, todas las llamadas que lo esperaban reciben la misma excepción.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._computed = 0
+        self._coalesced = 0
+        self._failed = 0
+
+    def do(self, key, fn):
+        """Devuelve (resultado de fn(), True si se compartió el de otra llamada en curso)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self._computed += 1
+                leader = True
+            else:
+                self._coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as err:
+            call.error = err
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        """Contadores del proceso desde su arranque."""
+        with self._lock:
+            return {
+                "computed": self._computed,
+                "coalesced": self._coalesced,
+                "failed": self._failed,
+                "in_flight": len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """Equivalente de SingleFlight para corrutinas de un mismo bucle de eventos."""
+
+    def __init__(self):
+        self._calls = {}
+        self._computed = 0
+        self._coalesced = 0
+        self._failed = 0
+
+    async def do(self, key, make_coroutine):
+        """Devuelve (resultado de await make_coroutine(), True si se compartió)."""
+        future = self._calls.get(key)
+        if future is not None:
+            self._coalesced += 1
+            # shield: si se cancela quien espera, el cálculo sigue para los demás
+            return await asyncio.shield(future), True
+
+        self._computed += 1
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await make_coroutine()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as err:
+            self._failed += 1
+            future.set_exception(err)
+            # Marca la excepción como recuperada aunque nadie más la espere
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
+
+    def stats(self):
+        return {
+            "computed": self._computed,
+            "coalesced": self._coalesced,
+            "failed": self._failed,
+            "in_flight": len(self._calls),
+        }
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """Devuelve el SingleFlight del proceso, creándolo la primera vez."""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
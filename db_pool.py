@@ -0,0 +1,361 @@
+import os
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+from circuit_breaker import CircuitBreaker
+
+
+# Errores tras los que la conexión ya no sirve (conexión perdida, servidor caído, socket
+# cerrado...). Los errores de la consulta (ProgrammingError, IntegrityError...) no la invalidan.
+BROKEN_ERRORS = (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError)
+
+
+class PoolTimeoutError(Exception):
+    """Se lanza cuando no hay conexiones libres dentro del tiempo de espera."""
+
+
+class GuardedCursor:
+    """Cursor que marca su conexión como rota si una operación falla con BROKEN_ERRORS."""
+
+    def __init__(self, conn, cursor):
+        self._conn = conn
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, *args, **kwargs):
+        return self._conn.guard(self._cursor.execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._conn.guard(self._cursor.executemany, *args, **kwargs)
+
+    def fetchone(self):
+        return self._conn.guard(self._cursor.fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._conn.guard(self._cursor.fetchmany, *args, **kwargs)
+
+    def fetchall(self):
+        return self._conn.guard(self._cursor.fetchall)
+
+
+class PooledConnection:
+    """
+    Envoltorio de una conexión prestada por el pool.
+    Delega todo en la conexión real; close() la devuelve al pool en vez de cerrarla.
+    Si una operación falla con BROKEN_ERRORS queda marcada como rota (`broken`) y el pool
+    la descarta al devolverla en vez de prestarla otra vez.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.uses = 0
+        self._checked_out = False
+        self.broken = False
+        # Cursores preparados cacheados por sentencia SQL (ver repository.FlightRepository)
+        self.statements = {}
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def raw(self):
+        """Conexión de mysql.connector subyacente."""
+        return self._raw
+
+    def guard(self, fn, *args, **kwargs):
+        """Ejecuta `fn` y marca la conexión como rota si falla con BROKEN_ERRORS."""
+        try:
+            return fn(*args, **kwargs)
+        except BROKEN_ERRORS:
+            self.broken = True
+            raise
+
+    def cursor(self, *args, **kwargs):
+        return GuardedCursor(self, self.guard(self._raw.cursor, *args, **kwargs))
+
+    def start_transaction(self, *args, **kwargs):
+        return self.guard(self._raw.start_transaction, *args, **kwargs)
+
+    def commit(self):
+        return self.guard(self._raw.commit)
+
+    def rollback(self):
+        return self.guard(self._raw.rollback)
+
+    def ping(self, *args, **kwargs):
+        return self.guard(self._raw.ping, *args, **kwargs)
+
+    def close(self):
+        """Devuelve la conexión al pool."""
+        self._pool.release(self)
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones MySQL compartido por todo el proceso.
+
+    - Tamaño máximo configurable: nunca abre más de `size` conexiones a la vez.
+    - Validación al prestar: si la conexión estuvo inactiva más de
+      `validate_after` segundos se hace un ping antes de entregarla.
+    - Reciclaje: se descarta tras `max_uses` préstamos o `max_lifetime` segundos.
+    - Descarte al devolverla: una conexión marcada como rota (ver PooledConnection) o que
+      no se puede limpiar se cierra en vez de volver a las inactivas.
+    - Estadísticas: conexiones en uso, inactivas y tiempos de espera.
+    """
+
+    def __init__(self, connect, size=5, max_uses=1000, max_lifetime=1800,
+                 validate_after=30, acquire_timeout=10):
+        self._connect = connect
+        self.size = size
+        self.max_uses = max_uses
+        self.max_lifetime = max_lifetime
+        self.validate_after = validate_after
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._open = 0
+        self._in_use = 0
+
+        # Contadores para las estadísticas
+        self._acquired = 0
+        self._created = 0
+        self._recycled = 0
+        self._invalid = 0
+        self._timeouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self, timeout=None):
+        """
+        Presta una conexión del pool, esperando como máximo `timeout` segundos.
+        Lanza PoolTimeoutError si no queda ninguna libre a tiempo.
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        with self._cond:
+            waited = False
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    # Reservar el hueco; la conexión se abre fuera del lock
+                    conn = None
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No hay conexiones libres en el pool tras {timeout} segundos"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        try:
+            conn = self._checkout(conn)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+        wait = time.monotonic() - start
+        with self._cond:
+            self._acquired += 1
+            if waited:
+                self._waits += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        return conn
+
+    def _checkout(self, conn):
+        """Valida o recicla una conexión inactiva; abre una nueva si hace falta."""
+        if conn is not None:
+            now = time.monotonic()
+            if self._expired(conn, now):
+                self._discard(conn)
+                with self._cond:
+                    self._recycled += 1
+                conn = None
+            elif now - conn.last_used_at > self.validate_after and not self._is_alive(conn):
+                self._discard(conn)
+                with self._cond:
+                    self._invalid += 1
+                conn = None
+
+        if conn is None:
+            conn = PooledConnection(self, self._connect())
+            with self._cond:
+                self._created += 1
+
+        conn.uses += 1
+        conn._checked_out = True
+        return conn
+
+    def release(self, conn):
+        """Devuelve una conexión al pool, descartándola si está rota o caducada."""
+        if conn is None or not conn._checked_out:
+            return
+        conn._checked_out = False
+        conn.last_used_at = time.monotonic()
+
+        broken = conn.broken
+        reusable = not broken and not self._expired(conn, conn.last_used_at)
+        if reusable:
+            try:
+                # No dejar resultados pendientes ni transacciones abiertas al siguiente usuario
+                if conn.raw.unread_result:
+                    conn.raw.consume_results()
+                if conn.raw.in_transaction:
+                    conn.raw.rollback()
+            except Exception:
+                reusable = False
+                broken = True
+
+        with self._cond:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append(conn)
+            else:
+                self._open -= 1
+                if broken:
+                    self._invalid += 1
+                else:
+                    self._recycled += 1
+            self._cond.notify()
+
+        if not reusable:
+            self._discard(conn)
+
+    def _expired(self, conn, now):
+        return conn.uses >= self.max_uses or now - conn.created_at >= self.max_lifetime
+
+    @staticmethod
+    def _is_alive(conn):
+        try:
+            conn.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.raw.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        """Cierra todas las conexiones inactivas (p. ej. al apagar el proceso)."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Devuelve un diccionario con el estado y los contadores del pool."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "acquired": self._acquired,
+                "created": self._created,
+                "recycled": self._recycled,
+                "invalid": self._invalid,
+                "timeouts": self._timeouts,
+                "waits": self._waits,
+                "wait_avg_ms": round(self._wait_total / self._acquired * 1000, 3) if self._acquired else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+def connect_from_env():
+    """Abre una conexión nueva a la base de datos remota usando las variables de entorno."""
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+        database=os.getenv("DB_NAME"),
+        port=int(os.getenv("DB_PORT", 3306)),
+        connection_timeout=10,
+        autocommit=True
+    )
+
+
+def probe_from_env():
+    """Sonda del disyuntor: abre una conexión nueva, hace ping y la cierra."""
+    conn = connect_from_env()
+    try:
+        conn.ping(reconnect=False)
+    finally:
+        conn.close()
+
+
+_pool = None
+_breaker = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Devuelve el pool del proceso, creándolo la primera vez a partir del entorno."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    connect_from_env,
+                    size=int(os.getenv("DB_POOL_SIZE", 5)),
+                    max_uses=int(os.getenv("DB_POOL_MAX_USES", 1000)),
+                    max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", 1800)),
+                    validate_after=float(os.getenv("DB_POOL_VALIDATE_AFTER", 30)),
+                    acquire_timeout=float(os.getenv("DB_POOL_TIMEOUT", 10)),
+                )
+    return _pool
+
+
+def reset_after_fork():
+    """
+    En un proceso hijo recién creado (p. ej. un worker de gunicorn con preload): olvida el
+    pool y el disyuntor heredados sin cerrar sus conexiones, que pertenecen al padre.
+    Cada worker abre las suyas la primera vez que las necesita.
+    """
+    global _pool, _breaker, _pool_lock
+    _pool = None
+    _breaker = None
+    _pool_lock = threading.Lock()
+
+
+def get_breaker():
+    """Devuelve el disyuntor que protege la adquisición de conexiones del proceso."""
+    global _breaker
+    if _breaker is None:
+        with _pool_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    probe_from_env,
+                    failure_threshold=int(os.getenv("DB_BREAKER_THRESHOLD", 3)),
+                    base_delay=float(os.getenv("DB_BREAKER_BASE_DELAY", 1)),
+                    max_delay=float(os.getenv("DB_BREAKER_MAX_DELAY", 60)),
+                    failure_types=(mysql.connector.Error,),
+                )
+    return _breaker
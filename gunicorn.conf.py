@@ -0,0 +1,55 @@
+"""
+Configuración de gunicorn para producción:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+- `preload_app`: la aplicación se importa y precalienta (wsgi.prewarm) una sola vez en el
+  maestro; los workers la heredan al hacer fork, con las cachés ya cargadas.
+- Antes de crear los workers el maestro cierra sus conexiones y congela el heap (gc.freeze)
+  para que la copia en escritura comparta la memoria precargada.
+- Cada worker descarta el pool heredado y abre una conexión propia al arrancar.
+- `max_requests` + `max_requests_jitter` reciclan los workers de forma escalonada y
+  `graceful_timeout` deja terminar las peticiones en curso.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 3000)}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+# Un hilo por conexión del pool como máximo, para no esperar conexiones libres
+threads = int(os.getenv("GUNICORN_THREADS", os.getenv("DB_POOL_SIZE", 5)))
+
+preload_app = True
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    """Maestro listo, antes de crear los workers."""
+    from db_pool import get_pool
+
+    # Las conexiones abiertas en el maestro no deben compartirse con los workers
+    get_pool().close_idle()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """En cada worker nuevo: pool propio, abierto antes de la primera petición, y su prober."""
+    from db_pool import reset_after_fork, get_pool
+    from health import get_prober
+
+    reset_after_fork()
+    try:
+        pool = get_pool()
+        pool.release(pool.acquire())
+    except Exception as e:
+        server.log.warning(f"Worker {worker.pid}: no se pudo abrir la conexión inicial: {e}")
+    # Sondeo de la base de datos en segundo plano para /health/ready
+    get_prober()
@@ -0,0 +1,141 @@
+"""
+Comprobaciones de salud baratas para balanceadores y orquestadores.
+
+- /health/live (liveness): solo comprueba que el proceso atiende peticiones; nunca toca
+  la base de datos.
+- /health/ready (readiness): devuelve el último resultado de un hilo en segundo plano que
+  hace ping a la base de datos cada HEALTH_PROBE_INTERVAL segundos con una conexión del
+  pool, junto con el estado del disyuntor y la saturación del pool. Las sondas del
+  balanceador no abren conexiones ni bloquean workers por mucho que se repitan.
+"""
+import os
+import threading
+import time
+
+from circuit_breaker import CircuitOpenError
+from db_pool import PoolTimeoutError, get_breaker, get_pool
+
+
+class DatabaseProber:
+    """
+    Ejecuta `check()` cada `interval` segundos en un hilo daemon y guarda el resultado.
+
+    `check` debe lanzar una excepción si la base de datos no responde. Las excepciones de
+    `busy_types` (p. ej. el pool sin conexiones libres) no cuentan como fallo de la base de
+    datos: solo se anotan y se conserva el último resultado.
+    """
+
+    def __init__(self, check, interval=5.0, busy_types=()):
+        self._check = check
+        self.interval = interval
+        self.busy_types = busy_types
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._ok = None
+        self._checked_at = None
+        self._latency = None
+        self._error = None
+        self._failures = 0
+        self._busy = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="db-prober", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.interval)
+
+    def probe(self):
+        """Ejecuta una comprobación y guarda su resultado."""
+        start = time.monotonic()
+        try:
+            self._check()
+        except self.busy_types:
+            with self._lock:
+                self._busy += 1
+            return
+        except Exception as err:
+            with self._lock:
+                self._ok = False
+                self._error = str(err)
+                self._failures += 1
+                self._checked_at = time.monotonic()
+                self._latency = None
+            return
+        with self._lock:
+            self._ok = True
+            self._error = None
+            self._failures = 0
+            self._checked_at = time.monotonic()
+            self._latency = time.monotonic() - start
+
+    def status(self):
+        """Último resultado: ok (None si aún no hubo ninguno), antigüedad, latencia y errores."""
+        with self._lock:
+            return {
+                "ok": self._ok,
+                "age_s": round(time.monotonic() - self._checked_at, 3) if self._checked_at is not None else None,
+                "latency_ms": round(self._latency * 1000, 3) if self._latency is not None else None,
+                "consecutive_failures": self._failures,
+                "skipped_busy": self._busy,
+                "last_error": self._error,
+            }
+
+
+def readiness(probe, pool, circuit, max_age, max_saturation=1.0):
+    """
+    Decide si el worker está listo a partir del estado del prober, del pool y del
+    disyuntor. Devuelve (listo, motivos por los que no lo está).
+    """
+    reasons = []
+    if circuit["state"] != "closed":
+        reasons.append(f"circuit {circuit['state']}")
+    if probe["ok"] is None:
+        reasons.append("database not probed yet")
+    elif not probe["ok"]:
+        reasons.append("database probe failed")
+    elif probe["age_s"] > max_age:
+        reasons.append("database probe is stale")
+    if pool["size"] and pool["in_use"] / pool["size"] > max_saturation:
+        reasons.append("connection pool saturated")
+    return not reasons, reasons
+
+
+def ping_database():
+    """Comprobación del prober: presta una conexión del pool (a través del disyuntor) y hace ping."""
+    pool = get_pool()
+    conn = get_breaker().call(pool.acquire, timeout=float(os.getenv("HEALTH_PROBE_TIMEOUT", 1)))
+    try:
+        get_breaker().call(conn.ping, reconnect=False)
+    finally:
+        pool.release(conn)
+
+
+_prober = None
+_prober_lock = threading.Lock()
+
+
+def get_prober():
+    """
+    Devuelve el prober del proceso y lo arranca la primera vez. Los hilos no sobreviven a
+    un fork, así que un worker de gunicorn crea el suyo aunque el maestro tuviera uno.
+    """
+    global _prober
+    if _prober is None or _prober.pid != os.getpid():
+        with _prober_lock:
+            if _prober is None or _prober.pid != os.getpid():
+                _prober = DatabaseProber(
+                    ping_database,
+                    interval=float(os.getenv("HEALTH_PROBE_INTERVAL", 5)),
+                    # Pool ocupado o circuito abierto: no es un resultado nuevo de la base de datos
+                    busy_types=(PoolTimeoutError, CircuitOpenError),
+                ).start()
+    return _prober
@@ -0,0 +1,246 @@
+"""
+Generador de carga concurrente contra la API servida sobre la base de datos local.
+
+Lanza `--concurrency` clientes durante `--duration` segundos con una mezcla configurable
+de peticiones y muestra, por tipo y en total, el rendimiento (peticiones/s), la latencia
+p50/p95/p99 y la tasa de errores. No usa nunca la base de datos remota: la API debe estar
+apuntando a la base local sembrada con loadtest/seed.py.
+
+Uso:
+    # API y MySQL en contenedores (loadtest/docker-compose.yml)
+    python loadtest/run.py --url http://localhost:3001 --concurrency 32 --duration 30
+
+    # o arrancar aquí mismo la API con gunicorn contra la base local
+    python loadtest/run.py --start-app --mix passengers:60,revalidate:20,bulk:10,health:10
+
+Tipos de petición de --mix:
+    passengers  GET /flights/<id>/passengers
+    revalidate  la misma con If-None-Match del último ETag recibido (304 esperado)
+    pretty      GET /flights/<id>/passengers?pretty=1
+    page        GET /flights/<id>/passengers?limit=100
+    stream      GET /flights/<id>/passengers?stream=1
+    bulk        GET /flights/passengers?ids=<--bulk-size ids>
+    health      GET /health
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from seed import db_config, LOCAL_HOSTS  # noqa: E402
+
+OK_STATUS = {200, 304}
+
+
+def parse_mix(raw):
+    """'passengers:70,health:30' -> [('passengers', 70.0), ('health', 30.0)]"""
+    mix = []
+    for part in raw.split(","):
+        kind, weight = part.split(":")
+        if kind not in REQUESTS:
+            raise argparse.ArgumentTypeError(f"tipo de petición desconocido: {kind}")
+        mix.append((kind, float(weight)))
+    return mix
+
+
+def flight_path(client):
+    return f"/flights/{client.rng.randint(1, client.flights)}/passengers"
+
+
+def request_passengers(client):
+    return client.get(flight_path(client), remember_etag=True)
+
+
+def request_revalidate(client):
+    if not client.etags:
+        return request_passengers(client)
+    path = client.rng.choice(list(client.etags))
+    return client.get(path, headers={"If-None-Match": client.etags[path]})
+
+
+def request_bulk(client):
+    ids = ",".join(str(client.rng.randint(1, client.flights)) for _ in range(client.bulk_size))
+    return client.get(f"/flights/passengers?ids={ids}")
+
+
+REQUESTS = {
+    "passengers": request_passengers,
+    "revalidate": request_revalidate,
+    "pretty": lambda client: client.get(flight_path(client) + "?pretty=1"),
+    "page": lambda client: client.get(flight_path(client) + "?limit=100"),
+    "stream": lambda client: client.get(flight_path(client) + "?stream=1"),
+    "bulk": request_bulk,
+    "health": lambda client: client.get("/health"),
+}
+
+
+class Client:
+    """Un cliente de carga: una sesión HTTP propia y sus resultados (tipo, estado, segundos)."""
+
+    def __init__(self, url, flights, bulk_size, seed, timeout):
+        self.url = url.rstrip("/")
+        self.flights = flights
+        self.bulk_size = bulk_size
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+        self.etags = {}
+        self.results = []
+
+    def get(self, path, headers=None, remember_etag=False):
+        response = self.session.get(self.url + path, headers=headers, timeout=self.timeout)
+        response.content  # leer el cuerpo completo (también en streaming)
+        if remember_etag and response.headers.get("ETag"):
+            self.etags[path] = response.headers["ETag"]
+        return response.status_code
+
+    def run(self, kinds, weights, start_at, measure_at, stop_at):
+        while time.monotonic() < start_at:
+            time.sleep(0.001)
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                return
+            kind = self.rng.choices(kinds, weights)[0]
+            try:
+                status = REQUESTS[kind](self)
+            except requests.RequestException as e:
+                status = type(e).__name__
+            if now >= measure_at:
+                self.results.append((kind, status, time.monotonic() - now))
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(results, seconds):
+    """Resumen por tipo de petición y total: n, errores, rps y latencias en ms."""
+    by_kind = {}
+    for kind, status, elapsed in results:
+        by_kind.setdefault(kind, []).append((status, elapsed))
+    by_kind["total"] = [(status, elapsed) for _, status, elapsed in results]
+
+    summary = {}
+    for kind, samples in by_kind.items():
+        latencies = sorted(elapsed * 1000 for _, elapsed in samples)
+        errors = {}
+        for status, _ in samples:
+            if status not in OK_STATUS:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+        summary[kind] = {
+            "requests": len(samples),
+            "rps": len(samples) / seconds if seconds else 0.0,
+            "error_rate": sum(errors.values()) / len(samples) if samples else 0.0,
+            "errors": errors,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": latencies[-1] if latencies else 0.0,
+            "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n{'tipo':<12} {'peticiones':>10} {'rps':>8} {'errores':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    for kind, s in summary.items():
+        print(f"{kind:<12} {s['requests']:>10} {s['rps']:>8.1f} {s['error_rate'] * 100:>7.2f}% {s['p50_ms']:>8.1f} "
+              f"{s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} {s['max_ms']:>8.1f}")
+    errors = summary.get("total", {}).get("errors")
+    if errors:
+        print(f"\n❌ Errores por estado: {errors}")
+
+
+def start_app(port, extra_env):
+    """Arranca la API con gunicorn apuntando a la base local y espera a que responda."""
+    config = db_config()
+    if config["host"] not in LOCAL_HOSTS:
+        raise SystemExit(f"{config['host']} no es un host local; --start-app solo usa la base local")
+    env = dict(os.environ, PORT=str(port), DB_HOST=config["host"], DB_PORT=str(config["port"]),
+               DB_USER=config["user"], DB_PASS=config["password"], DB_NAME=config["database"], **extra_env)
+    process = subprocess.Popen(["gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("❌ La API terminó al arrancar")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=2).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise SystemExit("❌ La API no respondió a /health en 60 s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:3001")
+    parser.add_argument("--start-app", action="store_true", help="arrancar la API con gunicorn contra la base local")
+    parser.add_argument("--port", type=int, default=3001, help="puerto de la API arrancada con --start-app")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="segundos medidos")
+    parser.add_argument("--warmup", type=float, default=5, help="segundos iniciales que no se miden")
+    parser.add_argument("--mix", type=parse_mix,
+                        default=parse_mix("passengers:60,revalidate:15,page:10,bulk:5,stream:5,health:5"))
+    parser.add_argument("--flights", type=int, default=200, help="vuelos sembrados (ids 1..N)")
+    parser.add_argument("--bulk-size", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="guardar el resumen en este archivo")
+    args = parser.parse_args()
+
+    app_process = None
+    url = args.url
+    if args.start_app:
+        app_process = start_app(args.port, {})
+        url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        kinds, weights = zip(*args.mix)
+        clients = [Client(url, args.flights, args.bulk_size, args.seed + i, args.timeout)
+                   for i in range(args.concurrency)]
+        start_at = time.monotonic() + 0.5
+        measure_at = start_at + args.warmup
+        stop_at = measure_at + args.duration
+        threads = [threading.Thread(target=c.run, args=(kinds, weights, start_at, measure_at, stop_at), daemon=True)
+                   for c in clients]
+        print(f"🚀 {args.concurrency} clientes contra {url} durante {args.duration:.0f} s "
+              f"(+{args.warmup:.0f} s de calentamiento)")
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        results = [result for client in clients for result in client.results]
+        summary = summarize(results, args.duration)
+        print_summary(summary)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"args": {k: v for k, v in vars(args).items() if k != "mix"}, "mix": dict(args.mix),
+                           "summary": summary}, f, indent=2)
+        return 1 if summary.get("total", {}).get("error_rate", 0) > 0 else 0
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+-- Esquema local para pruebas de carga (mismas tablas y columnas que usa la API).
+-- Las fechas se guardan como epoch en segundos, igual que en la base de datos remota.
+
+CREATE TABLE IF NOT EXISTS airplane (
+    airplane_id INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS seat_type (
+    seat_type_id INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS seat (
+    seat_id INT PRIMARY KEY,
+    seat_column VARCHAR(2) NOT NULL,
+    seat_row INT NOT NULL,
+    seat_type_id INT NOT NULL,
+    airplane_id INT NOT NULL,
+    KEY seat_airplane (airplane_id),
+    FOREIGN KEY (seat_type_id) REFERENCES seat_type (seat_type_id),
+    FOREIGN KEY (airplane_id) REFERENCES airplane (airplane_id)
+);
+
+CREATE TABLE IF NOT EXISTS flight (
+    flight_id INT PRIMARY KEY,
+    takeoff_date_time INT NOT NULL,
+    takeoff_airport VARCHAR(255) NOT NULL,
+    landing_date_time INT NOT NULL,
+    landing_airport VARCHAR(255) NOT NULL,
+    airplane_id INT NOT NULL,
+    FOREIGN KEY (airplane_id) REFERENCES airplane (airplane_id)
+);
+
+CREATE TABLE IF NOT EXISTS passenger (
+    passenger_id INT PRIMARY KEY,
+    dni INT NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    age INT NOT NULL,
+    country VARCHAR(255) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS purchase (
+    purchase_id INT PRIMARY KEY,
+    purchase_date INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS boarding_pass (
+    boarding_pass_id INT PRIMARY KEY,
+    purchase_id INT NOT NULL,
+    passenger_id INT NOT NULL,
+    seat_type_id INT NOT NULL,
+    seat_id INT NULL,
+    flight_id INT NOT NULL,
+    -- Consultas por vuelo ordenadas por pase, y grupos de compra con pases pendientes
+    KEY boarding_pass_flight (flight_id, boarding_pass_id),
+    KEY boarding_pass_flight_purchase (flight_id, purchase_id),
+    FOREIGN KEY (purchase_id) REFERENCES purchase (purchase_id),
+    FOREIGN KEY (passenger_id) REFERENCES passenger (passenger_id),
+    FOREIGN KEY (seat_type_id) REFERENCES seat_type (seat_type_id),
+    FOREIGN KEY (seat_id) REFERENCES seat (seat_id),
+    FOREIGN KEY (flight_id) REFERENCES flight (flight_id)
+);
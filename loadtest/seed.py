@@ -0,0 +1,157 @@
+"""
+Carga datos sintéticos en la base de datos local de pruebas de carga.
+
+Borra las tablas y genera aviones (de 76 a 800 asientos), vuelos, compras, pasajeros y
+pases de abordar, con una parte de los asientos ya asignados. Con la misma semilla los
+datos son siempre los mismos, así que volver a sembrar deja la base lista para repetir
+una medición (las asignaciones guardadas por la API se descartan).
+
+La conexión se configura con variables LOADTEST_DB_* (no se lee el .env de la API, para no
+tocar nunca la base de datos remota) y, salvo --allow-remote, solo se aceptan hosts locales:
+    python loadtest/seed.py --flights 200 --load 0.85 --preassigned 0.3
+"""
+import argparse
+import os
+import random
+
+import mysql.connector
+
+# (nombre, filas, columnas, filas de cada tipo de asiento)
+AIRPLANES = [
+    ("regional-76", 19, "ABCD", ((2, 1), (5, 2), (None, 3))),
+    ("narrow-180", 30, "ABCDEF", ((3, 1), (8, 2), (None, 3))),
+    ("wide-400", 40, "ABCDEFGHJK", ((4, 1), (12, 2), (None, 3))),
+    ("wide-800", 80, "ABCDEFGHJK", ((6, 1), (20, 2), (None, 3))),
+]
+SEAT_TYPES = [(1, "Primera clase"), (2, "Clase económica premium"), (3, "Clase económica")]
+AIRPORTS = ["SCL", "EZE", "LIM", "GRU", "BOG", "MVD", "ASU", "UIO"]
+COUNTRIES = ["Chile", "Argentina", "Perú", "Brasil", "Colombia", "Uruguay"]
+TABLES = ["boarding_pass", "purchase", "passenger", "flight", "seat", "seat_type", "airplane"]
+
+# Fecha base fija (2024-01-01 UTC) para que la semilla determine también las fechas
+BASE_EPOCH = 1704067200
+CHUNK = 1000
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "mysql", "loadtest-mysql"}
+
+
+def db_config():
+    """Conexión a la base local de pruebas de carga (ver loadtest/docker-compose.yml)."""
+    return {
+        "host": os.getenv("LOADTEST_DB_HOST", "127.0.0.1"),
+        "port": int(os.getenv("LOADTEST_DB_PORT", 3307)),
+        "user": os.getenv("LOADTEST_DB_USER", "root"),
+        "password": os.getenv("LOADTEST_DB_PASS", "loadtest"),
+        "database": os.getenv("LOADTEST_DB_NAME", "airline"),
+    }
+
+
+def generate(flights, load_factor, preassigned_ratio, rng):
+    """Devuelve {tabla: filas} con datos sintéticos coherentes entre sí."""
+    data = {table: [] for table in TABLES}
+    data["seat_type"] = list(SEAT_TYPES)
+
+    seats_by_airplane = {}
+    for airplane_id, (name, rows, columns, type_rows) in enumerate(AIRPLANES, start=1):
+        data["airplane"].append((airplane_id, name))
+        seats_by_airplane[airplane_id] = []
+        for row in range(1, rows + 1):
+            seat_type_id = next(t for limit, t in type_rows if limit is None or row <= limit)
+            for column in columns:
+                seat = (len(data["seat"]) + 1, column, row, seat_type_id, airplane_id)
+                data["seat"].append(seat)
+                seats_by_airplane[airplane_id].append(seat)
+
+    for flight_id in range(1, flights + 1):
+        airplane_id = rng.randint(1, len(AIRPLANES))
+        takeoff = BASE_EPOCH + rng.randint(0, 60) * 86400
+        origin, destination = rng.sample(AIRPORTS, 2)
+        data["flight"].append((flight_id, takeoff, origin, takeoff + rng.randint(1, 12) * 3600,
+                               destination, airplane_id))
+
+        free_by_type = {}
+        for seat in seats_by_airplane[airplane_id]:
+            free_by_type.setdefault(seat[3], []).append(seat[0])
+        for seats in free_by_type.values():
+            rng.shuffle(seats)
+
+        target = int(len(seats_by_airplane[airplane_id]) * load_factor)
+        seated = 0
+        while seated < target:
+            seat_type_id = rng.choice(list(free_by_type))
+            size = min(rng.choices([1, 2, 3, 4, 5], [5, 4, 3, 2, 1])[0], target - seated)
+            if len(free_by_type[seat_type_id]) < size:
+                if not any(len(seats) >= size for seats in free_by_type.values()):
+                    break
+                continue
+            purchase_id = len(data["purchase"]) + 1
+            data["purchase"].append((purchase_id, takeoff - rng.randint(1, 90) * 86400))
+            for i in range(size):
+                passenger_id = len(data["passenger"]) + 1
+                minor = i > 0 and rng.random() < 0.25
+                data["passenger"].append((passenger_id, 10000000 + passenger_id, f"Pasajero {passenger_id}",
+                                          rng.randint(2, 17) if minor else rng.randint(18, 80),
+                                          rng.choice(COUNTRIES)))
+                seat_id = free_by_type[seat_type_id].pop()
+                data["boarding_pass"].append((len(data["boarding_pass"]) + 1, purchase_id, passenger_id,
+                                              seat_type_id, seat_id if rng.random() < preassigned_ratio else None,
+                                              flight_id))
+            seated += size
+    return data
+
+
+INSERTS = {
+    "airplane": "INSERT INTO airplane (airplane_id, name) VALUES (%s, %s)",
+    "seat_type": "INSERT INTO seat_type (seat_type_id, name) VALUES (%s, %s)",
+    "seat": "INSERT INTO seat (seat_id, seat_column, seat_row, seat_type_id, airplane_id) VALUES (%s, %s, %s, %s, %s)",
+    "flight": "INSERT INTO flight (flight_id, takeoff_date_time, takeoff_airport, landing_date_time, "
+              "landing_airport, airplane_id) VALUES (%s, %s, %s, %s, %s, %s)",
+    "passenger": "INSERT INTO passenger (passenger_id, dni, name, age, country) VALUES (%s, %s, %s, %s, %s)",
+    "purchase": "INSERT INTO purchase (purchase_id, purchase_date) VALUES (%s, %s)",
+    "boarding_pass": "INSERT INTO boarding_pass (boarding_pass_id, purchase_id, passenger_id, seat_type_id, "
+                     "seat_id, flight_id) VALUES (%s, %s, %s, %s, %s, %s)",
+}
+
+
+def seed(conn, data):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in TABLES:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        # Orden inverso: primero las tablas referenciadas
+        for table in reversed(TABLES):
+            rows = data[table]
+            for start in range(0, len(rows), CHUNK):
+                cursor.executemany(INSERTS[table], rows[start:start + CHUNK])
+            conn.commit()
+            print(f"   {table:<14} {len(rows):>8} filas")
+    finally:
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, default=200)
+    parser.add_argument("--load", type=float, default=0.85, help="ocupación de cada vuelo")
+    parser.add_argument("--preassigned", type=float, default=0.3, help="proporción de pases con asiento asignado")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--allow-remote", action="store_true", help="permitir un host que no sea local")
+    args = parser.parse_args()
+
+    config = db_config()
+    if config["host"] not in LOCAL_HOSTS and not args.allow_remote:
+        parser.error(f"{config['host']} no es un host local; usa --allow-remote si es realmente una base de pruebas")
+
+    data = generate(args.flights, args.load, args.preassigned, random.Random(args.seed))
+    conn = mysql.connector.connect(**config)
+    try:
+        print(f"🌱 Sembrando {config['host']}:{config['port']}/{config['database']}")
+        seed(conn, data)
+    finally:
+        conn.close()
+    print("✅ Base de datos de pruebas de carga lista")
+
+
+if __name__ == "__main__":
+    main()
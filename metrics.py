@@ -0,0 +1,347 @@
+"""
+Métricas de la ruta crítica: duración de cada etapa de una petición en histogramas,
+cabecera Server-Timing por respuesta y exposición en formato Prometheus (/metrics).
+
+- `stage(nombre)` mide una etapa de la petición en curso (conexión, consultas,
+  assign_seats, persistencia, serialización...). Fuera de una petición instrumentada
+  (tests, benchmarks, scripts, el pool de procesos) no hace nada.
+- La petición en curso se guarda en una ContextVar, que sirve igual para hilos y asyncio.
+- Cada worker acumula sus histogramas y contadores. Si hay un almacén compartido
+  (shared_cache.SharedCache) publica una instantánea cada METRICS_PUBLISH_INTERVAL
+  segundos y /metrics suma las de todos los workers del host, así que da igual qué
+  worker atienda la consulta de Prometheus. Lo acumulado por los workers que terminan
+  (reciclados por gunicorn) se conserva para que los contadores no retrocedan.
+"""
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from shared_cache import get_shared_cache
+
+# Límites superiores (segundos) de las cubetas de los histogramas
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SNAPSHOT_PREFIX = "metrics/worker/"
+SNAPSHOT_TIMEOUT = 86400
+# Acumulado de los workers terminados y cerrojo para actualizarlo desde un solo worker
+ARCHIVE_KEY = "metrics/archive"
+ARCHIVE_LOCK_KEY = "metrics/archive-lock"
+NAMESPACE = "flights_api"
+
+_current = contextvars.ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    """Etapas medidas durante una petición, en orden: [(nombre, segundos)]."""
+
+    __slots__ = ("start", "stages")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = []
+
+    def add(self, name, seconds):
+        self.stages.append((name, seconds))
+
+    def totals(self):
+        """Segundos por etapa, sumando las que se repiten (p. ej. varias escrituras)."""
+        totals = {}
+        for name, seconds in self.stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self):
+        """Valor de la cabecera Server-Timing (milisegundos), con el total al final."""
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.totals().items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name):
+    """Context manager que suma la duración del bloque a la etapa `name` de la petición en curso."""
+    timer = _current.get()
+    return _NO_STAGE if timer is None else _Stage(timer, name)
+
+
+def record(name, seconds):
+    """Añade una etapa ya medida a la petición en curso."""
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+def start_request():
+    """Empieza a medir una petición; devuelve (timer, token para end_request)."""
+    timer = RequestTimer()
+    return timer, _current.set(timer)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+class Histogram:
+    """Histograma de cubetas fijas (BUCKETS): conteos por cubeta, suma y número de observaciones."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def to_tuple(self):
+        return list(self.counts), self.sum, self.count
+
+
+class MetricsRegistry:
+    """
+    Histogramas por etapa y por endpoint, respuestas por estado y colectores de
+    contadores de otros componentes (pool, cachés, coalescencia).
+    """
+
+    def __init__(self, store=None, publish_interval=5.0):
+        self.store = store
+        self.publish_interval = publish_interval
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._requests = {}
+        self._responses = {}
+        self._collectors = []
+        self._published_at = 0.0
+
+    def register(self, name, collect, gauges=(), counters=(), per_worker=True):
+        """
+        Añade un colector: `collect()` devuelve un diccionario y se exportan sus claves
+        `gauges` y `counters` como flights_api_<name>_<clave>. Con per_worker=False los
+        valores ya son comunes a todos los workers (caché compartida) y no se suman.
+        """
+        self._collectors.append((name, collect, tuple(gauges), tuple(counters), per_worker))
+
+    def observe_request(self, endpoint, status, timer):
+        """Registra las etapas y la duración total de una petición terminada."""
+        elapsed = timer.elapsed()
+        with self._lock:
+            for name, seconds in timer.totals().items():
+                histogram = self._stages.get(name)
+                if histogram is None:
+                    histogram = self._stages[name] = Histogram()
+                histogram.observe(seconds)
+            histogram = self._requests.get(endpoint)
+            if histogram is None:
+                histogram = self._requests[endpoint] = Histogram()
+            histogram.observe(elapsed)
+            key = (endpoint, str(status))
+            self._responses[key] = self._responses.get(key, 0) + 1
+        self.publish()
+
+    def snapshot(self, per_worker=True):
+        """Estado del worker como datos simples (se guarda en el almacén compartido)."""
+        with self._lock:
+            snapshot = {
+                "stages": {name: h.to_tuple() for name, h in self._stages.items()},
+                "requests": {name: h.to_tuple() for name, h in self._requests.items()},
+                "responses": dict(self._responses),
+                "collectors": {},
+            }
+        for name, collect, gauges, counters, worker in self._collectors:
+            if worker != per_worker:
+                continue
+            try:
+                values = collect() or {}
+            except Exception as e:
+                print(f"⚠️ Métricas de {name} no disponibles: {e}")
+                continue
+            snapshot["collectors"][name] = {k: values[k] for k in gauges + counters if k in values}
+        return snapshot
+
+    def publish(self, force=False):
+        """Publica la instantánea del worker si pasó publish_interval desde la anterior."""
+        if self.store is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._published_at < self.publish_interval:
+            return
+        self._published_at = now
+        try:
+            self.store.set(f"{SNAPSHOT_PREFIX}{os.getpid()}", self.snapshot(), timeout=SNAPSHOT_TIMEOUT)
+        except Exception as e:
+            print(f"⚠️ No se pudieron publicar las métricas: {e}")
+
+    def worker_snapshots(self):
+        """
+        Instantáneas de los workers vivos del host más el archivo de los que ya terminaron
+        (solo la propia si no hay almacén). Devuelve (vivos, terminados).
+        """
+        if self.store is None:
+            return [self.snapshot()], []
+        self.publish(force=True)
+        live, dead = [], {}
+        for key, snapshot in self.store.get_prefix(SNAPSHOT_PREFIX).items():
+            pid = int(key[len(SNAPSHOT_PREFIX):])
+            if pid == os.getpid() or _process_alive(pid):
+                live.append(snapshot)
+            else:
+                dead[key] = snapshot
+        return live, self._archive(dead)
+
+    def _archive(self, dead):
+        """
+        Acumula las instantáneas de workers terminados (p. ej. reciclados por max_requests)
+        en una sola entrada, para que los contadores totales no retrocedan. Devuelve el archivo.
+        """
+        archive = self.store.get_prefix(ARCHIVE_KEY).get(ARCHIVE_KEY)
+        if not dead or not self.store.add(ARCHIVE_LOCK_KEY, os.getpid(), timeout=10):
+            # Nada que archivar, u otro worker lo está haciendo en este momento
+            return [archive] if archive else []
+        try:
+            archive = self.store.get_prefix(ARCHIVE_KEY).get(ARCHIVE_KEY)
+            archive = _merge_snapshots(([archive] if archive else []) + list(dead.values()))
+            self.store.set(ARCHIVE_KEY, archive, timeout=0)
+            for key in dead:
+                self.store.delete(key)
+        finally:
+            self.store.delete(ARCHIVE_LOCK_KEY)
+        return [archive]
+
+    def render(self):
+        """Texto en formato de exposición de Prometheus con la suma de todos los workers."""
+        live, archived = self.worker_snapshots()
+        # Los contadores suman también los workers terminados; los indicadores, solo los vivos
+        total = _merge_snapshots(live + archived)
+        current = _merge_snapshots(live)
+
+        lines = []
+        _histogram(lines, "stage_seconds", "Duración de cada etapa de las peticiones", "stage", total["stages"])
+        _histogram(lines, "request_seconds", "Duración total de las peticiones por endpoint", "endpoint",
+                   total["requests"])
+
+        lines.append(f"# HELP {NAMESPACE}_responses_total Respuestas por endpoint y código de estado")
+        lines.append(f"# TYPE {NAMESPACE}_responses_total counter")
+        for (endpoint, status), value in sorted(total["responses"].items()):
+            lines.append(f'{NAMESPACE}_responses_total{{endpoint="{endpoint}",status="{status}"}} {value}')
+
+        lines.append(f"# HELP {NAMESPACE}_workers Workers vivos con métricas publicadas")
+        lines.append(f"# TYPE {NAMESPACE}_workers gauge")
+        lines.append(f"{NAMESPACE}_workers {len(live)}")
+
+        shared = self.snapshot(per_worker=False)["collectors"]
+        for name, _, gauges, counters, per_worker in self._collectors:
+            for key in gauges + counters:
+                if not per_worker:
+                    source = shared
+                else:
+                    source = (current if key in gauges else total)["collectors"]
+                value = source.get(name, {}).get(key)
+                if value is None:
+                    continue
+                metric = f"{NAMESPACE}_{name}_{key}" + ("_total" if key in counters else "")
+                lines.append(f"# TYPE {metric} {'counter' if key in counters else 'gauge'}")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge_snapshots(snapshots):
+    """Suma histogramas, respuestas y valores numéricos de los colectores de varias instantáneas."""
+    merged = {"stages": _merge_histograms(s["stages"] for s in snapshots),
+              "requests": _merge_histograms(s["requests"] for s in snapshots),
+              "responses": {}, "collectors": {}}
+    for s in snapshots:
+        for key, value in s["responses"].items():
+            merged["responses"][key] = merged["responses"].get(key, 0) + value
+        for name, values in s["collectors"].items():
+            target = merged["collectors"].setdefault(name, {})
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    target[key] = target.get(key, 0) + value
+    return merged
+
+
+def _merge_histograms(groups):
+    merged = {}
+    for histograms in groups:
+        for name, (counts, total, count) in histograms.items():
+            if name not in merged:
+                merged[name] = ([0] * len(counts), 0.0, 0)
+            m_counts, m_total, m_count = merged[name]
+            merged[name] = ([a + b for a, b in zip(m_counts, counts)], m_total + total, m_count + count)
+    return merged
+
+
+def _histogram(lines, name, help_text, label, histograms):
+    metric = f"{NAMESPACE}_{name}"
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    for value, (counts, total, count) in sorted(histograms.items()):
+        cumulative = 0
+        for bound, bucket in zip(BUCKETS + (float("inf"),), counts):
+            cumulative += bucket
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{metric}_bucket{{{label}="{value}",le="{le}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{{label}="{value}"}} {total:.6f}')
+        lines.append(f'{metric}_count{{{label}="{value}"}} {count}')
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Devuelve el registro de métricas del proceso, creándolo la primera vez. Con
+    METRICS_SHARED=1 (por defecto) los workers comparten sus instantáneas en la caché
+    compartida y /metrics muestra el total del host.
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                store = get_shared_cache() if os.getenv("METRICS_SHARED", "1") == "1" else None
+                _metrics = MetricsRegistry(store, publish_interval=float(os.getenv("METRICS_PUBLISH_INTERVAL", 5)))
+    return _metrics
@@ -0,0 +1,173 @@
+"""
+Preasignación offline de asientos para los próximos vuelos.
+
+Selecciona los vuelos que despegan en las próximas --hours horas con pases sin asiento,
+los carga por lotes (vuelos y pasajeros en una consulta, mapas de asientos por avión),
+calcula los asientos con seating.assign_seats repartiendo los vuelos entre un pool de
+procesos y guarda el resultado en transacciones de --chunk-size filas. Así la API sirve
+sobre todo vuelos ya sentados y la asignación perezosa queda para los pases nuevos.
+
+Tras cada lote se guarda un checkpoint (último flight_id procesado y la ventana de fechas);
+si el trabajo se interrumpe, la siguiente ejecución continúa desde ahí con la misma ventana
+(--reset empieza de nuevo). Las escrituras solo afectan a pases que siguen sin asiento, así
+que repetir un lote a medias o coincidir con la API no pisa asientos ya guardados.
+
+    python preassign.py --hours 48 --workers 4 --chunk-size 1000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from assignments import compute_pending_seats, persist_assignments
+from repository import FlightRepository
+from seat_maps import SeatMapCache
+
+
+class Checkpoint:
+    """Estado del trabajo en un archivo JSON; se reemplaza de forma atómica en cada guardado."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def preassign(repository, start, end, checkpoint=None, batch_flights=50, chunk_size=1000,
+              executor=None, engine=None, dry_run=False, seat_maps=None):
+    """
+    Asigna y guarda los asientos pendientes de los vuelos que despegan en [start, end).
+    `repository` es un FlightRepository (también hace de conexión para las escrituras).
+    Continúa desde el checkpoint si es de la misma ventana. Devuelve el estado final:
+    vuelos procesados, asientos guardados y los que ya tenían asiento en la BD (`conflicts`).
+    """
+    state = {"start": start, "end": end, "last_flight_id": 0, "flights": 0, "seats": 0, "conflicts": 0}
+    saved = checkpoint.load() if checkpoint is not None else None
+    if saved and (saved["start"], saved["end"]) == (start, end):
+        state = saved
+        print(f"⏩ Reanudando después del vuelo {state['last_flight_id']} "
+              f"({state['flights']} vuelos y {state['seats']} asientos ya procesados)")
+    seat_maps = seat_maps or SeatMapCache()
+
+    total = state["flights"] + repository.count_upcoming_pending_flights(start, end, state["last_flight_id"])
+    print(f"🛫 {total} vuelos con pases sin asiento entre {start} y {end}")
+    began = time.monotonic()
+    done_before, seats_before = state["flights"], state["seats"]
+
+    while True:
+        flight_ids = repository.upcoming_pending_flight_ids(start, end, state["last_flight_id"], batch_flights)
+        if not flight_ids:
+            break
+
+        # 1. Vuelos, pasajeros y mapas de asientos del lote
+        flights, passengers_by_flight = repository.load_flights(flight_ids)
+        found_ids = [f for f in flight_ids if f in flights]
+        maps = seat_maps.get_many({flights[f]['airplane_id'] for f in found_ids}, repository.load_seats)
+
+        # 2. Asignar en paralelo (un vuelo por tarea)
+        args = ([passengers_by_flight[f] for f in found_ids],
+                [maps[flights[f]['airplane_id']] for f in found_ids],
+                [engine] * len(found_ids))
+        results = executor.map(compute_pending_seats, *args) if executor else map(compute_pending_seats, *args)
+        to_persist = [(seat_id, bp) for seats in results for bp, seat_id in seats.items()]
+
+        # 3. Guardar en transacciones acotadas
+        if not dry_run:
+            for chunk in chunks(to_persist, chunk_size):
+                updated = persist_assignments(repository, chunk)
+                state["seats"] += updated
+                state["conflicts"] += len(chunk) - updated
+        else:
+            state["seats"] += len(to_persist)
+
+        state["last_flight_id"] = flight_ids[-1]
+        state["flights"] += len(flight_ids)
+        if checkpoint is not None and not dry_run:
+            checkpoint.save(state)
+
+        elapsed = max(time.monotonic() - began, 1e-9)
+        print(f"✈️ {state['flights']}/{total} vuelos · {state['seats']} asientos · "
+              f"{(state['flights'] - done_before) / elapsed:.1f} vuelos/s · "
+              f"{(state['seats'] - seats_before) / elapsed:.0f} asientos/s")
+
+    if checkpoint is not None and not dry_run:
+        checkpoint.clear()
+    print(f"✅ Preasignación terminada: {state['flights']} vuelos, {state['seats']} asientos guardados, "
+          f"{state['conflicts']} ya tenían asiento ({time.monotonic() - began:.1f} s)")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=48, help="ventana de despegues a partir de --from")
+    parser.add_argument("--from", dest="start", type=int, help="inicio de la ventana (epoch en segundos; por defecto ahora)")
+    parser.add_argument("--batch-flights", type=int, default=50, help="vuelos cargados por lote")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="filas por transacción")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos de asignación")
+    parser.add_argument("--engine", choices=("python", "numpy"), help="motor de assign_seats (SEATING_ENGINE)")
+    parser.add_argument("--optimize-ms", type=float, help="presupuesto de optimización por vuelo (SEATING_OPTIMIZE_MS)")
+    parser.add_argument("--checkpoint", default=".preassign-checkpoint.json")
+    parser.add_argument("--reset", action="store_true", help="ignorar el checkpoint y empezar de nuevo")
+    parser.add_argument("--dry-run", action="store_true", help="calcular sin escribir en la base de datos")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    from db_pool import connect_from_env
+
+    if args.optimize_ms is not None:
+        # Lo heredan los procesos del pool
+        os.environ["SEATING_OPTIMIZE_MS"] = str(args.optimize_ms)
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.reset:
+        checkpoint.clear()
+    saved = checkpoint.load()
+    if saved is not None:
+        start, end = saved["start"], saved["end"]
+    else:
+        start = args.start if args.start is not None else int(time.time())
+        end = start + int(args.hours * 3600)
+
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    conn = connect_from_env()
+    try:
+        preassign(FlightRepository(conn, prepared=False), start, end, checkpoint,
+                  batch_flights=args.batch_flights, chunk_size=args.chunk_size,
+                  executor=executor, engine=args.engine, dry_run=args.dry_run)
+    except KeyboardInterrupt:
+        saved = checkpoint.load()
+        print(f"⏸️ Interrumpido; la próxima ejecución continúa después del vuelo "
+              f"{saved['last_flight_id'] if saved else 0}")
+        sys.exit(130)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
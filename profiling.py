@@ -0,0 +1,170 @@
+"""
+Perfilado opcional por petición con cProfile.
+
+Se activa de dos formas (desactivado por defecto):
+
+- Muestreo: con PROFILE_SAMPLE_RATE=N se perfila 1 de cada N peticiones del worker.
+- Cabecera firmada: con PROFILE_SECRET definido, una petición con
+  `X-Profile: <expira>:<firma>` se perfila si la firma es HMAC-SHA256(secreto,
+  "<expira>:<ruta>") y no ha expirado. La cabecera se genera con:
+      python profiling.py sign /flights/1/passengers --ttl 300
+
+Cada perfil se guarda en PROFILE_DIR como `<hora>-<pid>-<endpoint>.prof` (abrir con
+`python -m pstats` o snakeviz) junto a un `.json` con la ruta, el vuelo, los recuentos de
+filas anotados por el endpoint, el tiempo total y las etapas; solo se conservan los
+PROFILE_MAX_FILES más recientes. Desactivado, el coste por petición es una comparación.
+"""
+import argparse
+import contextvars
+import cProfile
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+
+HEADER = "X-Profile"
+
+_current = contextvars.ContextVar("request_profile", default=None)
+
+
+def sign(secret, path, expires):
+    """Firma de la cabecera X-Profile para `path` válida hasta `expires` (epoch en segundos)."""
+    message = f"{int(expires)}:{path}".encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+class RequestProfile:
+    """Perfil de una petición en curso y los datos que el endpoint anota sobre ella."""
+
+    __slots__ = ("profiler", "info", "start", "reason")
+
+    def __init__(self, reason):
+        self.profiler = cProfile.Profile()
+        self.info = {}
+        self.start = time.perf_counter()
+        self.reason = reason
+
+
+class RequestProfiler:
+    """Decide qué peticiones se perfilan y guarda sus volcados con un límite de archivos."""
+
+    def __init__(self, directory, sample_rate=0, secret=None, max_files=50):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.secret = secret or None
+        self.max_files = max_files
+        self.enabled = sample_rate > 0 or self.secret is not None
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        # Un solo perfil a la vez por proceso: acota el coste y, desde Python 3.12,
+        # cProfile no admite dos perfiladores activos en hilos distintos
+        self._active = threading.Lock()
+
+    def reason(self, path, header):
+        """Motivo para perfilar la petición ('sample' o 'header'), o None."""
+        if header and self.secret is not None and self._valid(path, header):
+            return "header"
+        if self.sample_rate > 0 and next(self._counter) % self.sample_rate == 0:
+            return "sample"
+        return None
+
+    def _valid(self, path, header):
+        expires, _, signature = header.partition(":")
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        return hmac.compare_digest(signature, sign(self.secret, path, int(expires)))
+
+    def start(self, reason):
+        """
+        Empieza a perfilar el hilo actual; devuelve (perfil, token para finish), o None si
+        ya hay otra petición perfilándose en el proceso.
+        """
+        if not self._active.acquire(blocking=False):
+            return None
+        profile = RequestProfile(reason)
+        token = _current.set(profile)
+        profile.profiler.enable()
+        return profile, token
+
+    def finish(self, profile, token, **details):
+        """Detiene el perfil y lo guarda; devuelve el nombre del archivo .prof (o None si falla)."""
+        profile.profiler.disable()
+        _current.reset(token)
+        self._active.release()
+        wall_ms = (time.perf_counter() - profile.start) * 1000
+        endpoint = details.get("endpoint") or "request"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{os.getpid()}-{endpoint}"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.profiler.dump_stats(os.path.join(self.directory, name + ".prof"))
+            with open(os.path.join(self.directory, name + ".json"), "w") as f:
+                json.dump(dict(details, reason=profile.reason, wall_ms=round(wall_ms, 3), **profile.info),
+                          f, indent=2, default=str)
+            self._apply_retention()
+        except OSError as e:
+            print(f"❌ No se pudo guardar el perfil {name}: {e}")
+            return None
+        print(f"🔬 Perfil guardado: {name}.prof ({wall_ms:.1f} ms)")
+        return name + ".prof"
+
+    def _apply_retention(self):
+        """Borra los perfiles más antiguos por encima de max_files (con su .json)."""
+        with self._lock:
+            profiles = sorted(f for f in os.listdir(self.directory) if f.endswith(".prof"))
+            for old in profiles[:max(len(profiles) - self.max_files, 0)]:
+                for path in (old, old[:-len(".prof")] + ".json"):
+                    try:
+                        os.remove(os.path.join(self.directory, path))
+                    except FileNotFoundError:
+                        pass
+
+
+def annotate(**info):
+    """Añade datos (vuelo, filas leídas...) al perfil de la petición en curso, si la hay."""
+    profile = _current.get()
+    if profile is not None:
+        profile.info.update(info)
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler():
+    """Devuelve el perfilador del proceso, configurado desde el entorno la primera vez."""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = RequestProfiler(
+                    os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "flights-api-profiles")),
+                    sample_rate=int(os.getenv("PROFILE_SAMPLE_RATE", 0)),
+                    secret=os.getenv("PROFILE_SECRET"),
+                    max_files=int(os.getenv("PROFILE_MAX_FILES", 50)),
+                )
+    return _profiler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera la cabecera X-Profile firmada con PROFILE_SECRET.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sign_parser = subparsers.add_parser("sign")
+    sign_parser.add_argument("path", help="ruta de la petición, p. ej. /flights/1/passengers")
+    sign_parser.add_argument("--ttl", type=int, default=300, help="segundos de validez")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    secret = os.getenv("PROFILE_SECRET")
+    if not secret:
+        parser.error("PROFILE_SECRET no está definido")
+    expires = int(time.time()) + args.ttl
+    print(f"{HEADER}: {expires}:{sign(secret, args.path, expires)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+import os
+
+from seating import Seat, SEAT_COLUMNS
+
+# Consultas fijas; se definen una sola vez para que el cursor preparado de cada conexión
+# reconozca la misma sentencia y no vuelva a prepararla.
+FLIGHT_VERSION_SQL = """
+    SELECT COUNT(*) AS total, MAX(boarding_pass_id) AS last_id
+    FROM boarding_pass
+    WHERE flight_id = %s
+"""
+
+FLIGHT_WITH_PASSENGERS_SQL = """
+    SELECT f.flight_id, f.takeoff_date_time, f.takeoff_airport,
+           f.landing_date_time, f.landing_airport, f.airplane_id,
+           p.passenger_id, p.dni, p.name, p.age, p.country,
+           bp.boarding_pass_id, bp.purchase_id, bp.seat_type_id, bp.seat_id
+    FROM flight f
+    LEFT JOIN (boarding_pass bp JOIN passenger p ON p.passenger_id = bp.passenger_id)
+           ON bp.flight_id = f.flight_id
+    WHERE f.flight_id {condition}
+    ORDER BY f.flight_id, bp.boarding_pass_id
+"""
+
+SINGLE_FLIGHT_SQL = FLIGHT_WITH_PASSENGERS_SQL.format(condition="= %s")
+
+FLIGHT_SQL = """
+    SELECT flight_id, takeoff_date_time, takeoff_airport,
+           landing_date_time, landing_airport, airplane_id
+    FROM flight
+    WHERE flight_id = %s
+"""
+
+PASSENGER_SELECT = """
+    SELECT p.passenger_id, p.dni, p.name, p.age, p.country,
+           bp.boarding_pass_id, bp.purchase_id, bp.seat_type_id, bp.seat_id
+    FROM boarding_pass bp
+    JOIN passenger p ON p.passenger_id = bp.passenger_id
+"""
+
+# Pasajeros de los grupos de compra con algún pase todavía sin asiento
+PENDING_GROUPS_SQL = PASSENGER_SELECT + """
+    WHERE bp.flight_id = %s AND bp.purchase_id IN (
+        SELECT purchase_id FROM boarding_pass WHERE flight_id = %s AND seat_id IS NULL
+    )
+    ORDER BY bp.boarding_pass_id
+"""
+
+OCCUPIED_SEATS_SQL = """
+    SELECT seat_id FROM boarding_pass WHERE flight_id = %s AND seat_id IS NOT NULL
+"""
+
+PASSENGER_PAGE_SQL = PASSENGER_SELECT + """
+    WHERE bp.flight_id = %s AND bp.boarding_pass_id > %s
+    ORDER BY bp.boarding_pass_id
+"""
+
+ACTIVE_AIRPLANES_SQL = """
+    SELECT airplane_id FROM flight
+    GROUP BY airplane_id
+    ORDER BY MAX(flight_id) DESC
+    LIMIT %s
+"""
+
+# Solo las columnas que usa la asignación (SEAT_COLUMNS), en ese orden, para construir filas Seat
+SEATS_SQL = f"""
+    SELECT {", ".join(SEAT_COLUMNS)} FROM seat
+    WHERE airplane_id IN ({{placeholders}})
+"""
+
+# Asientos del avión de un vuelo, sin esperar a conocer su airplane_id
+SEATS_BY_FLIGHT_SQL = f"""
+    SELECT {", ".join(SEAT_COLUMNS)} FROM seat
+    WHERE airplane_id = (SELECT airplane_id FROM flight WHERE flight_id = %s)
+"""
+
+# Asiento que consta en la BD para cada pase (tras una escritura que no actualizó todos)
+STORED_SEATS_SQL = """
+    SELECT boarding_pass_id, seat_id FROM boarding_pass
+    WHERE boarding_pass_id IN ({placeholders})
+"""
+
+# Vuelos que despegan en [desde, hasta) con algún pase sin asiento, paginados por flight_id
+UPCOMING_PENDING_FLIGHTS_SQL = """
+    SELECT f.flight_id FROM flight f
+    WHERE f.takeoff_date_time >= %s AND f.takeoff_date_time < %s AND f.flight_id > %s
+      AND EXISTS (SELECT 1 FROM boarding_pass bp WHERE bp.flight_id = f.flight_id AND bp.seat_id IS NULL)
+    ORDER BY f.flight_id
+    LIMIT %s
+"""
+
+UPCOMING_PENDING_COUNT_SQL = """
+    SELECT COUNT(*) AS total FROM flight f
+    WHERE f.takeoff_date_time >= %s AND f.takeoff_date_time < %s AND f.flight_id > %s
+      AND EXISTS (SELECT 1 FROM boarding_pass bp WHERE bp.flight_id = f.flight_id AND bp.seat_id IS NULL)
+"""
+
+# Columnas de FLIGHT_WITH_PASSENGERS_SQL, en el mismo orden que su SELECT
+FLIGHT_COLUMNS = (
+    'flight_id', 'takeoff_date_time', 'takeoff_airport',
+    'landing_date_time', 'landing_airport', 'airplane_id',
+)
+PASSENGER_COLUMNS = (
+    'passenger_id', 'dni', 'name', 'age', 'country',
+    'boarding_pass_id', 'purchase_id', 'seat_type_id', 'seat_id',
+)
+# Posición de boarding_pass_id en las filas del JOIN (None si el vuelo no tiene pases)
+BOARDING_PASS_INDEX = len(FLIGHT_COLUMNS) + PASSENGER_COLUMNS.index('boarding_pass_id')
+
+
+def in_placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+class CountingCursor:
+    """Cursor que suma al repositorio una ida y vuelta por cada sentencia enviada."""
+
+    def __init__(self, repository, cursor):
+        self._repository = repository
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, operation, params=None):
+        self._repository.round_trips += 1
+        return self._cursor.execute(operation, params)
+
+    def executemany(self, operation, seq_params):
+        # mysql.connector envía un UPDATE por cada tupla de parámetros
+        seq_params = list(seq_params)
+        self._repository.round_trips += len(seq_params)
+        return self._cursor.executemany(operation, seq_params)
+
+
+class CursorRows:
+    """
+    Iterador de filas de un cursor sin buffer. close() cierra el cursor aunque no se haya
+    empezado a leer (un generador sin arrancar no ejecutaría su finally).
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._cursor is None:
+            raise StopIteration
+        row = self._cursor.fetchone()
+        if row is None:
+            self.close()
+            raise StopIteration
+        return row
+
+    def close(self):
+        cursor, self._cursor = self._cursor, None
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                # Filas sin leer: el pool las descarta (o la conexión) al devolverla
+                pass
+
+
+class FlightRepository:
+    """
+    Capa de acceso a datos de vuelos sobre una conexión prestada del pool.
+
+    - Un vuelo con todos sus pasajeros se obtiene en una sola ida y vuelta (JOIN combinado).
+    - Con DB_PREPARED_STATEMENTS=1 las consultas fijas usan sentencias preparadas del
+      servidor, cacheadas por conexión del pool.
+    - `round_trips` cuenta las idas y vueltas de la petición, incluidas las escrituras
+      hechas a través del propio repositorio (se comporta como una conexión).
+    """
+
+    def __init__(self, conn, prepared=None):
+        self.conn = conn
+        self.round_trips = 0
+        if prepared is None:
+            prepared = os.getenv("DB_PREPARED_STATEMENTS", "0") == "1"
+        self.prepared = prepared
+
+    # Interfaz de conexión usada por assignments.persist_assignments
+    def cursor(self, **kwargs):
+        return CountingCursor(self, self.conn.cursor(**kwargs))
+
+    def start_transaction(self):
+        self.round_trips += 1
+        self.conn.start_transaction()
+
+    def commit(self):
+        self.round_trips += 1
+        self.conn.commit()
+
+    def rollback(self):
+        self.round_trips += 1
+        self.conn.rollback()
+
+    def _query(self, sql, params, dictionary=True):
+        """
+        Ejecuta una consulta y devuelve todas las filas como diccionarios, o como tuplas en
+        el orden de las columnas del SELECT con dictionary=False (filas compactas).
+        """
+        if self.prepared:
+            return self._query_prepared(sql, params, dictionary)
+        cursor = self.conn.cursor(dictionary=dictionary)
+        try:
+            self.round_trips += 1
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _query_prepared(self, sql, params, dictionary=True):
+        statements = self.conn.statements
+        cursor = statements.get(sql)
+        if cursor is None:
+            # Cada consulta fija se pide siempre en la misma forma (diccionarios o tuplas)
+            cursor = self.conn.cursor(prepared=True, dictionary=dictionary)
+            statements[sql] = cursor
+            # COM_STMT_PREPARE
+            self.round_trips += 1
+        # El conector envía COM_STMT_RESET y COM_STMT_EXECUTE en cada ejecución
+        self.round_trips += 2
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def version(self, flight_id):
+        """Huella de versión de un vuelo: cantidad y boarding_pass_id máximo de sus pases."""
+        rows = self._query(FLIGHT_VERSION_SQL, (flight_id,))
+        return rows[0] if rows else {"total": 0, "last_id": None}
+
+    def load_flight(self, flight_id):
+        """Devuelve (vuelo, pasajeros) en una sola ida y vuelta; (None, []) si no existe."""
+        flights, passengers_by_flight = self._split_rows(self._query(SINGLE_FLIGHT_SQL, (flight_id,), dictionary=False))
+        if flight_id not in flights:
+            return None, []
+        return flights[flight_id], passengers_by_flight[flight_id]
+
+    def load_flight_row(self, flight_id):
+        """Devuelve solo la fila del vuelo, o None si no existe."""
+        rows = self._query(FLIGHT_SQL, (flight_id,))
+        return rows[0] if rows else None
+
+    def load_pending_groups(self, flight_id):
+        """
+        Devuelve (pasajeros de los grupos con pases sin asiento, seat_id ocupados del vuelo).
+        Es todo lo que necesita la asignación incremental sin cargar el vuelo completo.
+        """
+        affected = self._query(PENDING_GROUPS_SQL, (flight_id, flight_id))
+        if not affected:
+            return [], set()
+        occupied = {row['seat_id'] for row in self._query(OCCUPIED_SEATS_SQL, (flight_id,))}
+        return affected, occupied
+
+    def iter_passengers(self, flight_id, after=0, limit=None):
+        """
+        Ejecuta la consulta de pasajeros ordenada por boarding_pass_id sobre un cursor sin
+        buffer y devuelve un iterador de filas: las filas se leen del socket a medida que
+        se consumen, sin cargar el vuelo entero en memoria. Hay que cerrarlo (close()) si
+        no se consume hasta el final.
+        """
+        sql = PASSENGER_PAGE_SQL
+        params = (flight_id, after)
+        if limit is not None:
+            sql += " LIMIT %s"
+            params += (limit,)
+        cursor = self.cursor(dictionary=True, buffered=False)
+        cursor.execute(sql, params)
+        return CursorRows(cursor)
+
+    def load_flights(self, flight_ids):
+        """Devuelve ({flight_id: vuelo}, {flight_id: pasajeros}) de varios vuelos en una ida y vuelta."""
+        sql = FLIGHT_WITH_PASSENGERS_SQL.format(condition=f"IN ({in_placeholders(flight_ids)})")
+        cursor = self.cursor()
+        try:
+            cursor.execute(sql, tuple(flight_ids))
+            return self._split_rows(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def upcoming_pending_flight_ids(self, start, end, after=0, limit=100):
+        """
+        Ids de los vuelos que despegan entre `start` y `end` (epoch en segundos) con pases sin
+        asiento, a partir de `after` y en orden de flight_id (paginación por clave).
+        """
+        rows = self._query(UPCOMING_PENDING_FLIGHTS_SQL, (start, end, after, limit))
+        return [row['flight_id'] for row in rows]
+
+    def count_upcoming_pending_flights(self, start, end, after=0):
+        """Cantidad de vuelos que devolvería upcoming_pending_flight_ids sin límite."""
+        return self._query(UPCOMING_PENDING_COUNT_SQL, (start, end, after))[0]['total']
+
+    def active_airplane_ids(self, limit=100):
+        """Aviones con vuelos, empezando por los de los vuelos más recientes (para precargar sus mapas)."""
+        return [row['airplane_id'] for row in self._query(ACTIVE_AIRPLANES_SQL, (limit,))]
+
+    def load_seats(self, airplane_ids):
+        """Devuelve los asientos de los aviones indicados como filas Seat."""
+        cursor = self.cursor()
+        try:
+            cursor.execute(SEATS_SQL.format(placeholders=in_placeholders(airplane_ids)), tuple(airplane_ids))
+            return [Seat._make(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _split_rows(rows):
+        """
+        Separa las filas del JOIN combinado en vuelos y pasajeros por vuelo. Las filas son
+        tuplas en el orden FLIGHT_COLUMNS + PASSENGER_COLUMNS (el del SELECT), así que solo
+        se crea un diccionario por vuelo y otro por pasajero, no uno más por fila leída.
+        """
+        flights = {}
+        passengers_by_flight = {}
+        for row in rows:
+            flight_id = row[0]
+            if flight_id not in flights:
+                flights[flight_id] = dict(zip(FLIGHT_COLUMNS, row))
+                passengers_by_flight[flight_id] = []
+            if row[BOARDING_PASS_INDEX] is not None:
+                passengers_by_flight[flight_id].append(dict(zip(PASSENGER_COLUMNS, row[len(FLIGHT_COLUMNS):])))
+        return flights, passengers_by_flight
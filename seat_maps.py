@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+
+from seating import as_seat, SeatMap
+from shared_cache import get_shared_cache
+
+
+class SeatMapCache:
+    """
+    Caché en proceso de mapas de asientos por airplane_id.
+
+    Las distribuciones de cabina casi nunca cambian, así que cada avión se consulta y se
+    ordena/indexa una sola vez (SeatMap) y se reutiliza hasta que vence el TTL o se invalida
+    explícitamente con invalidate().
+
+    Con `store` (p. ej. shared_cache.SharedCache) las filas de asientos también se guardan
+    en una caché compartida entre procesos: solo el primer worker del host las consulta y
+    el resto construye su SeatMap a partir de ellas.
+    """
+
+    def __init__(self, ttl=3600, store=None):
+        self.ttl = ttl
+        self.store = store
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, airplane_id, load_seats):
+        """
+        Devuelve el SeatMap del avión; si no está en caché (o venció) lo carga con
+        `load_seats`, que recibe una lista de airplane_id y devuelve sus asientos
+        (p. ej. FlightRepository.load_seats).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(airplane_id)
+            if entry is not None and entry[0] > now:
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+
+        seat_map = SeatMap(self._load_seats([airplane_id], load_seats)[airplane_id])
+        self.put(airplane_id, seat_map)
+        return seat_map
+
+    def peek(self, airplane_id):
+        """Devuelve el SeatMap del avión si está en caché y vigente, o None (sin cargarlo)."""
+        with self._lock:
+            entry = self._entries.get(airplane_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+            return None
+
+    def get_many(self, airplane_ids, load_seats):
+        """
+        Devuelve {airplane_id: SeatMap} para varios aviones; los que falten se cargan
+        juntos con una sola llamada a `load_seats`.
+        """
+        now = time.monotonic()
+        result = {}
+        missing = []
+        with self._lock:
+            for airplane_id in airplane_ids:
+                entry = self._entries.get(airplane_id)
+                if entry is not None and entry[0] > now:
+                    self._hits += 1
+                    result[airplane_id] = entry[1]
+                else:
+                    self._misses += 1
+                    missing.append(airplane_id)
+
+        if missing:
+            for airplane_id, seats in self._load_seats(missing, load_seats).items():
+                result[airplane_id] = SeatMap(seats)
+                self.put(airplane_id, result[airplane_id])
+        return result
+
+    def _load_seats(self, airplane_ids, load_seats):
+        """Devuelve {airplane_id: asientos}, primero desde `store` y el resto en una sola llamada a `load_seats`."""
+        seats_by_airplane = {}
+        missing = list(airplane_ids)
+        if self.store is not None:
+            missing = []
+            for airplane_id in airplane_ids:
+                seats = self.store.get(f"seats/{airplane_id}")
+                if seats is None:
+                    missing.append(airplane_id)
+                else:
+                    seats_by_airplane[airplane_id] = seats
+
+        if missing:
+            loaded = {airplane_id: [] for airplane_id in missing}
+            for seat in load_seats(missing):
+                seat = as_seat(seat)
+                loaded[seat.airplane_id].append(seat)
+            if self.store is not None:
+                for airplane_id, seats in loaded.items():
+                    self.store.set(f"seats/{airplane_id}", seats, timeout=int(self.ttl))
+            seats_by_airplane.update(loaded)
+        return seats_by_airplane
+
+    def put(self, airplane_id, seat_map):
+        """Guarda un SeatMap ya construido (p. ej. al precargar la caché)."""
+        with self._lock:
+            self._entries[airplane_id] = (time.monotonic() + self.ttl, seat_map)
+
+    def invalidate(self, airplane_id=None):
+        """
+        Elimina el mapa de un avión, o todos si no se indica airplane_id. En la caché
+        compartida se eliminan las filas del avión (las de otros procesos vencen con el TTL).
+        """
+        with self._lock:
+            if airplane_id is None:
+                airplane_ids = list(self._entries)
+                self._entries.clear()
+            else:
+                airplane_ids = [airplane_id]
+                self._entries.pop(airplane_id, None)
+        if self.store is not None:
+            for invalidated in airplane_ids:
+                self.store.delete(f"seats/{invalidated}")
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+
+_seat_maps = None
+_seat_maps_lock = threading.Lock()
+
+
+def get_seat_maps():
+    """Devuelve la caché de mapas de asientos del proceso, creándola la primera vez."""
+    global _seat_maps
+    if _seat_maps is None:
+        with _seat_maps_lock:
+            if _seat_maps is None:
+                store = get_shared_cache() if os.getenv("SEAT_MAP_SHARED", "1") == "1" else None
+                _seat_maps = SeatMapCache(ttl=float(os.getenv("SEAT_MAP_TTL", 3600)), store=store)
+    return _seat_maps
@@ -1,24 +1,419 @@
-def assign_seats(passengers, seats):
+import heapq
+import os
+import time
+from collections import namedtuple
+from itertools import chain
+from operator import attrgetter
+
+from seat_optimizer import improve_assignment
+
+# Columnas de `seat` que usa la asignación, en el orden en que las piden las consultas
+SEAT_COLUMNS = ('seat_id', 'seat_column', 'seat_row', 'seat_type_id', 'airplane_id')
+
+# Fila compacta de `seat`: una tupla con acceso por atributo, sin un diccionario por asiento
+Seat = namedtuple('Seat', SEAT_COLUMNS)
+
+seat_order = attrgetter('seat_row', 'seat_column')
+
+
+def as_seat(seat):
+    """Devuelve el asiento como Seat; acepta filas de cursor con diccionario o tuplas en orden SEAT_COLUMNS."""
+    if isinstance(seat, Seat):
+        return seat
+    if isinstance(seat, dict):
+        return Seat(*(seat.get(column) for column in SEAT_COLUMNS))
+    return Seat._make(seat)
+
+
+def as_seats(seats):
+    """Convierte una secuencia de asientos a Seat (sin copiar si ya lo son)."""
+    if all(isinstance(s, Seat) for s in seats):
+        return seats
+    return [as_seat(s) for s in seats]
+
+
+class SeatLayout:
+    """
+    Parte estática del índice de un tipo de asiento: posiciones por seat_id, rejilla
+    (fila, código de columna) y contigüidad de asientos. No depende de la ocupación,
+    así que puede precalcularse una vez por avión (ver SeatMap).
+    """
+
+    def __init__(self, seats):
+        # `seats` debe venir ordenada por (fila, columna)
+        seats = as_seats(seats)
+        self.seats = seats
+        self.ids = tuple(s.seat_id for s in seats)
+        self.positions = {}
+        self.grid = {}
+        for i, s in enumerate(seats):
+            self.positions.setdefault(s.seat_id, []).append(i)
+            self.grid.setdefault((s.seat_row, ord(s.seat_column)), []).append(i)
+        if seats:
+            self.min_row = min(row for row, _ in self.grid)
+            self.max_row = max(row for row, _ in self.grid)
+            self.min_col = min(col for _, col in self.grid)
+            self.max_col = max(col for _, col in self.grid)
+
+        # adjacent[i]: el asiento i va justo a continuación del i - 1 en la misma fila
+        self.adjacent = [False] * len(seats)
+        for i in range(1, len(seats)):
+            a, b = seats[i - 1], seats[i]
+            self.adjacent[i] = a.seat_row == b.seat_row and ord(b.seat_column) - ord(a.seat_column) == 1
+
+
+class FreeSeatIndex:
+    """
+    Índice de asientos libres de un mismo tipo, ordenados por (fila, columna).
+    Permite obtener el primer asiento libre y marcar asientos como ocupados en O(log n),
+    buscar el asiento libre más cercano a otros asientos mediante una rejilla de la cabina
+    y encontrar bloques de asientos contiguos con un índice de tramos libres por fila.
+    """
+
+    layout_class = SeatLayout
+
+    def __init__(self, seats, occupied, layout=None):
+        layout = layout or self.layout_class(seats)
+        # `seats` debe venir ordenada; una lista ordenada ya es un heap válido
+        self.seats = layout.seats
+        self.layout = layout
+        self.positions = layout.positions
+        self.free = [seat_id not in occupied for seat_id in layout.ids]
+        self._heap = [i for i, is_free in enumerate(self.free) if is_free]
+
+        # Tramos de asientos libres contiguos en una fila: inicio -> fin (exclusivo).
+        # Se mantienen al ocupar asientos y se indexan por longitud para buscar bloques.
+        self.run_end = {}
+        self.run_start = [None] * len(self.seats)
+        self._runs_by_length = {}
+        start = None
+        adjacent = layout.adjacent
+        for i, is_free in enumerate(self.free):
+            if start is not None and not (is_free and adjacent[i]):
+                self._add_run(start, i)
+                start = None
+            if is_free and start is None:
+                start = i
+        if start is not None:
+            self._add_run(start, len(self.seats))
+
+    def _add_run(self, start, end):
+        self.run_end[start] = end
+        for i in range(start, end):
+            self.run_start[i] = start
+        heapq.heappush(self._runs_by_length.setdefault(end - start, []), start)
+
+    def _split_run(self, i):
+        """Parte el tramo que contiene la posición `i`, que acaba de ocuparse."""
+        start = self.run_start[i]
+        end = self.run_end.pop(start)
+        self.run_start[i] = None
+        if start < i:
+            self._add_run(start, i)
+        if i + 1 < end:
+            self._add_run(i + 1, end)
+
+    def first_free(self):
+        """Devuelve el primer asiento libre en orden (fila, columna) o None."""
+        heap = self._heap
+        while heap and not self.free[heap[0]]:
+            heapq.heappop(heap)
+        return self.seats[heap[0]] if heap else None
+
+    def nearest_free(self, origins):
+        """
+        Devuelve el asiento libre con menor distancia Manhattan a cualquiera de `origins`.
+        Busca en anillos crecientes alrededor de cada origen y se detiene en el primer
+        anillo con asientos libres; los empates se resuelven por orden (fila, columna),
+        igual que el recorrido lineal de todos los asientos libres. De cada anillo solo
+        recorre las filas que pueden tener asientos a esa distancia (|dr| >= distancia menos
+        el desplazamiento máximo de columna), así que un anillo cuesta O(columnas) y no
+        O(filas).
+        """
+        if not self.seats or not origins:
+            return None
+        layout = self.layout
+        points = [(o.seat_row, ord(o.seat_column), max(ord(o.seat_column) - layout.min_col,
+                                                        layout.max_col - ord(o.seat_column)))
+                  for o in origins]
+        max_distance = max(
+            max(abs(row - layout.min_row), abs(row - layout.max_row))
+            + max(abs(col - layout.min_col), abs(col - layout.max_col))
+            for row, col, _ in points
+        )
+
+        grid = layout.grid
+        free = self.free
+        for distance in range(max_distance + 1):
+            best = None
+            for row, col, reach in points:
+                low = max(-distance, layout.min_row - row)
+                high = min(distance, layout.max_row - row)
+                inner = distance - reach
+                if inner > 0:
+                    rows = chain(range(low, min(high, -inner) + 1), range(max(low, inner), high + 1))
+                else:
+                    rows = range(low, high + 1)
+                for dr in rows:
+                    dc = distance - abs(dr)
+                    for cell_col in ((col - dc, col + dc) if dc else (col,)):
+                        for i in grid.get((row + dr, cell_col), ()):
+                            if free[i] and (best is None or i < best):
+                                best = i
+            if best is not None:
+                return self.seats[best]
+        return None
+
+    def find_block(self, size):
+        """
+        Devuelve los `size` primeros asientos del primer tramo libre (en orden de fila)
+        con al menos `size` asientos contiguos, o None si no hay ninguno.
+        """
+        best = None
+        for length, heap in self._runs_by_length.items():
+            if length < size:
+                continue
+            while heap and self.run_end.get(heap[0]) != heap[0] + length:
+                heapq.heappop(heap)
+            if heap and (best is None or heap[0] < best):
+                best = heap[0]
+        return self.seats[best:best + size] if best is not None else None
+
+    def run_near(self, row, min_length):
+        """
+        Devuelve el tramo libre (inicio, fin) de al menos `min_length` asientos más próximo a
+        la fila `row`; si `row` es None, el tramo más largo. Se usa para repartir un grupo
+        entre filas contiguas cuando no cabe en un solo bloque.
+        """
+        best_key = None
+        best = None
+        for start, end in self.run_end.items():
+            if end - start < min_length:
+                continue
+            distance = 0 if row is None else abs(self.seats[start].seat_row - row)
+            key = (distance, start - end, start)
+            if best_key is None or key < best_key:
+                best_key = key
+                best = (start, end)
+        return best
+
+    def mark_occupied(self, seat_id):
+        """Marca un asiento como ocupado; el heap se limpia de forma perezosa."""
+        for i in self.positions.get(seat_id, ()):
+            if self.free[i]:
+                self.free[i] = False
+                self._split_run(i)
+
+
+class SeatMap:
+    """
+    Distribución de asientos de un avión, ordenada e indexada una sola vez.
+    Se comparte entre peticiones (ver seat_maps.SeatMapCache), por lo que no debe modificarse:
+    los asientos se guardan como Seat en tuplas y las estructuras de cada índice se calculan
+    bajo demanda. Acepta filas Seat (como las devuelve repository.py) o diccionarios.
+    """
+
+    def __init__(self, seats):
+        seats = as_seats(seats)
+        ordered = sorted(seats, key=seat_order)
+        self.seats = tuple(ordered)
+        self.by_id = {s.seat_id: s for s in seats}
+        by_type = {}
+        for s in ordered:
+            by_type.setdefault(s.seat_type_id, []).append(s)
+        self.by_type = {t: tuple(type_seats) for t, type_seats in by_type.items()}
+        self._layouts = {}
+        self._cells = {}
+        self._cells_done = 0
+
+    def __len__(self):
+        return len(self.seats)
+
+    def __getstate__(self):
+        # Las estructuras de los índices se recalculan bajo demanda; no se envían a otros procesos
+        state = self.__dict__.copy()
+        state['_layouts'] = {}
+        state['_cells'] = {}
+        state['_cells_done'] = 0
+        return state
+
+    def layout(self, index_class, seat_type_id):
+        """Devuelve (y memoriza) la parte estática del índice de un tipo de asiento."""
+        key = (index_class.layout_class, seat_type_id)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = index_class.layout_class(self.by_type[seat_type_id])
+            self._layouts[key] = layout
+        return layout
+
+    def cells(self, deadline=None, chunk=2048):
+        """
+        Devuelve (y memoriza) {(fila, código de columna): seat_id} de toda la cabina. Con
+        `deadline` (time.perf_counter()) se construye por tramos de `chunk` asientos y devuelve
+        None si se agota el plazo; la siguiente llamada continúa donde se quedó.
+        """
+        cells = self._cells
+        done = self._cells_done
+        while done < len(self.seats):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            for s in self.seats[done:done + chunk]:
+                cells[(s.seat_row, ord(s.seat_column))] = s.seat_id
+            # Solo avanza quien insertó el tramo: lo anterior a _cells_done siempre está completo
+            done = self._cells_done = min(done + chunk, len(self.seats))
+        return cells
+
+
+def build_group_units(adults, minors):
+    """
+    Agrupa a cada adulto con hasta dos menores a sus lados (menor, adulto, menor),
+    de modo que al sentar las unidades seguidas todo menor quede junto a un adulto.
+    Los menores sobrantes (o los de un grupo sin adultos) forman unidades propias.
+    """
+    minors = list(minors)
+    units = []
+    for adult in adults:
+        unit = [adult]
+        if minors:
+            unit.insert(0, minors.pop(0))
+        if minors:
+            unit.append(minors.pop(0))
+        units.append(unit)
+    units.extend([minor] for minor in minors)
+    return units
+
+
+def place_group_in_blocks(group, free_by_type, occupy):
+    """
+    Sienta juntos a los pasajeros sin asiento de un grupo de compra, por tipo de asiento.
+    Busca un único bloque contiguo y, si no existe, reparte las unidades adulto-menores
+    entre los tramos libres de filas cercanas. Quien no quepa queda sin asiento para
+    la asignación individual posterior.
+    """
+    pending_by_type = {}
+    for p in group:
+        if p.get('seat_id') is None:
+            pending_by_type.setdefault(p['seat_type_id'], []).append(p)
+    group_has_adults = any(p['age'] >= 18 for p in group)
+
+    for seat_type_id, pending in pending_by_type.items():
+        index = free_by_type.get(seat_type_id)
+        if index is None or len(pending) < 2:
+            continue
+        adults = [p for p in pending if p['age'] >= 18]
+        minors = [p for p in pending if p['age'] < 18]
+        if not adults and group_has_adults:
+            # Los menores se sientan junto a los adultos ya ubicados, uno a uno
+            continue
+
+        units = build_group_units(adults, minors)
+        block = index.find_block(len(pending))
+        if block:
+            for passenger, seat in zip((p for unit in units for p in unit), block):
+                passenger['seat_id'] = seat.seat_id
+                occupy(seat)
+            continue
+
+        # No cabe en un solo bloque: repartir unidades completas en filas contiguas
+        anchor_row = None
+        while units:
+            run = index.run_near(anchor_row, len(units[0]))
+            if run is None:
+                break
+            position, end = run
+            if anchor_row is None:
+                anchor_row = index.seats[position].seat_row
+            while units and position + len(units[0]) <= end:
+                for passenger in units.pop(0):
+                    seat = index.seats[position]
+                    passenger['seat_id'] = seat.seat_id
+                    occupy(seat)
+                    position += 1
+
+
+def get_index_class(engine=None):
+    """
+    Devuelve la clase de índice de asientos del motor indicado ("python" o "numpy").
+    Por defecto se lee SEATING_ENGINE; si NumPy no está instalado se usa el motor de Python.
+    """
+    engine = (engine or os.getenv("SEATING_ENGINE", "python")).lower()
+    if engine == "numpy":
+        try:
+            from seating_numpy import NumpySeatIndex
+            return NumpySeatIndex
+        except ImportError:
+            print("⚠️ NumPy no está instalado; se usa el motor de asignación de Python")
+            return FreeSeatIndex
+    if engine != "python":
+        raise ValueError(f"Motor de asignación desconocido: {engine}")
+    return FreeSeatIndex
+
+
+def group_order(passengers):
+    """
+    Ordena pasajeros como los devuelve assign_seats: por grupo de compra en orden de
+    aparición y, dentro de cada grupo, primero los adultos y luego los menores.
+    """
+    groups = {}
+    for p in passengers:
+        groups.setdefault(p['purchase_id'], []).append(p)
+    ordered = []
+    for group in groups.values():
+        ordered.extend(p for p in group if p['age'] >= 18)
+        ordered.extend(p for p in group if p['age'] < 18)
+    return ordered
+
+
+def get_optimize_budget(optimize_ms=None):
+    """Presupuesto de la búsqueda local en segundos (SEATING_OPTIMIZE_MS por defecto; 0 la desactiva)."""
+    if optimize_ms is None:
+        optimize_ms = float(os.getenv("SEATING_OPTIMIZE_MS", 0))
+    return max(optimize_ms, 0) / 1000
+
+
+def assign_seats(passengers, seats, group_blocks=True, engine=None, occupied=None, optimize_ms=None):
     """
     Asigna asientos a pasajeros cumpliendo reglas:
     - Menores deben sentarse al lado de un adulto de su misma compra.
     - Pasajeros de la misma compra se asignan lo más juntos posible.
     - No mezclar clases (seat_type_id).
+
+    Con `group_blocks` cada grupo de compra se sienta primero en un bloque contiguo;
+    sin él se usa solo la asignación individual (primer asiento libre / más cercano).
+    `engine` elige el índice de asientos ("python" o "numpy"); ambos asignan igual.
+    `seats` puede ser la lista de asientos (Seat o diccionarios) o un SeatMap ya ordenado e indexado.
+    `occupied` añade asientos ocupados por pasajeros que no se pasan en `passengers`.
+
+    Con `optimize_ms` (o SEATING_OPTIMIZE_MS) mayor que 0, la solución voraz se mejora con
+    búsqueda local (seat_optimizer.py) hasta agotar ese presupuesto, contado desde el inicio
+    de la llamada: solo se mueven los pasajeros que no traían asiento.
     """
     if not passengers:
         return []
 
-    # 1. Crear diccionarios para fácil acceso y manejo
-    seats_by_id = {s['seat_id']: s for s in seats}
-    seats_by_type = {s_type: [] for s_type in {s['seat_type_id'] for s in seats}}
-    for s in seats:
-        seats_by_type[s['seat_type_id']].append(s)
+    budget = get_optimize_budget(optimize_ms)
+    started = time.perf_counter()
+    pending = [p['boarding_pass_id'] for p in passengers if p.get('seat_id') is None]
+    external = set(occupied or ())
 
-    for seat_type_id in seats_by_type:
-        seats_by_type[seat_type_id].sort(key=lambda x: (x['seat_row'], x['seat_column']))
+    # 1. Usar el mapa de asientos (ordenado e indexado por id y por tipo)
+    seat_map = seats if isinstance(seats, SeatMap) else SeatMap(seats)
+    seats_by_id = seat_map.by_id
 
     # Marcar asientos ya ocupados de la BD
-    occupied = {p['seat_id'] for p in passengers if p.get('seat_id') is not None}
+    occupied = set(occupied or ())
+    occupied.update(p['seat_id'] for p in passengers if p.get('seat_id') is not None)
+
+    # Índice de asientos libres por tipo para no recalcular la lista por cada pasajero
+    index_class = get_index_class(engine)
+    free_by_type = {
+        t: index_class(type_seats, occupied, seat_map.layout(index_class, t))
+        for t, type_seats in seat_map.by_type.items()
+    }
+
+    def occupy(seat):
+        occupied.add(seat.seat_id)
+        free_by_type[seat.seat_type_id].mark_occupied(seat.seat_id)
     
     # 2. Agrupar por purchase_id y procesar
     groups = {}
@@ -29,6 +424,9 @@ def assign_seats(passengers, seats):
     
     # 3. Iterar sobre cada grupo de compra
     for _, group in groups.items():
+        if group_blocks:
+            place_group_in_blocks(group, free_by_type, occupy)
+
         # Separar adultos y menores
         adults = [p for p in group if p['age'] >= 18]
         minors = [p for p in group if p['age'] < 18]
@@ -41,13 +439,12 @@ def assign_seats(passengers, seats):
                 group_assigned_passengers.append(adult)
                 continue
 
-            seat_type_id = adult['seat_type_id']
-            available_seats = [s for s in seats_by_type.get(seat_type_id, []) if s['seat_id'] not in occupied]
+            index = free_by_type.get(adult['seat_type_id'])
+            chosen_seat = index.first_free() if index else None  # Tomar el primer asiento disponible
             
-            if available_seats:
-                chosen_seat = available_seats[0]  # Tomar el primer asiento disponible
-                adult['seat_id'] = chosen_seat['seat_id']
-                occupied.add(chosen_seat['seat_id'])
+            if chosen_seat:
+                adult['seat_id'] = chosen_seat.seat_id
+                occupy(chosen_seat)
             else:
                 adult['seat_id'] = None
             
@@ -59,33 +456,18 @@ def assign_seats(passengers, seats):
                 group_assigned_passengers.append(minor)
                 continue
                 
-            seat_type_id = minor['seat_type_id']
-            available_seats = [s for s in seats_by_type.get(seat_type_id, []) if s['seat_id'] not in occupied]
+            index = free_by_type.get(minor['seat_type_id'])
+            first_seat = index.first_free() if index else None
             
-            if available_seats:
-                # Lógica simplificada: buscar el asiento más cercano a un adulto
-                best_seat = None
-                min_distance = float('inf')
-                
-                # Obtener la lista de asientos de adultos ya asignados en este grupo
+            if first_seat:
+                # Buscar el asiento libre más cercano a un adulto del grupo
                 adult_seat_ids = [p['seat_id'] for p in group_assigned_passengers if p.get('seat_id') is not None and p['age'] >= 18]
                 adult_seats_info = [seats_by_id[sid] for sid in adult_seat_ids if sid in seats_by_id]
                 
-                if adult_seats_info:
-                    for seat in available_seats:
-                        for adult_seat in adult_seats_info:
-                            distance = abs(seat['seat_row'] - adult_seat['seat_row']) + abs(ord(seat['seat_column']) - ord(adult_seat['seat_column']))
-                            if distance < min_distance:
-                                min_distance = distance
-                                best_seat = seat
-                
-                if best_seat:
-                    chosen_seat = best_seat
-                else:
-                    chosen_seat = available_seats[0]
+                chosen_seat = index.nearest_free(adult_seats_info) or first_seat
 
-                minor['seat_id'] = chosen_seat['seat_id']
-                occupied.add(chosen_seat['seat_id'])
+                minor['seat_id'] = chosen_seat.seat_id
+                occupy(chosen_seat)
             else:
                 minor['seat_id'] = None
 
@@ -93,37 +475,15 @@ def assign_seats(passengers, seats):
             
         # 6. Agregar todos los pasajeros del grupo a la lista final
         final_passengers.extend(group_assigned_passengers)
-        
+
+    if pending and time.perf_counter() < started + budget:
+        improve_assignment(final_passengers, seat_map, pending, started + budget, occupied=external)
+
     return final_passengers
 
 def find_seat_block(available_seats, group_size):
     """
-    Encuentra un bloque de asientos contiguos para un grupo
+    Encuentra un bloque de asientos contiguos para un grupo (devuelve filas Seat)
     """
-    # Agrupar asientos por fila
-    seats_by_row = {}
-    for seat in available_seats:
-        if seat['seat_row'] not in seats_by_row:
-            seats_by_row[seat['seat_row']] = []
-        seats_by_row[seat['seat_row']].append(seat)
-    
-    # Ordenar asientos por columna en cada fila
-    for row in seats_by_row:
-        seats_by_row[row].sort(key=lambda x: x['seat_column'])
-    
-    # Buscar en cada fila un bloque del tamaño requerido
-    for row, seats_in_row in seats_by_row.items():
-        if len(seats_in_row) >= group_size:
-            # Verificar si hay asientos consecutivos
-            for i in range(len(seats_in_row) - group_size + 1):
-                # Verificar si los asientos son consecutivos
-                consecutive = True
-                for j in range(1, group_size):
-                    if ord(seats_in_row[i+j]['seat_column']) - ord(seats_in_row[i+j-1]['seat_column']) != 1:
-                        consecutive = False
-                        break
-                
-                if consecutive:
-                    return seats_in_row[i:i+group_size]
-    
-    return None
\ No newline at end of file
+    ordered = sorted(as_seats(available_seats), key=seat_order)
+    return FreeSeatIndex(ordered, set()).find_block(group_size)
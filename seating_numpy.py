@@ -0,0 +1,146 @@
+"""
+Motor de asignación de asientos sobre arrays de NumPy.
+
+Ofrece la misma interfaz que seating.FreeSeatIndex, pero guarda filas, códigos de
+columna y ocupación en arrays y resuelve el estado inicial, el primer libre y el asiento
+más cercano con operaciones vectorizadas; los bloques contiguos usan el índice de tramos
+incremental de FreeSeatIndex. Se selecciona con
+assign_seats(..., engine="numpy") o con la variable de entorno SEATING_ENGINE=numpy.
+"""
+import numpy as np
+
+from seating import as_seats, FreeSeatIndex
+
+
+class NumpySeatLayout:
+    """Parte estática del índice: filas, códigos de columna y contigüidad como arrays."""
+
+    def __init__(self, seats):
+        # `seats` debe venir ordenada por (fila, columna), igual que en seating.SeatLayout
+        seats = as_seats(seats)
+        self.seats = seats
+        n = len(seats)
+        self.ids = tuple(s.seat_id for s in seats)
+        self.rows = np.fromiter((s.seat_row for s in seats), dtype=np.int64, count=n)
+        self.cols = np.fromiter((ord(s.seat_column) for s in seats), dtype=np.int64, count=n)
+        self.positions = {}
+        for i, seat_id in enumerate(self.ids):
+            self.positions.setdefault(seat_id, []).append(i)
+
+        # adjacent[i]: el asiento i va justo a continuación del i - 1 en la misma fila
+        self.adjacent = np.zeros(n, dtype=bool)
+        if n > 1:
+            self.adjacent[1:] = (self.rows[1:] == self.rows[:-1]) & (self.cols[1:] - self.cols[:-1] == 1)
+
+
+class NumpySeatIndex(FreeSeatIndex):
+    """
+    Índice de asientos libres de un tipo respaldado por arrays de NumPy.
+
+    Los tramos libres se calculan en bloque la primera vez que se buscan y después se
+    mantienen de forma incremental al ocupar asientos, como en FreeSeatIndex (find_block y
+    run_near son los suyos): recalcularlos sobre todo el array en cada búsqueda
+    costaba O(asientos) por llamada. NumPy resuelve el estado inicial, el primer libre y
+    nearest_free.
+    """
+
+    layout_class = NumpySeatLayout
+
+    def __init__(self, seats, occupied, layout=None):
+        layout = layout or self.layout_class(seats)
+        self.seats = layout.seats
+        self.layout = layout
+        self.rows = layout.rows
+        self.cols = layout.cols
+        self.positions = layout.positions
+        self.free = np.fromiter((seat_id not in occupied for seat_id in layout.ids),
+                                dtype=bool, count=len(self.seats))
+
+        # Los asientos nunca se liberan, así que el primer libre solo avanza
+        self._cursor = 0
+
+        # Tramos libres: se construyen en la primera búsqueda de bloques (sin group_blocks no
+        # hacen falta) y desde ahí se mantienen al ocupar asientos
+        self.run_end = None
+
+    def _build_runs(self):
+        self.run_end = {}
+        self.run_start = [None] * len(self.seats)
+        self._runs_by_length = {}
+        starts, ends = self._runs(self.layout.adjacent)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            self._add_run(start, end)
+
+    def find_block(self, size):
+        if self.run_end is None:
+            self._build_runs()
+        return super().find_block(size)
+
+    def run_near(self, row, min_length):
+        if self.run_end is None:
+            self._build_runs()
+        return super().run_near(row, min_length)
+
+    def mark_occupied(self, seat_id):
+        """Marca un asiento como ocupado y, si ya existen, parte su tramo libre."""
+        for i in self.positions.get(seat_id, ()):
+            if self.free[i]:
+                self.free[i] = False
+                if self.run_end is not None:
+                    self._split_run(i)
+
+    def first_free(self):
+        """Devuelve el primer asiento libre en orden (fila, columna) o None."""
+        cursor = self._cursor
+        if cursor < len(self.seats) and self.free[cursor]:
+            return self.seats[cursor]
+        rest = self.free[cursor:]
+        offset = int(np.argmax(rest)) if rest.size else 0
+        if not rest.size or not rest[offset]:
+            self._cursor = len(self.seats)
+            return None
+        self._cursor = cursor + offset
+        return self.seats[self._cursor]
+
+    def nearest_free(self, origins):
+        """
+        Devuelve el asiento libre con menor distancia Manhattan a cualquiera de `origins`.
+        Solo mira las filas a distancia `window` de los orígenes (los asientos están
+        ordenados por fila) y duplica la ventana hasta que el mínimo no supera `window`:
+        cualquier asiento fuera de ella está más lejos. argmin devuelve la primera posición
+        con el mínimo, así que los empates se resuelven por orden (fila, columna) como en
+        el motor de Python.
+        """
+        if not self.seats or not origins:
+            return None
+        origin_rows = np.array([o.seat_row for o in origins], dtype=np.int64)
+        origin_cols = np.array([ord(o.seat_column) for o in origins], dtype=np.int64)
+        low, high = int(origin_rows.min()), int(origin_rows.max())
+        n = len(self.seats)
+        window = 1
+        while True:
+            lo = int(np.searchsorted(self.rows, low - window, side='left'))
+            hi = int(np.searchsorted(self.rows, high + window, side='right'))
+            free_idx = lo + np.flatnonzero(self.free[lo:hi])
+            if free_idx.size:
+                distances = (
+                    np.abs(self.rows[free_idx, None] - origin_rows[None, :])
+                    + np.abs(self.cols[free_idx, None] - origin_cols[None, :])
+                ).min(axis=1)
+                best = int(np.argmin(distances))
+                if distances[best] <= window or (lo == 0 and hi == n):
+                    return self.seats[int(free_idx[best])]
+            elif lo == 0 and hi == n:
+                return None
+            window *= 2
+
+    def _runs(self, adjacent):
+        """Calcula los tramos libres contiguos como arrays (inicios, fines exclusivos)."""
+        free = self.free
+        continues = np.zeros(len(free), dtype=bool)
+        if len(free) > 1:
+            continues[1:] = free[1:] & free[:-1] & adjacent[1:]
+        starts = np.flatnonzero(free & ~continues)
+        last = free & ~np.append(continues[1:], False)
+        ends = np.flatnonzero(last) + 1
+        return starts, ends
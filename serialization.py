@@ -0,0 +1,161 @@
+"""
+Registros de la respuesta (Passenger, FlightData) y su serializador JSON.
+
+Los registros usan __slots__ y el serializador escribe directamente el orden fijo de
+claves de cada registro, sin pasar por dataclasses.asdict (una copia profunda) ni por
+diccionarios intermedios. La salida compacta es la predeterminada; la indentada
+(indent=4, el formato anterior) queda como opción.
+"""
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from json.encoder import encode_basestring_ascii
+from operator import attrgetter
+
+
+# Definir la estructura de datos para la respuesta con el orden exacto de las claves
+@dataclass(slots=True)
+class Passenger:
+    """Clase de datos para la información de un pasajero."""
+    passengerId: int
+    dni: str
+    name: str
+    age: int
+    country: str
+    boardingPassId: int
+    purchaseId: int
+    seatTypeId: int
+    seatId: int
+
+
+@dataclass(slots=True)
+class FlightData:
+    """Clase de datos para la información del vuelo y sus pasajeros."""
+    flightId: int
+    takeoffDateTime: int
+    takeoffAirport: str
+    landingDateTime: int
+    landingAirport: str
+    airplaneId: int
+    passengers: list[Passenger]
+
+
+# Helper para convertir datetime a timestamp epoch
+def to_epoch(dt):
+    """
+    Convierte un objeto datetime a un timestamp de época (epoch) en segundos.
+    Si ya es un entero, lo retorna directamente.
+    """
+    if isinstance(dt, datetime):
+        return int(dt.timestamp())
+    elif isinstance(dt, int):
+        return dt  # Ya es un timestamp, lo retornamos sin cambios
+    elif dt is None:
+        return None
+    else:
+        # Intenta manejar otros formatos si es necesario
+        try:
+            return int(dt)
+        except (ValueError, TypeError):
+            return None
+
+
+def build_passenger(p):
+    """Convierte una fila de pasajero en un Passenger (orden de campos de la respuesta)."""
+    return Passenger(
+        passengerId=p['passenger_id'],
+        dni=str(p['dni']),
+        name=p['name'],
+        age=p['age'],
+        country=p['country'],
+        boardingPassId=p['boarding_pass_id'],
+        purchaseId=p['purchase_id'],
+        seatTypeId=p['seat_type_id'],
+        seatId=p['seat_id']
+    )
+
+
+def build_flight_data(flight, passengers_assigned):
+    """
+    Construye el FlightData de un vuelo con sus pasajeros ya asignados.
+    Los objetos Passenger garantizan el orden de los campos en la respuesta.
+    """
+    passengers_list = [build_passenger(p) for p in passengers_assigned]
+
+    return FlightData(
+        flightId=flight['flight_id'],
+        takeoffDateTime=to_epoch(flight['takeoff_date_time']),
+        takeoffAirport=flight['takeoff_airport'],
+        landingDateTime=to_epoch(flight['landing_date_time']),
+        landingAirport=flight['landing_airport'],
+        airplaneId=flight['airplane_id'],
+        passengers=passengers_list
+    )
+
+
+PASSENGER_FIELDS = Passenger.__dataclass_fields__.keys()
+FLIGHT_FIELDS = [name for name in FlightData.__dataclass_fields__ if name != 'passengers']
+
+_passenger_values = attrgetter(*PASSENGER_FIELDS)
+_flight_values = attrgetter(*FLIGHT_FIELDS)
+
+# Plantillas con las claves ya escritas: {"passengerId":%s,"dni":%s,...}
+PASSENGER_TEMPLATE = "{" + ",".join(f'"{name}":%s' for name in PASSENGER_FIELDS) + "}"
+FLIGHT_HEADER_TEMPLATE = "{" + ",".join(f'"{name}":%s' for name in FLIGHT_FIELDS) + ',"passengers":['
+
+
+def encode_value(value):
+    """Codifica un valor escalar igual que json.dumps (ensure_ascii=True)."""
+    kind = type(value)
+    if kind is int:
+        return int.__repr__(value)
+    if kind is str:
+        return encode_basestring_ascii(value)
+    if value is None:
+        return "null"
+    return json.dumps(value)
+
+
+def passenger_json(passenger):
+    """JSON compacto de un Passenger."""
+    return PASSENGER_TEMPLATE % tuple(map(encode_value, _passenger_values(passenger)))
+
+
+def flight_header_json(flight_data):
+    """Inicio del JSON compacto de un FlightData, hasta la apertura de la lista de pasajeros."""
+    return FLIGHT_HEADER_TEMPLATE % tuple(map(encode_value, _flight_values(flight_data)))
+
+
+def flight_json(flight_data):
+    """JSON compacto de un FlightData con todos sus pasajeros."""
+    return flight_header_json(flight_data) + ",".join(map(passenger_json, flight_data.passengers)) + "]}"
+
+
+def passenger_to_dict(passenger):
+    return dict(zip(PASSENGER_FIELDS, _passenger_values(passenger)))
+
+
+def flight_to_dict(flight_data):
+    """Diccionario con el orden de claves de la respuesta (solo para la salida indentada)."""
+    data = dict(zip(FLIGHT_FIELDS, _flight_values(flight_data)))
+    data['passengers'] = [passenger_to_dict(p) for p in flight_data.passengers]
+    return data
+
+
+def dumps_flight_response(flight_data, pretty=False):
+    """{"code": 200, "data": {...}} de un vuelo; compacto salvo que se pida `pretty`."""
+    if pretty:
+        return json.dumps({"code": 200, "data": flight_to_dict(flight_data)}, indent=4)
+    return '{"code":200,"data":' + flight_json(flight_data) + "}"
+
+
+def dumps_flights_response(flights_data, not_found, pretty=False):
+    """Respuesta del endpoint masivo: {"code": 200, "data": [...], "notFound": [...]}."""
+    if pretty:
+        return json.dumps({
+            "code": 200,
+            "data": [flight_to_dict(f) for f in flights_data],
+            "notFound": not_found
+        }, indent=4)
+    return ('{"code":200,"data":[' + ",".join(map(flight_json, flights_data)) + '],"notFound":'
+            + json.dumps(not_found, separators=(',', ':')) + "}")
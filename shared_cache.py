@@ -0,0 +1,225 @@
+"""
+Caché compartida entre los procesos (workers) de un mismo host.
+
+SimpleCache vive dentro de cada proceso: con N workers hay N cachés frías, N veces la
+carga en la base de datos tras cada vencimiento y respuestas de /health distintas según
+el worker. SharedCache guarda las entradas en un archivo SQLite en memoria compartida
+(/dev/shm), con expiración por entrada, desalojo LRU acotado por número de entradas (que
+nunca alcanza a las métricas de los workers) y contadores de aciertos/fallos comunes a
+todos los procesos.
+
+Se usa como backend de Flask-Caching (CACHE_TYPE=shared_cache.SharedCache) y como
+almacén de las filas de asientos de seat_maps.SeatMapCache.
+
+Los valores se guardan con pickle, así que quien pueda escribir en el archivo (o en sus
+archivos -wal/-shm) podría ejecutar código en los workers: el archivo vive en un
+directorio privado del usuario (0700) y no se abre si su directorio lo pueden modificar
+otros usuarios.
+"""
+import os
+import pickle
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+
+from flask_caching.backends.base import BaseCache
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires REAL NOT NULL,
+        last_used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+    CREATE TABLE IF NOT EXISTS counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+"""
+
+# Claves que el límite de entradas no cuenta ni desaloja (solo vencen): las instantáneas de
+# métricas de cada worker y su archivo (metrics.py) son pocas y no se pueden recalcular.
+PINNED_PREFIXES = ("metrics/",)
+
+
+def default_path():
+    """
+    Archivo de la caché: SHARED_CACHE_PATH, o un directorio privado del usuario dentro de
+    /dev/shm si existe (o del directorio temporal).
+    """
+    path = os.getenv("SHARED_CACHE_PATH")
+    if path:
+        return path
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    directory = os.path.join(base, f"flights-api-{os.getuid()}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return os.path.join(directory, "cache.sqlite3")
+
+
+def check_private(path):
+    """
+    Lanza PermissionError si el directorio del archivo de la caché no es un directorio real
+    del usuario actual, o si el grupo u otros usuarios pueden escribir en él o en el archivo.
+    """
+    uid = os.getuid()
+    directory = os.path.dirname(os.path.abspath(path))
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != uid or info.st_mode & 0o022:
+        raise PermissionError(f"El directorio de la caché compartida ({directory}) debe ser del usuario "
+                              f"actual y no admitir escritura de otros usuarios (p. ej. 0700)")
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISREG(info.st_mode) or info.st_uid != uid or info.st_mode & 0o022:
+        raise PermissionError(f"El archivo de la caché compartida ({path}) debe ser del usuario actual "
+                              f"y no admitir escritura de otros usuarios")
+
+
+class _Transaction:
+    """Envuelve una conexión SQLite: `with` abre una transacción inmediata y la confirma al salir."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class SharedCache(BaseCache):
+    """
+    Caché clave/valor sobre SQLite compartida por todos los procesos que usen el mismo
+    archivo. Los valores se guardan con pickle; `threshold` limita el número de entradas
+    y, al superarlo, se eliminan primero las vencidas y luego las menos usadas. Las claves
+    que empiezan por `pinned_prefixes` quedan fuera de ese límite. El archivo debe estar en
+    un directorio privado (ver check_private).
+    """
+
+    def __init__(self, path=None, threshold=1000, default_timeout=300, pinned_prefixes=PINNED_PREFIXES):
+        super().__init__(default_timeout=default_timeout)
+        self.path = path or default_path()
+        check_private(self.path)
+        self.threshold = threshold
+        # Condición SQL (y sus parámetros) de las entradas sujetas al límite
+        self._bounded = " AND ".join(["substr(key, 1, ?) != ?"] * len(pinned_prefixes)) or "1"
+        self._bounded_params = tuple(arg for prefix in pinned_prefixes for arg in (len(prefix), prefix))
+        self._local = threading.local()
+        self._connection().db.executescript(SCHEMA)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(threshold=config["CACHE_THRESHOLD"])
+        return cls(*args, **kwargs)
+
+    def _connection(self):
+        """Conexión SQLite del hilo actual; se reabre tras un fork (no se comparten entre procesos)."""
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            # Es una caché: no hace falta sobrevivir a un corte de energía
+            db.execute("PRAGMA synchronous=OFF")
+            local.db = _Transaction(db)
+            local.pid = os.getpid()
+        return local.db
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return float("inf") if timeout == 0 else time.time() + timeout
+
+    def get(self, key):
+        now = time.time()
+        with self._connection() as db:
+            row = db.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                db.execute("UPDATE counters SET value = value + 1 WHERE name = 'misses'")
+                return None
+            db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            db.execute("UPDATE counters SET value = value + 1 WHERE name = 'hits'")
+        return pickle.loads(row[0])
+
+    def set(self, key, value, timeout=None):
+        return self._store(key, value, timeout, "INSERT OR REPLACE")
+
+    def add(self, key, value, timeout=None):
+        with self._connection() as db:
+            db.execute("DELETE FROM entries WHERE key = ? AND expires <= ?", (key, time.time()))
+        return self._store(key, value, timeout, "INSERT OR IGNORE")
+
+    def _store(self, key, value, timeout, insert):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._connection() as db:
+            stored = db.execute(
+                f"{insert} INTO entries (key, value, expires, last_used) VALUES (?, ?, ?, ?)",
+                (key, data, self._expires_at(timeout), now)
+            ).rowcount > 0
+            if stored:
+                self._prune(db, now)
+        return stored
+
+    def _prune(self, db, now):
+        """Aplica el límite de entradas: primero las vencidas, luego las menos usadas (sin tocar las fijas)."""
+        count = f"SELECT COUNT(*) FROM entries WHERE {self._bounded}"
+        excess = db.execute(count, self._bounded_params).fetchone()[0] - self.threshold
+        if excess <= 0:
+            return
+        db.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        excess = db.execute(count, self._bounded_params).fetchone()[0] - self.threshold
+        if excess > 0:
+            db.execute(f"DELETE FROM entries WHERE key IN (SELECT key FROM entries WHERE {self._bounded} "
+                       f"ORDER BY last_used LIMIT ?)", self._bounded_params + (excess,))
+            db.execute("UPDATE counters SET value = value + ? WHERE name = 'evictions'", (excess,))
+
+    def delete(self, key):
+        with self._connection() as db:
+            return db.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount > 0
+
+    def has(self, key):
+        with self._connection() as db:
+            row = db.execute("SELECT expires FROM entries WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def get_prefix(self, prefix):
+        """Entradas vigentes cuya clave empieza por `prefix`, sin contar aciertos ni fallos."""
+        with self._connection() as db:
+            rows = db.execute("SELECT key, value FROM entries WHERE substr(key, 1, ?) = ? AND expires > ?",
+                              (len(prefix), prefix, time.time())).fetchall()
+        return {key: pickle.loads(value) for key, value in rows}
+
+    def clear(self):
+        with self._connection() as db:
+            db.execute("DELETE FROM entries")
+        return True
+
+    def stats(self):
+        """Entradas y contadores compartidos por todos los procesos."""
+        with self._connection() as db:
+            counters = dict(db.execute("SELECT name, value FROM counters").fetchall())
+            counters["entries"] = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        counters["threshold"] = self.threshold
+        return counters
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """Devuelve la caché compartida del proceso, creándola la primera vez."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = SharedCache(threshold=int(os.getenv("SHARED_CACHE_MAX_ENTRIES", 1000)))
+    return _shared_cache
@@ -0,0 +1,254 @@
+import datetime
+import json
+import os
+import unittest
+
+os.environ.setdefault("CACHE_TYPE", "SimpleCache")
+
+import db_pool  # noqa: E402
+from app import app, cache  # noqa: E402
+from assignments import get_snapshots  # noqa: E402
+from db_pool import ConnectionPool  # noqa: E402
+from repository import (FLIGHT_COLUMNS, FLIGHT_SQL, FLIGHT_VERSION_SQL, FLIGHT_WITH_PASSENGERS_SQL,  # noqa: E402
+                        OCCUPIED_SEATS_SQL, PASSENGER_COLUMNS, PASSENGER_PAGE_SQL, PENDING_GROUPS_SQL,
+                        SEATS_SQL, SINGLE_FLIGHT_SQL, STORED_SEATS_SQL)
+from seat_maps import get_seat_maps  # noqa: E402
+
+FLIGHTS = {
+    1: {'flight_id': 1, 'takeoff_date_time': datetime.datetime(2024, 1, 1, 10), 'takeoff_airport': 'SCL',
+        'landing_date_time': datetime.datetime(2024, 1, 1, 12), 'landing_airport': 'EZE', 'airplane_id': 1},
+    2: {'flight_id': 2, 'takeoff_date_time': datetime.datetime(2024, 1, 2, 10), 'takeoff_airport': 'SCL',
+        'landing_date_time': datetime.datetime(2024, 1, 2, 12), 'landing_airport': 'LIM', 'airplane_id': 1},
+}
+SEATS = [(i + 1, "ABCD"[i % 4], i // 4 + 1, 1 if i < 4 else 2, 1) for i in range(24)]
+SEATS_PREFIX = SEATS_SQL.split("{placeholders}")[0]
+FLIGHTS_PREFIX = FLIGHT_WITH_PASSENGERS_SQL.split("{condition}")[0]
+STORED_PREFIX = STORED_SEATS_SQL.split("{placeholders}")[0]
+
+
+def boarding_passes():
+    passes = []
+    for bp in range(1, 9):
+        passes.append({'passenger_id': bp, 'dni': str(1000 + bp), 'name': f"P{bp}", 'age': (30, 8)[bp % 2],
+                       'country': 'Chile', 'boarding_pass_id': bp, 'purchase_id': (bp + 1) // 2,
+                       'seat_type_id': 2, 'seat_id': 5 + bp if bp <= 2 else None, 'flight_id': 1 if bp <= 6 else 2})
+    return passes
+
+
+class FakeDatabase:
+    """Base de datos en memoria que responde las consultas de repository.py."""
+
+    def __init__(self):
+        self.passes = boarding_passes()
+        self.opened = []
+        # Asientos que otra petición guarda justo antes de nuestra escritura
+        self.concurrent = {}
+
+    def connect(self):
+        raw = FakeRawConnection(self)
+        self.opened.append(raw)
+        return raw
+
+    def passengers(self, flight_id):
+        return [{c: p[c] for c in PASSENGER_COLUMNS} for p in self.passes if p['flight_id'] == flight_id]
+
+    def query(self, sql, params):
+        if sql == FLIGHT_VERSION_SQL:
+            ids = [p['boarding_pass_id'] for p in self.passes if p['flight_id'] == params[0]]
+            return [{'total': len(ids), 'last_id': max(ids, default=None)}]
+        if sql == FLIGHT_SQL:
+            return [dict(FLIGHTS[params[0]])] if params[0] in FLIGHTS else []
+        if sql == SINGLE_FLIGHT_SQL or sql.startswith(FLIGHTS_PREFIX):
+            rows = []
+            for flight_id in params:
+                if flight_id in FLIGHTS:
+                    flight = tuple(FLIGHTS[flight_id][c] for c in FLIGHT_COLUMNS)
+                    passengers = self.passengers(flight_id) or [dict.fromkeys(PASSENGER_COLUMNS)]
+                    rows += [flight + tuple(p[c] for c in PASSENGER_COLUMNS) for p in passengers]
+            return rows
+        if sql == PENDING_GROUPS_SQL:
+            passengers = self.passengers(params[0])
+            groups = {p['purchase_id'] for p in passengers if p['seat_id'] is None}
+            return [p for p in passengers if p['purchase_id'] in groups]
+        if sql == OCCUPIED_SEATS_SQL:
+            return [{'seat_id': p['seat_id']} for p in self.passengers(params[0]) if p['seat_id'] is not None]
+        if sql.startswith(PASSENGER_PAGE_SQL):
+            rows = [p for p in self.passengers(params[0]) if p['boarding_pass_id'] > params[1]]
+            return rows[:params[2]] if len(params) > 2 else rows
+        if sql.startswith(SEATS_PREFIX):
+            return [s for s in SEATS if s[4] in params]
+        if sql.startswith(STORED_PREFIX):
+            return [(p['boarding_pass_id'], p['seat_id']) for p in self.passes if p['boarding_pass_id'] in params]
+        raise AssertionError(f"consulta inesperada: {sql}")
+
+    def update(self, params):
+        for bp, seat_id in self.concurrent.items():
+            self.store(seat_id, bp)
+        self.concurrent = {}
+        return sum(self.store(seat_id, bp) for seat_id, bp in params)
+
+    def store(self, seat_id, bp):
+        for p in self.passes:
+            if p['boarding_pass_id'] == bp and p['seat_id'] is None:
+                p['seat_id'] = seat_id
+                return 1
+        return 0
+
+
+class FakeCursor:
+    def __init__(self, db, dictionary=False):
+        self.db = db
+        self.dictionary = dictionary
+        self.rows = []
+        self.rowcount = 0
+        self.closed = False
+
+    def execute(self, sql, params=None):
+        rows = self.db.query(sql, params)
+        self.rows = [r if self.dictionary or isinstance(r, tuple) else tuple(r.values()) for r in rows]
+
+    def executemany(self, sql, seq_params):
+        self.rowcount = self.db.update(seq_params)
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRawConnection:
+    def __init__(self, db):
+        self.db = db
+        self.cursors = []
+        self.unread_result = False
+        self.in_transaction = False
+
+    def cursor(self, dictionary=False, **kwargs):
+        cursor = FakeCursor(self.db, dictionary)
+        self.cursors.append(cursor)
+        return cursor
+
+    def ping(self, reconnect=False):
+        pass
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestPassengersEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        self.db = FakeDatabase()
+        self.pool = db_pool._pool = ConnectionPool(self.db.connect, size=2)
+        cache.clear()
+        get_snapshots().invalidate()
+        get_seat_maps().invalidate()
+        self.client = app.test_client()
+
+    def tearDown(self):
+        db_pool._pool = None
+
+    def get(self, url, **kwargs):
+        response = self.client.get(url, **kwargs)
+        data = response.get_data()
+        response.close()
+        return response, data
+
+    def assert_released(self):
+        stats = self.pool.stats()
+        self.assertEqual(stats["in_use"], 0)
+        # Todos los cursores de la petición quedaron cerrados
+        self.assertTrue(all(c.closed for raw in self.db.opened for c in raw.cursors))
+
+    def test_etag_and_not_modified(self):
+        response, data = self.get('/flights/1/passengers')
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(data)
+        self.assertEqual(sorted(p['boardingPassId'] for p in body['data']['passengers']), [1, 2, 3, 4, 5, 6])
+        self.assertTrue(all(p['seatId'] is not None for p in body['data']['passengers']))
+        etag = response.headers['ETag']
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+        response, data = self.get('/flights/1/passengers', headers={'If-None-Match': etag})
+        self.assertEqual((response.status_code, data), (304, b""))
+        response, _ = self.get('/flights/1/passengers', headers={'If-None-Match': '"otro"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get('/flights/9/passengers')[0].status_code, 404)
+        self.assert_released()
+
+    def test_seat_stored_by_another_request_wins(self):
+        # Otra petición guarda antes un asiento distinto para el pase 3
+        self.db.concurrent = {3: 24}
+        for _ in range(2):
+            body = json.loads(self.get('/flights/1/passengers')[1])
+            seats = {p['boardingPassId']: p['seatId'] for p in body['data']['passengers']}
+            self.assertEqual(seats[3], 24)
+        self.assertEqual(next(p['seat_id'] for p in self.db.passes if p['boarding_pass_id'] == 3), 24)
+        self.assert_released()
+
+    def test_page_and_next_after(self):
+        response, data = self.get('/flights/1/passengers?limit=4')
+        body = json.loads(data)
+        self.assertEqual([p['boardingPassId'] for p in body['data']['passengers']], [1, 2, 3, 4])
+        self.assertEqual(body['nextAfter'], 4)
+        # Los pases sin asiento se asignan y guardan antes de paginar
+        self.assertTrue(all(p['seat_id'] is not None for p in self.db.passes if p['flight_id'] == 1))
+
+        body = json.loads(self.get('/flights/1/passengers?after=4&limit=4')[1])
+        self.assertEqual([p['boardingPassId'] for p in body['data']['passengers']], [5, 6])
+        self.assertIsNone(body['nextAfter'])
+        self.assert_released()
+
+    def test_bad_page_arguments(self):
+        for query in ('limit=0', 'limit=abc', 'limit=100000', 'after=-1'):
+            response, _ = self.get(f'/flights/1/passengers?{query}')
+            self.assertEqual(response.status_code, 400, query)
+        self.assertEqual(self.pool.stats()["acquired"], 0)
+
+    def test_stream_releases_connection(self):
+        response, data = self.get('/flights/1/passengers?stream=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(data)['data']['passengers']), 6)
+        self.assert_released()
+
+    def test_stream_head_and_unread_response_release_connection(self):
+        response = self.client.head('/flights/1/passengers?stream=1')
+        response.close()
+        self.assertEqual(response.status_code, 200)
+        self.assert_released()
+
+        # El cliente corta antes de leer el cuerpo
+        response = self.client.get('/flights/1/passengers?stream=1')
+        self.assertEqual(self.pool.stats()["in_use"], 1)
+        response.close()
+        self.assert_released()
+
+    def test_bulk_ids(self):
+        response, data = self.get('/flights/passengers?ids=2,9,1,2')
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(data)
+        self.assertEqual([f['flightId'] for f in body['data']], [2, 1])
+        self.assertEqual(body['notFound'], [9])
+        self.assertEqual(sorted(p['boardingPassId'] for p in body['data'][0]['passengers']), [7, 8])
+
+        for query in ('ids=', 'ids=1,x', 'ids=' + ",".join(map(str, range(1, 500)))):
+            self.assertEqual(self.get(f'/flights/passengers?{query}')[0].status_code, 400, query)
+        self.assert_released()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import asyncio
+import importlib.util
+import json
+import threading
+import unittest
+from unittest import mock
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN
+
+HAS_ASYNC_DEPS = importlib.util.find_spec("aiomysql") is not None
+
+if HAS_ASYNC_DEPS:
+    import pymysql
+
+    import asgi_app
+
+
+class FakeAsyncPool:
+    """Pool de aiomysql en memoria: `error` hace fallar acquire y `hang` lo deja esperando."""
+
+    def __init__(self):
+        self.error = None
+        self.hang = False
+        self.acquired = 0
+        self.released = 0
+        self.maxsize = 20
+        self.size = self.freesize = 0
+
+    async def acquire(self):
+        if self.hang:
+            await asyncio.sleep(3600)
+        if self.error is not None:
+            raise self.error
+        self.acquired += 1
+        return object()
+
+    def release(self, conn):
+        self.released += 1
+
+
+def failing_probe():
+    raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+
+
+@unittest.skipUnless(HAS_ASYNC_DEPS, "aiomysql no está instalado")
+class TestAsyncDatabase(unittest.IsolatedAsyncioTestCase):
+
+    def database(self):
+        db = asgi_app.AsyncDatabase(acquire_timeout=0.01)
+        db.pool = FakeAsyncPool()
+        # Sonda que falla y tarda en reintentar: el circuito abierto sigue abierto durante la prueba
+        db.breaker = CircuitBreaker(failing_probe, failure_threshold=2, base_delay=10, max_delay=10,
+                                    failure_types=db.breaker.failure_types, name=f"test-asgi-{id(db)}")
+        return db
+
+    async def acquire(self, db):
+        async with db.connection():
+            pass
+
+    async def test_pool_timeout_does_not_open_circuit(self):
+        db = self.database()
+        db.pool.hang = True
+        for _ in range(5):
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.acquire(db)
+        status = db.breaker.status()
+        self.assertEqual((status["state"], status["failures"]), (CLOSED, 0))
+
+        db.pool.hang = False
+        await self.acquire(db)
+        self.assertEqual((db.pool.acquired, db.pool.released), (1, 1))
+
+    async def test_database_errors_open_circuit(self):
+        db = self.database()
+        db.pool.error = pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+        for _ in range(2):
+            with self.assertRaises(pymysql.err.OperationalError):
+                await self.acquire(db)
+        self.assertEqual(db.breaker.status()["state"], OPEN)
+
+        # Abierto: falla rápido sin pedir conexión al pool
+        db.pool.error = None
+        with self.assertRaises(CircuitOpenError):
+            await self.acquire(db)
+        self.assertEqual(db.pool.acquired, 0)
+
+    async def test_passengers_status_codes(self):
+        db = self.database()
+        with mock.patch.object(asgi_app, "db", db), \
+                mock.patch.object(asgi_app, "repository", asgi_app.AsyncFlightRepository(db)):
+            db.pool.hang = True
+            status, body, _ = await asgi_app.get_passengers(1, {}, "")
+            self.assertEqual((status, json.loads(body)["errors"]), (400, "could not connect to db"))
+
+            db.pool.hang = False
+            db.pool.error = pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+            for _ in range(2):
+                self.assertEqual((await asgi_app.get_passengers(1, {}, ""))[0], 500)
+            status, _, headers = await asgi_app.get_passengers(1, {}, "")
+            self.assertEqual(status, 503)
+            self.assertGreaterEqual(int(dict(headers)[b"retry-after"]), 5)
+
+    async def test_cache_runs_outside_event_loop(self):
+        db = self.database()
+        cache = ThreadRecordingCache()
+        loop_thread = threading.get_ident()
+
+        async def fetchall(sql, params=None, dictionary=True):
+            return [{"1": 1}]
+
+        with mock.patch.object(asgi_app, "db", db), mock.patch.object(asgi_app, "cache", cache), \
+                mock.patch.object(db, "fetchall", fetchall):
+            self.assertEqual((await asgi_app.health_check({}))[0], 200)
+            self.assertEqual((await asgi_app.health_check({}))[0], 200)
+        self.assertEqual([call for call, _ in cache.calls], ["get", "stats", "set", "get"])
+        self.assertNotIn(loop_thread, {thread for _, thread in cache.calls})
+
+
+class ThreadRecordingCache:
+    """Caché en memoria que anota en qué hilo se llamó cada operación."""
+
+    def __init__(self):
+        self.values = {}
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(("get", threading.get_ident()))
+        return self.values.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.calls.append(("set", threading.get_ident()))
+        self.values[key] = value
+
+    def stats(self):
+        self.calls.append(("stats", threading.get_ident()))
+        return {"entries": len(self.values)}
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import copy
+import random
+import unittest
+
+from assignments import assign_incrementally, assign_flights_incrementally, assign_pending_groups, get_snapshots
+from seating import assign_seats, SeatMap
+from test_seating import make_cabin, make_passengers, assignment
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self.rows = []
+
+    def executemany(self, query, params):
+        if self.conn.fail:
+            raise RuntimeError("base de datos de solo lectura")
+        # Como el UPDATE ... AND seat_id IS NULL: no pisa los asientos guardados por otros
+        params = [(seat_id, bp) for seat_id, bp in params if bp not in self.conn.stored]
+        self.conn.written.extend(params)
+        self.rowcount = len(params)
+
+    def execute(self, query, params):
+        seats = dict((bp, seat_id) for seat_id, bp in self.conn.written)
+        seats.update(self.conn.stored)
+        self.rows = [(bp, seats[bp]) for bp in params if bp in seats]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """
+    Conexión mínima que registra las escrituras en boarding_pass. `stored` son asientos que
+    otro proceso ya guardó ({boarding_pass_id: seat_id}).
+    """
+
+    def __init__(self, fail=False, stored=None):
+        self.fail = fail
+        self.stored = stored or {}
+        self.written = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class TestIncrementalAssignment(unittest.TestCase):
+
+    def setUp(self):
+        get_snapshots().invalidate()
+        rng = random.Random(21)
+        self.seats = make_cabin(30, rng=rng)
+        self.seat_map = SeatMap(self.seats)
+        self.passengers = make_passengers(100, self.seats, rng)
+
+    def test_matches_full_assignment_and_persists_new_seats(self):
+        expected = assign_seats(copy.deepcopy(self.passengers), self.seat_map)
+        conn = FakeConnection()
+        result = assign_incrementally(conn, 1, copy.deepcopy(self.passengers), self.seat_map, persist=True)
+        self.assertEqual(assignment(result), assignment(expected))
+
+        pending_ids = {p['boarding_pass_id'] for p in self.passengers if p['seat_id'] is None}
+        self.assertEqual({bp for _, bp in conn.written}, {p['boarding_pass_id'] for p in expected
+                                                          if p['boarding_pass_id'] in pending_ids and p['seat_id']})
+        self.assertEqual(conn.commits, 1)
+
+    def test_only_new_boarding_passes_are_assigned(self):
+        first = assign_incrementally(FakeConnection(), 1, copy.deepcopy(self.passengers[:60]), self.seat_map, persist=True)
+        # Simular la siguiente lectura: los asientos ya están guardados y llegan pases nuevos
+        stored = {p['boarding_pass_id']: p['seat_id'] for p in first}
+        passengers = copy.deepcopy(self.passengers)
+        for p in passengers:
+            p['seat_id'] = stored.get(p['boarding_pass_id'])
+        conn = FakeConnection()
+        result = assign_incrementally(conn, 1, passengers, self.seat_map, persist=True)
+
+        result_seats = {p['boarding_pass_id']: p['seat_id'] for p in result}
+        for bp, seat_id in stored.items():
+            self.assertEqual(result_seats[bp], seat_id)
+        self.assertTrue(all(bp not in stored for _, bp in conn.written))
+        seated = [p['seat_id'] for p in result if p['seat_id'] is not None]
+        self.assertEqual(len(seated), len(set(seated)))
+
+    def test_seats_are_stable_when_persisting_fails(self):
+        first = assign_incrementally(FakeConnection(fail=True), 1, copy.deepcopy(self.passengers), self.seat_map, persist=True)
+        # Orden de filas distinto en la siguiente petición: los asientos no deben cambiar
+        shuffled = copy.deepcopy(self.passengers)
+        random.Random(3).shuffle(shuffled)
+        second = assign_incrementally(FakeConnection(fail=True), 1, shuffled, self.seat_map, persist=True)
+        self.assertEqual({p['boarding_pass_id']: p['seat_id'] for p in first},
+                         {p['boarding_pass_id']: p['seat_id'] for p in second})
+
+    def test_multiple_flights_match_single_flight_assignment(self):
+        rng = random.Random(8)
+        passengers_by_flight = {f: make_passengers(40, self.seats, rng) for f in (1, 2, 3)}
+        expected = {f: assign_seats(copy.deepcopy(ps), self.seat_map) for f, ps in passengers_by_flight.items()}
+        conn = FakeConnection()
+        result = assign_flights_incrementally(conn, copy.deepcopy(passengers_by_flight),
+                                              {f: self.seat_map for f in passengers_by_flight}, persist=True)
+        for flight_id in passengers_by_flight:
+            self.assertEqual(assignment(result[flight_id]), assignment(expected[flight_id]))
+        self.assertEqual(conn.commits, 1)
+
+    def concurrent_seats(self):
+        """Un pase pendiente con otro asiento libre de su tipo ya guardado por otra petición."""
+        expected = assign_seats(copy.deepcopy(self.passengers), self.seat_map)
+        taken = {p['seat_id'] for p in expected}
+        pending = next(p for p in expected if p['seat_id'] is not None
+                       and p['boarding_pass_id'] in {q['boarding_pass_id'] for q in self.passengers if q['seat_id'] is None})
+        seat_id = next(s['seat_id'] for s in self.seats
+                       if s['seat_type_id'] == pending['seat_type_id'] and s['seat_id'] not in taken)
+        return {pending['boarding_pass_id']: seat_id}
+
+    def test_seats_stored_by_others_win(self):
+        stored = self.concurrent_seats()
+        [(bp, seat_id)] = stored.items()
+        result = assign_incrementally(FakeConnection(stored=stored), 1, copy.deepcopy(self.passengers),
+                                      self.seat_map, persist=True)
+        self.assertEqual(next(p['seat_id'] for p in result if p['boarding_pass_id'] == bp), seat_id)
+        self.assertEqual(get_snapshots().get(1)[bp], seat_id)
+
+        get_snapshots().invalidate()
+        result = assign_flights_incrementally(FakeConnection(stored=stored), {1: copy.deepcopy(self.passengers)},
+                                              {1: self.seat_map}, persist=True)
+        self.assertEqual(next(p['seat_id'] for p in result[1] if p['boarding_pass_id'] == bp), seat_id)
+        self.assertEqual(get_snapshots().get(1)[bp], seat_id)
+
+        get_snapshots().invalidate()
+        pending_groups = {p['purchase_id'] for p in self.passengers if p['seat_id'] is None}
+        affected = [dict(p) for p in self.passengers if p['purchase_id'] in pending_groups]
+        occupied = {p['seat_id'] for p in self.passengers if p['seat_id'] is not None}
+        seats = assign_pending_groups(FakeConnection(stored=stored), 1, affected, occupied, self.seat_map, persist=True)
+        self.assertEqual(seats[bp], seat_id)
+        self.assertEqual(get_snapshots().get(1)[bp], seat_id)
+
+    def test_pending_groups_match_incremental_assignment(self):
+        expected = assign_incrementally(FakeConnection(), 1, copy.deepcopy(self.passengers), self.seat_map, persist=False)
+        get_snapshots().invalidate()
+
+        # Solo los grupos con pases pendientes y los asientos ocupados, como en el modo streaming
+        pending_groups = {p['purchase_id'] for p in self.passengers if p['seat_id'] is None}
+        affected = [dict(p) for p in self.passengers if p['purchase_id'] in pending_groups]
+        occupied = {p['seat_id'] for p in self.passengers if p['seat_id'] is not None}
+        conn = FakeConnection()
+        seats = assign_pending_groups(conn, 1, affected, occupied, self.seat_map, persist=True)
+
+        expected_seats = {p['boarding_pass_id']: p['seat_id'] for p in expected
+                          if p['purchase_id'] in pending_groups and p['seat_id'] is not None}
+        self.assertEqual(seats, expected_seats)
+        pending_ids = {p['boarding_pass_id'] for p in self.passengers if p['seat_id'] is None}
+        self.assertEqual({bp for _, bp in conn.written}, pending_ids & set(seats))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import threading
+import time
+import unittest
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, HALF_OPEN, OPEN
+
+
+class FakeProbe:
+    """Sonda que falla mientras `failing` sea cierto; anota el estado del circuito al ejecutarse."""
+
+    def __init__(self, failing=True):
+        self.failing = failing
+        self.breaker = None
+        self.calls = 0
+        self.states = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            self.states.append(self.breaker.status()["state"])
+            time.sleep(0.005)
+            if self.failing:
+                raise ConnectionError("db caída")
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def fail():
+    raise ConnectionError("db caída")
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("la condición no se cumplió a tiempo")
+        time.sleep(0.002)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def breaker(self, probe, **kwargs):
+        kwargs.setdefault("failure_threshold", 3)
+        kwargs.setdefault("base_delay", 0.01)
+        kwargs.setdefault("max_delay", 0.04)
+        breaker = CircuitBreaker(probe, failure_types=(ConnectionError,), name=f"test-{id(probe)}", **kwargs)
+        probe.breaker = breaker
+        return breaker
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = self.breaker(FakeProbe(), failure_threshold=3, base_delay=10, max_delay=10)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(fail)
+        # Un éxito reinicia la cuenta de fallos seguidos
+        self.assertEqual(breaker.call(lambda: "ok"), "ok")
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(fail)
+        self.assertEqual(breaker.status()["state"], CLOSED)
+
+        with self.assertRaises(ConnectionError):
+            breaker.call(fail)
+        self.assertEqual(breaker.status()["state"], OPEN)
+
+        # Abierto: falla rápido sin ejecutar la llamada
+        called = []
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(called.append, 1)
+        self.assertEqual(called, [])
+
+    def test_other_errors_do_not_count(self):
+        breaker = self.breaker(FakeProbe(), failure_threshold=1)
+        with self.assertRaises(ValueError):
+            breaker.call(int, "x")
+        self.assertEqual(breaker.status()["state"], CLOSED)
+
+    def test_retry_after_within_backoff(self):
+        breaker = self.breaker(FakeProbe(), failure_threshold=1, base_delay=8, max_delay=60)
+        with self.assertRaises(ConnectionError):
+            breaker.call(fail)
+        with self.assertRaises(CircuitOpenError) as ctx:
+            breaker.check()
+        # Primer retardo: base_delay con jitter en [base_delay / 2, base_delay]
+        self.assertGreaterEqual(ctx.exception.retry_after, 3.9)
+        self.assertLessEqual(ctx.exception.retry_after, 8)
+        self.assertAlmostEqual(breaker.status()["retry_in"], ctx.exception.retry_after, delta=0.1)
+
+    def test_retry_after_header(self):
+        from app import app, circuit_open_response
+
+        with app.test_request_context():
+            self.assertEqual(circuit_open_response(CircuitOpenError(2.2), {}).headers["Retry-After"], "3")
+            # Nunca 0: el cliente debe esperar al menos un segundo
+            self.assertEqual(circuit_open_response(CircuitOpenError(0.0), {}).headers["Retry-After"], "1")
+
+    def test_half_open_probe_closes_circuit(self):
+        probe = FakeProbe(failing=True)
+        breaker = self.breaker(probe, failure_threshold=1)
+        with self.assertRaises(ConnectionError):
+            breaker.call(fail)
+        wait_for(lambda: probe.calls >= 2)
+        # Mientras la sonda falla el circuito alterna entre abierto y semiabierto
+        self.assertIn(breaker.status()["state"], (OPEN, HALF_OPEN))
+        self.assertIn(HALF_OPEN, probe.states)
+
+        probe.failing = False
+        wait_for(lambda: breaker.status()["state"] == CLOSED)
+        self.assertEqual(breaker.call(lambda: "ok"), "ok")
+        self.assertIsNone(breaker.status()["last_error"])
+
+    def test_single_probe_thread(self):
+        probe = FakeProbe(failing=True)
+        breaker = self.breaker(probe, failure_threshold=1)
+        name = f"{breaker.name}-breaker-probe"
+
+        # Muchos fallos a la vez desde varios hilos mientras el circuito está abierto
+        def record():
+            for _ in range(20):
+                breaker.record_failure(ConnectionError("db caída"))
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wait_for(lambda: probe.calls >= 3)
+        self.assertEqual(sum(1 for t in threading.enumerate() if t.name == name), 1)
+        self.assertEqual(probe.max_running, 1)
+        self.assertEqual(breaker.status()["trips"], 1)
+
+        probe.failing = False
+        wait_for(lambda: breaker.status()["state"] == CLOSED)
+        wait_for(lambda: not any(t.name == name for t in threading.enumerate()))
+
+
+if __name__ == "__main__":
+    unittest.main()
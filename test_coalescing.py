@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import unittest
+
+from coalescing import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def run_concurrently(self, flight, key, fn, callers):
+        """Lanza `callers` hilos con la misma clave y devuelve sus resultados o excepciones."""
+        results = [None] * callers
+        started = threading.Barrier(callers)
+
+        def call(i):
+            started.wait()
+            try:
+                results[i] = flight.do(key, fn)
+            except Exception as err:
+                results[i] = err
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_computation(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return ("body", "etag")
+
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        results = self.run_concurrently(flight, ("passengers", 1), compute, 8)
+        timer.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result[0] == ("body", "etag") for result in results))
+        self.assertEqual(sum(shared for _, shared in results), 7)
+        self.assertEqual(flight.stats(), {"computed": 1, "coalesced": 7, "failed": 0, "in_flight": 0})
+
+    def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def compute():
+            release.wait(5)
+            raise RuntimeError("db caída")
+
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        results = self.run_concurrently(flight, ("passengers", 1), compute, 4)
+        timer.join()
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(flight.stats()["failed"], 1)
+
+    def test_sequential_calls_and_other_keys_are_not_coalesced(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do(1, lambda: "a"), ("a", False))
+        self.assertEqual(flight.do(1, lambda: "b"), ("b", False))
+        self.assertEqual(flight.do(2, lambda: "c"), ("c", False))
+        self.assertEqual(flight.stats()["computed"], 3)
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+
+    def test_concurrent_coroutines_share_one_computation(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "body"
+
+        async def main():
+            return await asyncio.gather(*(flight.do(7, compute) for _ in range(5)))
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result for result, _ in results], ["body"] * 5)
+        self.assertEqual(flight.stats(), {"computed": 1, "coalesced": 4, "failed": 0, "in_flight": 0})
+
+    def test_errors_reach_every_waiter(self):
+        flight = AsyncSingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("db caída")
+
+        async def main():
+            return await asyncio.gather(*(flight.do(7, compute) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(flight.stats()["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import threading
+import time
+import unittest
+
+import mysql.connector
+
+from db_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeCursor:
+    def __init__(self, raw):
+        self.raw = raw
+
+    def execute(self, operation, params=None):
+        if self.raw.error is not None:
+            raise self.raw.error
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class FakeRawConnection:
+    """Conexión de mysql.connector en memoria: `alive` controla el ping y `error` las consultas."""
+
+    def __init__(self):
+        self.alive = True
+        self.error = None
+        self.closed = False
+        self.unread_result = False
+        self.in_transaction = False
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise mysql.connector.errors.InterfaceError("Lost connection to MySQL server")
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnect:
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        raw = FakeRawConnection()
+        self.opened.append(raw)
+        return raw
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def pool(self, **kwargs):
+        self.connect = FakeConnect()
+        return ConnectionPool(self.connect, **kwargs)
+
+    def test_never_opens_more_than_size(self):
+        pool = self.pool(size=2)
+        first, second = pool.acquire(), pool.acquire()
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire(timeout=0.01)
+        stats = pool.stats()
+        self.assertEqual((stats["open"], stats["in_use"], stats["timeouts"]), (2, 2, 1))
+
+        # La conexión devuelta se reutiliza (LIFO) sin abrir otra
+        second.close()
+        self.assertIs(pool.acquire(timeout=0.01).raw, second.raw)
+        first.close()
+        self.assertEqual(len(self.connect.opened), 2)
+
+    def test_waiter_gets_released_connection(self):
+        pool = self.pool(size=1)
+        conn = pool.acquire()
+        threading.Timer(0.02, conn.close).start()
+        started = time.monotonic()
+        again = pool.acquire(timeout=2)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertIs(again.raw, conn.raw)
+        self.assertEqual(pool.stats()["waits"], 1)
+
+    def test_recycles_after_max_uses_and_lifetime(self):
+        pool = self.pool(size=1, max_uses=2)
+        for _ in range(3):
+            pool.acquire().close()
+        self.assertEqual(len(self.connect.opened), 2)
+        self.assertTrue(self.connect.opened[0].closed)
+        self.assertEqual(pool.stats()["recycled"], 1)
+
+        pool = self.pool(size=1, max_lifetime=0)
+        pool.acquire().close()
+        pool.acquire().close()
+        self.assertEqual(len(self.connect.opened), 2)
+        self.assertEqual(pool.stats()["idle"], 0)
+
+    def test_validates_idle_connection_before_lending_it(self):
+        pool = self.pool(size=1, validate_after=0)
+        pool.acquire().close()
+        self.connect.opened[0].alive = False
+        conn = pool.acquire()
+        self.assertIsNot(conn.raw, self.connect.opened[0])
+        self.assertTrue(self.connect.opened[0].closed)
+        self.assertEqual(pool.stats()["invalid"], 1)
+
+    def test_discards_connection_broken_during_use(self):
+        # Sin validación al prestar: la conexión rota debe descartarse al devolverla
+        pool = self.pool(size=1, validate_after=3600)
+        conn = pool.acquire()
+        conn.raw.error = mysql.connector.errors.OperationalError("Lost connection to MySQL server during query")
+        cursor = conn.cursor()
+        with self.assertRaises(mysql.connector.errors.OperationalError):
+            cursor.execute("SELECT 1")
+        self.assertTrue(conn.broken)
+        conn.close()
+
+        stats = pool.stats()
+        self.assertEqual((stats["open"], stats["idle"], stats["invalid"]), (0, 0, 1))
+        self.assertTrue(self.connect.opened[0].closed)
+        self.assertIsNot(pool.acquire().raw, self.connect.opened[0])
+
+    def test_query_errors_keep_connection(self):
+        pool = self.pool(size=1)
+        conn = pool.acquire()
+        conn.raw.error = mysql.connector.errors.ProgrammingError("You have an error in your SQL syntax")
+        with self.assertRaises(mysql.connector.errors.ProgrammingError):
+            conn.cursor().execute("SELEC 1")
+        conn.raw.error = None
+        conn.close()
+        self.assertFalse(conn.broken)
+        self.assertIs(pool.acquire().raw, self.connect.opened[0])
+
+    def test_failed_cleanup_discards_connection(self):
+        pool = self.pool(size=1)
+        conn = pool.acquire()
+        conn.raw.unread_result = True
+        conn.raw.consume_results = lambda: (_ for _ in ()).throw(
+            mysql.connector.errors.InterfaceError("Lost connection to MySQL server"))
+        conn.close()
+        self.assertEqual((pool.stats()["idle"], pool.stats()["invalid"]), (0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from db_pool import PoolTimeoutError
+from health import DatabaseProber, readiness
+
+CLOSED = {"state": "closed"}
+POOL = {"size": 5, "in_use": 1}
+
+
+class FakeCheck:
+    def __init__(self):
+        self.error = None
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+
+
+class TestDatabaseProber(unittest.TestCase):
+
+    def test_records_success_and_failures(self):
+        check = FakeCheck()
+        prober = DatabaseProber(check, busy_types=(PoolTimeoutError,))
+        self.assertIsNone(prober.status()["ok"])
+
+        prober.probe()
+        self.assertTrue(prober.status()["ok"])
+
+        check.error = ConnectionError("db caída")
+        prober.probe()
+        prober.probe()
+        status = prober.status()
+        self.assertFalse(status["ok"])
+        self.assertEqual((status["consecutive_failures"], status["last_error"]), (2, "db caída"))
+
+    def test_busy_pool_keeps_last_result(self):
+        check = FakeCheck()
+        prober = DatabaseProber(check, busy_types=(PoolTimeoutError,))
+        prober.probe()
+        check.error = PoolTimeoutError("sin conexiones libres")
+        prober.probe()
+        status = prober.status()
+        self.assertTrue(status["ok"])
+        self.assertEqual(status["skipped_busy"], 1)
+
+    def test_background_thread_probes(self):
+        check = FakeCheck()
+        prober = DatabaseProber(check, interval=0.01).start()
+        try:
+            for _ in range(100):
+                if check.calls >= 2:
+                    break
+                prober._stop.wait(0.01)
+        finally:
+            prober.stop()
+        self.assertGreaterEqual(check.calls, 2)
+
+
+class TestReadiness(unittest.TestCase):
+
+    def probe(self, ok=True, age=1.0):
+        return {"ok": ok, "age_s": age}
+
+    def test_ready(self):
+        self.assertEqual(readiness(self.probe(), POOL, CLOSED, max_age=15), (True, []))
+
+    def test_not_ready_reasons(self):
+        self.assertFalse(readiness(self.probe(ok=None, age=None), POOL, CLOSED, max_age=15)[0])
+        self.assertFalse(readiness(self.probe(ok=False), POOL, CLOSED, max_age=15)[0])
+        self.assertFalse(readiness(self.probe(age=20), POOL, CLOSED, max_age=15)[0])
+        self.assertFalse(readiness(self.probe(), POOL, {"state": "open"}, max_age=15)[0])
+
+    def test_pool_saturation(self):
+        busy = {"size": 5, "in_use": 5}
+        self.assertTrue(readiness(self.probe(), busy, CLOSED, max_age=15)[0])
+        ready, reasons = readiness(self.probe(), busy, CLOSED, max_age=15, max_saturation=0.8)
+        self.assertFalse(ready)
+        self.assertEqual(reasons, ["connection pool saturated"])
+
+
+if __name__ == "__main__":
+    unittest.main()
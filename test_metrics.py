@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+import metrics
+from metrics import MetricsRegistry, RequestTimer, end_request, stage, start_request
+from shared_cache import SharedCache
+
+
+def finished_request(*stages):
+    timer = RequestTimer()
+    for name, seconds in stages:
+        timer.add(name, seconds)
+    return timer
+
+
+class TestStages(unittest.TestCase):
+
+    def test_stage_outside_a_request_does_nothing(self):
+        with stage("assign"):
+            pass
+
+    def test_stages_are_added_to_the_current_request(self):
+        timer, token = start_request()
+        try:
+            with stage("connect"):
+                pass
+            with stage("persist"):
+                pass
+            with stage("persist"):
+                pass
+        finally:
+            end_request(token)
+        self.assertEqual(list(timer.totals()), ["connect", "persist"])
+        header = timer.server_timing()
+        self.assertTrue(header.startswith("connect;dur="))
+        self.assertIn(", total;dur=", header)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SharedCache(path=os.path.join(self.tmp.name, "cache.sqlite3"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sample(self, text, prefix):
+        return [line for line in text.splitlines() if line.startswith(prefix)]
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        registry.observe_request("get_passengers", 200, finished_request(("assign", 0.003)))
+        registry.observe_request("get_passengers", 200, finished_request(("assign", 0.2)))
+        text = registry.render()
+        self.assertIn('flights_api_stage_seconds_bucket{stage="assign",le="0.005"} 1', text)
+        self.assertIn('flights_api_stage_seconds_bucket{stage="assign",le="0.25"} 2', text)
+        self.assertIn('flights_api_stage_seconds_bucket{stage="assign",le="+Inf"} 2', text)
+        self.assertIn('flights_api_stage_seconds_count{stage="assign"} 2', text)
+        self.assertIn('flights_api_responses_total{endpoint="get_passengers",status="200"} 2', text)
+
+    def test_collectors_are_exported(self):
+        registry = MetricsRegistry()
+        registry.register("pool", lambda: {"in_use": 2, "acquired": 7, "wait_avg_ms": 1.5},
+                          gauges=("in_use",), counters=("acquired",))
+        text = registry.render()
+        self.assertIn("flights_api_pool_in_use 2", text)
+        self.assertIn("flights_api_pool_acquired_total 7", text)
+        self.assertNotIn("wait_avg_ms", text)
+
+    def test_workers_are_summed_and_dead_workers_archived(self):
+        registry = MetricsRegistry(self.store)
+        registry.observe_request("get_passengers", 200, finished_request(("flight", 0.01)))
+        # Otro worker vivo (el propio proceso de pruebas) y uno que ya terminó
+        other = MetricsRegistry()
+        other.observe_request("get_passengers", 200, finished_request(("flight", 0.01)))
+        self.store.set(f"{metrics.SNAPSHOT_PREFIX}{os.getppid()}", other.snapshot(), timeout=0)
+        self.store.set(f"{metrics.SNAPSHOT_PREFIX}999999999", other.snapshot(), timeout=0)
+
+        text = registry.render()
+        self.assertEqual(self.sample(text, "flights_api_stage_seconds_count"),
+                         ['flights_api_stage_seconds_count{stage="flight"} 3'])
+        self.assertIn("flights_api_workers 2", text)
+        self.assertNotIn(f"{metrics.SNAPSHOT_PREFIX}999999999", self.store.get_prefix(metrics.SNAPSHOT_PREFIX))
+
+        # El trabajador terminado sigue contando, una sola vez
+        text = registry.render()
+        self.assertEqual(self.sample(text, "flights_api_stage_seconds_count"),
+                         ['flights_api_stage_seconds_count{stage="flight"} 3'])
+
+    def test_archive_survives_cache_eviction(self):
+        store = SharedCache(path=self.store.path, threshold=20)
+        registry = MetricsRegistry(store)
+        dead = MetricsRegistry()
+        for _ in range(500):
+            dead.observe_request("get_passengers", 200, finished_request(("flight", 0.01)))
+        store.set(f"{metrics.SNAPSHOT_PREFIX}999999999", dead.snapshot(), timeout=0)
+        registry.render()
+
+        # Las respuestas cacheadas de muchos vuelos llenan la caché compartida
+        responses = SharedCache(path=self.store.path, threshold=20)
+        for flight_id in range(30):
+            responses.set(f"passengers/{flight_id}/6/6", ("{}", "etag"))
+        self.assertIn('flights_api_responses_total{endpoint="get_passengers",status="200"} 500',
+                      registry.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
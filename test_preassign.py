@@ -0,0 +1,121 @@
+import copy
+import os
+import random
+import tempfile
+import unittest
+
+from assignments import compute_pending_seats
+from preassign import Checkpoint, preassign
+from seating import SeatMap
+from test_assignments import FakeConnection
+from test_seating import make_cabin, make_passengers
+
+
+class FakeRepository(FakeConnection):
+    """Vuelos en memoria con la interfaz de FlightRepository que usa preassign."""
+
+    def __init__(self, flights, passengers_by_flight, seats, fail_after=None):
+        super().__init__()
+        self.flights = flights
+        self.passengers_by_flight = passengers_by_flight
+        self.seats = seats
+        self.fail_after = fail_after
+        self.transactions = 0
+
+    def pending_ids(self, start, end, after):
+        return [f for f, flight in sorted(self.flights.items())
+                if start <= flight['takeoff_date_time'] < end and f > after
+                and any(p['seat_id'] is None for p in self.passengers_by_flight[f])]
+
+    def upcoming_pending_flight_ids(self, start, end, after=0, limit=100):
+        return self.pending_ids(start, end, after)[:limit]
+
+    def count_upcoming_pending_flights(self, start, end, after=0):
+        return len(self.pending_ids(start, end, after))
+
+    def load_flights(self, flight_ids):
+        return ({f: self.flights[f] for f in flight_ids},
+                {f: copy.deepcopy(self.passengers_by_flight[f]) for f in flight_ids})
+
+    def load_seats(self, airplane_ids):
+        return [dict(s, airplane_id=a) for a in airplane_ids for s in self.seats]
+
+    def start_transaction(self):
+        if self.fail_after is not None and self.transactions >= self.fail_after:
+            raise KeyboardInterrupt
+        self.transactions += 1
+
+    def commit(self):
+        super().commit()
+        # Reflejar la escritura como lo vería la siguiente consulta
+        seats = dict((bp, seat_id) for seat_id, bp in self.written)
+        for passengers in self.passengers_by_flight.values():
+            for p in passengers:
+                if p['seat_id'] is None and p['boarding_pass_id'] in seats:
+                    p['seat_id'] = seats[p['boarding_pass_id']]
+
+
+class TestPreassign(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.checkpoint = Checkpoint(os.path.join(self.tmp.name, "checkpoint.json"))
+        rng = random.Random(8)
+        self.seats = make_cabin(20, rng=rng)
+        self.flights = {}
+        self.passengers = {}
+        bp = 0
+        for flight_id in range(1, 9):
+            self.flights[flight_id] = {'flight_id': flight_id, 'airplane_id': 1,
+                                       'takeoff_date_time': 1000 + flight_id * 100}
+            passengers = make_passengers(40, self.seats, rng)
+            for p in passengers:
+                bp += 1
+                p['boarding_pass_id'] = bp
+            self.passengers[flight_id] = passengers
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expected_seats(self, flight_ids):
+        seat_map = SeatMap(self.seats)
+        return {bp: seat_id for f in flight_ids
+                for bp, seat_id in compute_pending_seats(copy.deepcopy(self.passengers[f]), seat_map).items()}
+
+    def repository(self, **kwargs):
+        return FakeRepository(self.flights, copy.deepcopy(self.passengers), self.seats, **kwargs)
+
+    def test_assigns_flights_in_window_in_chunks(self):
+        repository = self.repository()
+        state = preassign(repository, 1200, 1700, self.checkpoint, batch_flights=2, chunk_size=10)
+        self.assertEqual(state["flights"], 5)
+        expected = self.expected_seats(range(2, 7))
+        self.assertEqual({bp: seat_id for seat_id, bp in repository.written}, expected)
+        self.assertEqual(state["seats"], len(expected))
+        # Transacciones de 10 filas como máximo
+        self.assertGreaterEqual(repository.commits, len(expected) // 10)
+        self.assertIsNone(self.checkpoint.load())
+
+    def test_resumes_after_interruption(self):
+        repository = self.repository(fail_after=3)
+        with self.assertRaises(KeyboardInterrupt):
+            preassign(repository, 0, 10000, self.checkpoint, batch_flights=2, chunk_size=1000)
+        saved = self.checkpoint.load()
+        self.assertEqual((saved["last_flight_id"], saved["flights"]), (6, 6))
+
+        repository.fail_after = None
+        state = preassign(repository, 0, 10000, self.checkpoint, batch_flights=2)
+        self.assertEqual(state["flights"], 8)
+        self.assertEqual(state["conflicts"], 0)
+        self.assertEqual({bp: seat_id for seat_id, bp in repository.written}, self.expected_seats(range(1, 9)))
+
+    def test_dry_run_writes_nothing(self):
+        repository = self.repository()
+        state = preassign(repository, 0, 10000, self.checkpoint, batch_flights=3, dry_run=True)
+        self.assertEqual(state["flights"], 8)
+        self.assertGreater(state["seats"], 0)
+        self.assertEqual(repository.written, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
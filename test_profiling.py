@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from profiling import RequestProfiler, annotate, sign
+
+
+def busy():
+    return sum(i * i for i in range(1000))
+
+
+class TestRequestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def profiler(self, **kwargs):
+        return RequestProfiler(self.tmp.name, **kwargs)
+
+    def test_disabled_by_default(self):
+        profiler = self.profiler()
+        self.assertFalse(profiler.enabled)
+        self.assertIsNone(profiler.reason("/flights/1/passengers", None))
+
+    def test_sampling_one_in_n(self):
+        profiler = self.profiler(sample_rate=3)
+        reasons = [profiler.reason("/flights/1/passengers", None) for _ in range(9)]
+        self.assertEqual(reasons.count("sample"), 3)
+
+    def test_signed_header(self):
+        profiler = self.profiler(secret="s3cr3t")
+        path = "/flights/1/passengers"
+        expires = int(time.time()) + 60
+        self.assertEqual(profiler.reason(path, f"{expires}:{sign('s3cr3t', path, expires)}"), "header")
+        # Firma de otra ruta, otro secreto o ya vencida
+        self.assertIsNone(profiler.reason("/flights/2/passengers", f"{expires}:{sign('s3cr3t', path, expires)}"))
+        self.assertIsNone(profiler.reason(path, f"{expires}:{sign('otro', path, expires)}"))
+        expired = int(time.time()) - 1
+        self.assertIsNone(profiler.reason(path, f"{expired}:{sign('s3cr3t', path, expired)}"))
+
+    def test_dump_with_details_and_annotations(self):
+        profiler = self.profiler(sample_rate=1)
+        profile, token = profiler.start("sample")
+        annotate(passengers=180)
+        busy()
+        name = profiler.finish(profile, token, endpoint="get_passengers", flight_id=1)
+
+        with open(os.path.join(self.tmp.name, name[:-len(".prof")] + ".json")) as f:
+            details = json.load(f)
+        self.assertEqual((details["flight_id"], details["passengers"], details["reason"]), (1, 180, "sample"))
+        self.assertGreater(details["wall_ms"], 0)
+        # Fuera de un perfil las anotaciones se ignoran
+        annotate(passengers=1)
+
+    def test_only_one_profile_at_a_time(self):
+        profiler = self.profiler(sample_rate=1)
+        first = profiler.start("sample")
+        self.assertIsNone(profiler.start("sample"))
+        profiler.finish(*first)
+        second = profiler.start("sample")
+        self.assertIsNotNone(second)
+        profiler.finish(*second)
+
+    def test_retention(self):
+        profiler = self.profiler(sample_rate=1, max_files=2)
+        for i in range(4):
+            profile, token = profiler.start("sample")
+            profiler.finish(profile, token, endpoint=f"e{i}")
+            time.sleep(0.002)
+        files = sorted(os.listdir(self.tmp.name))
+        self.assertEqual(len(files), 4)
+        self.assertTrue(any(f.endswith("-e3.prof") for f in files))
+        self.assertFalse(any("-e0." in f for f in files))
+
+
+if __name__ == "__main__":
+    unittest.main()
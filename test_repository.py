@@ -0,0 +1,122 @@
+import datetime
+import unittest
+
+from repository import FLIGHT_COLUMNS, FlightRepository, PASSENGER_COLUMNS, SINGLE_FLIGHT_SQL
+
+
+FLIGHT = {
+    'flight_id': 1, 'takeoff_date_time': datetime.datetime(2024, 1, 1, 10), 'takeoff_airport': 'SCL',
+    'landing_date_time': datetime.datetime(2024, 1, 1, 12), 'landing_airport': 'EZE', 'airplane_id': 1,
+}
+
+
+def joined_row(boarding_pass_id, seat_id=None):
+    row = dict(FLIGHT)
+    row.update({
+        'passenger_id': boarding_pass_id, 'dni': str(boarding_pass_id), 'name': f"P{boarding_pass_id}",
+        'age': 30, 'country': 'Chile', 'boarding_pass_id': boarding_pass_id,
+        'purchase_id': 1, 'seat_type_id': 1, 'seat_id': seat_id,
+    })
+    return row
+
+
+def compact(row):
+    """La fila del JOIN como la devuelve un cursor sin diccionario (tupla en el orden del SELECT)."""
+    return tuple(row[column] for column in FLIGHT_COLUMNS + PASSENGER_COLUMNS)
+
+
+class FakeCursor:
+    def __init__(self, conn, prepared=False):
+        self.conn = conn
+        self.prepared = prepared
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((sql, self.prepared))
+        self.rows = self.conn.rows
+
+    def executemany(self, sql, seq_params):
+        self.conn.executed.append((sql, self.prepared))
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        self.conn.fetched += 1
+        return self.rows.pop(0) if self.rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.statements = {}
+        self.fetched = 0
+
+    def cursor(self, prepared=False, **kwargs):
+        return FakeCursor(self, prepared)
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+
+class TestFlightRepository(unittest.TestCase):
+
+    def test_flight_and_passengers_in_one_round_trip(self):
+        conn = FakeConnection([compact(joined_row(1, seat_id=7)), compact(joined_row(2))])
+        repository = FlightRepository(conn, prepared=False)
+        flight, passengers = repository.load_flight(1)
+        self.assertEqual(flight, FLIGHT)
+        self.assertEqual([p['boarding_pass_id'] for p in passengers], [1, 2])
+        self.assertEqual(passengers[0]['seat_id'], 7)
+        self.assertNotIn('airplane_id', passengers[0])
+        self.assertEqual(repository.round_trips, 1)
+
+    def test_flight_without_passengers_and_missing_flight(self):
+        empty = dict(joined_row(1), passenger_id=None, boarding_pass_id=None)
+        flight, passengers = FlightRepository(FakeConnection([compact(empty)]), prepared=False).load_flight(1)
+        self.assertEqual((flight, passengers), (FLIGHT, []))
+        self.assertEqual(FlightRepository(FakeConnection([]), prepared=False).load_flight(1), (None, []))
+
+    def test_prepared_statements_are_cached_per_connection(self):
+        conn = FakeConnection([compact(joined_row(1))])
+        FlightRepository(conn, prepared=True).load_flight(1)
+        repository = FlightRepository(conn, prepared=True)
+        repository.load_flight(1)
+        self.assertEqual(list(conn.statements), [SINGLE_FLIGHT_SQL])
+        # Sentencia ya preparada en la conexión: solo reset + execute
+        self.assertEqual(repository.round_trips, 2)
+
+    def test_seats_are_compact_rows_with_explicit_columns(self):
+        conn = FakeConnection([(2, 'B', 1, 1, 7), (1, 'A', 1, 1, 7)])
+        seats = FlightRepository(conn, prepared=False).load_seats([7])
+        self.assertEqual([(s.seat_id, s.seat_column, s.airplane_id) for s in seats], [(2, 'B', 7), (1, 'A', 7)])
+        self.assertNotIn("*", conn.executed[0][0])
+
+    def test_writes_are_counted(self):
+        repository = FlightRepository(FakeConnection([]), prepared=False)
+        repository.start_transaction()
+        cursor = repository.cursor()
+        cursor.executemany("UPDATE boarding_pass SET seat_id = %s WHERE boarding_pass_id = %s", [(1, 1), (2, 2)])
+        repository.commit()
+        self.assertEqual(repository.round_trips, 4)
+
+    def test_iter_passengers_reads_rows_lazily(self):
+        conn = FakeConnection([joined_row(1), joined_row(2), joined_row(3)])
+        repository = FlightRepository(conn, prepared=False)
+        rows = repository.iter_passengers(1, after=0, limit=2)
+        self.assertEqual(repository.round_trips, 1)
+        self.assertTrue(conn.executed[0][0].rstrip().endswith("LIMIT %s"))
+        self.assertEqual(next(rows)['boarding_pass_id'], 1)
+        self.assertEqual(conn.fetched, 1)
+        self.assertEqual([row['boarding_pass_id'] for row in rows], [2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
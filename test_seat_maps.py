@@ -0,0 +1,67 @@
+import unittest
+from unittest import mock
+
+from seat_maps import SeatMapCache
+from seating import SeatMap
+
+
+class FakeLoader:
+    """Cargador de asientos que devuelve siempre las mismas filas y cuenta las consultas."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def __call__(self, airplane_ids):
+        self.queries += 1
+        return [row for row in self.rows if row['airplane_id'] in airplane_ids]
+
+
+SEATS = [
+    {'seat_id': 2, 'seat_column': 'B', 'seat_row': 1, 'seat_type_id': 1, 'airplane_id': 1},
+    {'seat_id': 1, 'seat_column': 'A', 'seat_row': 1, 'seat_type_id': 1, 'airplane_id': 1},
+]
+
+
+class TestSeatMapCache(unittest.TestCase):
+
+    def test_seat_map_is_loaded_once(self):
+        cache = SeatMapCache(ttl=60)
+        loader = FakeLoader(SEATS)
+        first = cache.get(1, loader)
+        second = cache.get(1, loader)
+        self.assertIs(first, second)
+        self.assertIsInstance(first, SeatMap)
+        self.assertEqual(loader.queries, 1)
+        self.assertEqual([s.seat_id for s in first.by_type[1]], [1, 2])
+        self.assertEqual(cache.stats(), {"entries": 1, "hits": 1, "misses": 1})
+
+    def test_ttl_expiry_and_invalidation(self):
+        cache = SeatMapCache(ttl=10)
+        loader = FakeLoader(SEATS)
+        with mock.patch("seat_maps.time.monotonic", return_value=100.0):
+            cache.get(1, loader)
+        with mock.patch("seat_maps.time.monotonic", return_value=111.0):
+            cache.get(1, loader)
+        self.assertEqual(loader.queries, 2)
+
+        cache.invalidate(1)
+        cache.get(1, loader)
+        self.assertEqual(loader.queries, 3)
+        cache.invalidate()
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_get_many_loads_missing_airplanes_in_one_query(self):
+        cache = SeatMapCache(ttl=60)
+        cache.get(1, FakeLoader(SEATS))
+        other = [dict(s, airplane_id=2, seat_id=s['seat_id'] + 10) for s in SEATS]
+        loader = FakeLoader(other)
+        result = cache.get_many([1, 2, 3], loader)
+        self.assertEqual(loader.queries, 1)
+        self.assertEqual(len(result[1]), 2)
+        self.assertEqual(sorted(s.seat_id for s in result[2].seats), [11, 12])
+        self.assertEqual(len(result[3]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
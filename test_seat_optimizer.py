@@ -0,0 +1,114 @@
+import copy
+import random
+import time
+import unittest
+
+from seat_optimizer import _Cabin, group_cost, improve_assignment, MINOR_PENALTY
+from seating import assign_seats, SeatMap
+from test_seating import make_cabin, make_passengers
+
+
+def total_cost(passengers, seats):
+    cabin = _Cabin(SeatMap(seats))
+    groups = {}
+    for p in passengers:
+        groups.setdefault(p['purchase_id'], []).append(p)
+    return sum(group_cost(members, cabin) for members in groups.values())
+
+
+class TestSeatOptimizer(unittest.TestCase):
+
+    def scenario(self, seed=11, rows=40, count=150):
+        rng = random.Random(seed)
+        seats = make_cabin(rows, type_rows=((10, 1), (25, 2), (None, 3)), rng=rng)
+        return seats, make_passengers(count, seats, rng, preassigned_ratio=0.3)
+
+    def test_disabled_by_default_matches_greedy(self):
+        seats, passengers = self.scenario()
+        greedy = assign_seats(copy.deepcopy(passengers), seats)
+        same = assign_seats(copy.deepcopy(passengers), seats, optimize_ms=0)
+        self.assertEqual([p['seat_id'] for p in greedy], [p['seat_id'] for p in same])
+
+    def test_never_worse_and_keeps_rules(self):
+        seats, passengers = self.scenario()
+        greedy = assign_seats(copy.deepcopy(passengers), seats)
+        optimized = assign_seats(copy.deepcopy(passengers), seats, optimize_ms=50)
+        self.assertLessEqual(total_cost(optimized, seats), total_cost(greedy, seats))
+
+        by_id = {s['seat_id']: s for s in seats}
+        original = {p['boarding_pass_id']: p['seat_id'] for p in passengers}
+        seat_ids = [p['seat_id'] for p in optimized if p['seat_id'] is not None]
+        self.assertEqual(len(seat_ids), len(set(seat_ids)))
+        for p in optimized:
+            if original[p['boarding_pass_id']] is not None:
+                self.assertEqual(p['seat_id'], original[p['boarding_pass_id']])
+            elif p['seat_id'] is not None:
+                self.assertEqual(by_id[p['seat_id']]['seat_type_id'], p['seat_type_id'])
+        # Lo que la voraz cumplía con los menores sigue cumpliéndose
+        violations = lambda result: total_cost(result, seats) // MINOR_PENALTY
+        self.assertLessEqual(violations(optimized), violations(greedy))
+
+    def test_reunites_a_split_family(self):
+        seats = make_cabin(3, columns="ABCD", type_rows=((None, 1),))
+        by_cell = {(s['seat_row'], s['seat_column']): s['seat_id'] for s in seats}
+        # Un pasajero suelto ocupa 1B (recién asignado) y parte la fila 1 para la familia
+        passengers = [
+            {'boarding_pass_id': 1, 'purchase_id': 1, 'age': 40, 'seat_id': by_cell[(1, 'A')]},
+            {'boarding_pass_id': 2, 'purchase_id': 2, 'age': 30, 'seat_id': by_cell[(1, 'B')]},
+            {'boarding_pass_id': 3, 'purchase_id': 1, 'age': 8, 'seat_id': by_cell[(1, 'C')]},
+        ]
+        stats = improve_assignment(passengers, SeatMap(seats), movable=[2, 3],
+                                   deadline=time.perf_counter() + 0.05, rng=random.Random(1))
+        self.assertGreater(stats["initial_cost"], stats["final_cost"])
+        self.assertEqual(stats["final_cost"], 0)
+        self.assertEqual(passengers[0]['seat_id'], by_cell[(1, 'A')])
+        self.assertEqual(passengers[2]['seat_id'], by_cell[(1, 'B')])
+
+    def test_never_moves_onto_externally_occupied_seats(self):
+        # Como en producción: los pasajeros ya sentados de otras compras solo llegan en `occupied`
+        for seed in range(8):
+            seats, passengers = self.scenario(seed=seed)
+            external = {p['seat_id'] for p in passengers if p['seat_id'] is not None}
+            pending = [p for p in passengers if p['seat_id'] is None]
+            result = assign_seats(copy.deepcopy(pending), seats, occupied=external, optimize_ms=20)
+            seat_ids = [p['seat_id'] for p in result if p['seat_id'] is not None]
+            self.assertEqual(len(seat_ids), len(set(seat_ids)))
+            self.assertFalse(external & set(seat_ids))
+
+    def test_respects_latency_budget(self):
+        seats, passengers = self.scenario(seed=3, rows=80, count=400)
+        for budget_ms in (1, 5, 20):
+            start = time.perf_counter()
+            assign_seats(copy.deepcopy(passengers), seats, optimize_ms=budget_ms)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            # Margen para una propuesta en curso y la planificación del sistema
+            self.assertLess(elapsed_ms, max(budget_ms, self.greedy_ms(seats, passengers)) + 5)
+
+    def test_deadline_checked_during_setup(self):
+        seats, passengers = self.scenario(seed=5, rows=400, count=2000)
+        seat_map = SeatMap(seats)
+        pending = [p['boarding_pass_id'] for p in passengers if p['seat_id'] is None]
+        greedy = assign_seats(copy.deepcopy(passengers), seat_map)
+
+        # Plazo vencido: ni siquiera construye el índice de celdas y no toca nada
+        result = copy.deepcopy(greedy)
+        stats = improve_assignment(result, seat_map, pending, deadline=time.perf_counter())
+        self.assertEqual(stats["iterations"], 0)
+        self.assertEqual(result, greedy)
+        self.assertIsNone(seat_map.cells(deadline=time.perf_counter()))
+
+        for budget_ms in (0.2, 1, 5):
+            result = copy.deepcopy(greedy)
+            start = time.perf_counter()
+            improve_assignment(result, seat_map, pending, deadline=start + budget_ms / 1000)
+            self.assertLess((time.perf_counter() - start) * 1000, budget_ms + 3)
+        self.assertEqual(len(seat_map.cells()), len(seats))
+
+    def greedy_ms(self, seats, passengers):
+        start = time.perf_counter()
+        assign_seats(copy.deepcopy(passengers), seats)
+        return (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    unittest.main()
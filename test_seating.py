@@ -0,0 +1,417 @@
+import copy
+import importlib.util
+import pickle
+import random
+import unittest
+from unittest import mock
+
+from seating import as_seats, assign_seats, find_seat_block, FreeSeatIndex, Seat, seat_order, SeatMap
+
+
+def legacy_assign_seats(passengers, seats):
+    """
+    Copia de la implementación original de assign_seats (lista de asientos libres
+    recalculada por pasajero). Sirve como referencia para las pruebas de regresión.
+    """
+    if not passengers:
+        return []
+
+    seats_by_id = {s['seat_id']: s for s in seats}
+    seats_by_type = {s_type: [] for s_type in {s['seat_type_id'] for s in seats}}
+    for s in seats:
+        seats_by_type[s['seat_type_id']].append(s)
+
+    for seat_type_id in seats_by_type:
+        seats_by_type[seat_type_id].sort(key=lambda x: (x['seat_row'], x['seat_column']))
+
+    occupied = {p['seat_id'] for p in passengers if p.get('seat_id') is not None}
+
+    groups = {}
+    for p in passengers:
+        groups.setdefault(p['purchase_id'], []).append(p)
+
+    final_passengers = []
+
+    for _, group in groups.items():
+        adults = [p for p in group if p['age'] >= 18]
+        minors = [p for p in group if p['age'] < 18]
+
+        group_assigned_passengers = []
+
+        for adult in adults:
+            if adult.get('seat_id') is not None:
+                group_assigned_passengers.append(adult)
+                continue
+
+            seat_type_id = adult['seat_type_id']
+            available_seats = [s for s in seats_by_type.get(seat_type_id, []) if s['seat_id'] not in occupied]
+
+            if available_seats:
+                chosen_seat = available_seats[0]
+                adult['seat_id'] = chosen_seat['seat_id']
+                occupied.add(chosen_seat['seat_id'])
+            else:
+                adult['seat_id'] = None
+
+            group_assigned_passengers.append(adult)
+
+        for minor in minors:
+            if minor.get('seat_id') is not None:
+                group_assigned_passengers.append(minor)
+                continue
+
+            seat_type_id = minor['seat_type_id']
+            available_seats = [s for s in seats_by_type.get(seat_type_id, []) if s['seat_id'] not in occupied]
+
+            if available_seats:
+                best_seat = None
+                min_distance = float('inf')
+
+                adult_seat_ids = [p['seat_id'] for p in group_assigned_passengers if p.get('seat_id') is not None and p['age'] >= 18]
+                adult_seats_info = [seats_by_id[sid] for sid in adult_seat_ids if sid in seats_by_id]
+
+                if adult_seats_info:
+                    for seat in available_seats:
+                        for adult_seat in adult_seats_info:
+                            distance = abs(seat['seat_row'] - adult_seat['seat_row']) + abs(ord(seat['seat_column']) - ord(adult_seat['seat_column']))
+                            if distance < min_distance:
+                                min_distance = distance
+                                best_seat = seat
+
+                if best_seat:
+                    chosen_seat = best_seat
+                else:
+                    chosen_seat = available_seats[0]
+
+                minor['seat_id'] = chosen_seat['seat_id']
+                occupied.add(chosen_seat['seat_id'])
+            else:
+                minor['seat_id'] = None
+
+            group_assigned_passengers.append(minor)
+
+        final_passengers.extend(group_assigned_passengers)
+
+    return final_passengers
+
+
+def make_cabin(rows, columns="ABCDEF", type_rows=((1, 1), (4, 2), (None, 3)), rng=None):
+    """
+    Genera una cabina sintética. `type_rows` indica hasta qué fila llega cada tipo de asiento.
+    Los asientos se devuelven desordenados, como podrían llegar de la base de datos.
+    """
+    seats = []
+    seat_id = 1
+    for row in range(1, rows + 1):
+        seat_type_id = next(t for limit, t in type_rows if limit is None or row <= limit)
+        for column in columns:
+            seats.append({
+                'seat_id': seat_id,
+                'seat_column': column,
+                'seat_row': row,
+                'seat_type_id': seat_type_id,
+                'airplane_id': 1,
+            })
+            seat_id += 1
+    if rng:
+        rng.shuffle(seats)
+    return seats
+
+
+def make_passengers(count, seats, rng, preassigned_ratio=0.2):
+    """Genera pasajeros en grupos de compra de 1 a 5 personas, con menores y asientos ya asignados."""
+    seat_types = sorted({s['seat_type_id'] for s in seats})
+    free_seats = list(seats)
+    rng.shuffle(free_seats)
+    passengers = []
+    purchase_id = 1
+    while len(passengers) < count:
+        size = rng.randint(1, 5)
+        seat_type_id = rng.choice(seat_types)
+        for _ in range(size):
+            passenger_id = len(passengers) + 1
+            seat_id = None
+            if rng.random() < preassigned_ratio:
+                candidates = [s for s in free_seats if s['seat_type_id'] == seat_type_id]
+                if candidates:
+                    seat_id = candidates[0]['seat_id']
+                    free_seats.remove(candidates[0])
+            passengers.append({
+                'passenger_id': passenger_id,
+                'dni': str(10000000 + passenger_id),
+                'name': f"Pasajero {passenger_id}",
+                'age': rng.choice([3, 8, 12, 16, 18, 25, 40, 67]),
+                'country': 'Chile',
+                'boarding_pass_id': passenger_id,
+                'purchase_id': purchase_id,
+                'seat_type_id': seat_type_id,
+                'seat_id': seat_id,
+            })
+        purchase_id += 1
+    return passengers[:count]
+
+
+def assignment(passengers):
+    return [(p['passenger_id'], p['seat_id']) for p in passengers]
+
+
+class TestAssignSeatsRegression(unittest.TestCase):
+
+    def test_empty_passengers(self):
+        self.assertEqual(assign_seats([], make_cabin(5)), [])
+
+    def test_matches_legacy_assignment(self):
+        """Sin bloques de grupo, los índices producen exactamente las mismas asignaciones y el mismo orden"""
+        rng = random.Random(1234)
+        for rows in (3, 10, 30):
+            seats = make_cabin(rows, rng=rng)
+            for count in (1, len(seats) // 2, len(seats), len(seats) + 10):
+                passengers = make_passengers(count, seats, rng)
+                expected = legacy_assign_seats(copy.deepcopy(passengers), copy.deepcopy(seats))
+                result = assign_seats(copy.deepcopy(passengers), copy.deepcopy(seats), group_blocks=False)
+                self.assertEqual(assignment(result), assignment(expected),
+                                 f"Asignación distinta con {rows} filas y {count} pasajeros")
+
+    def test_seat_map_input_matches_seat_list(self):
+        """Un SeatMap precalculado (y reutilizado) asigna igual que la lista de asientos"""
+        rng = random.Random(11)
+        seats = make_cabin(20, rng=rng)
+        seat_map = SeatMap(seats)
+        for _ in range(3):
+            passengers = make_passengers(80, seats, rng)
+            expected = assign_seats(copy.deepcopy(passengers), copy.deepcopy(seats))
+            result = assign_seats(copy.deepcopy(passengers), seat_map)
+            self.assertEqual(assignment(result), assignment(expected))
+
+    def test_cells_resume_after_deadline(self):
+        """El índice de celdas se construye por tramos y continúa donde se quedó"""
+        seats = make_cabin(10, rng=random.Random(3))
+        seat_map = SeatMap(seats)
+        self.assertIsNone(seat_map.cells(deadline=0))
+        with mock.patch("seating.time.perf_counter", side_effect=[0.0, 1.0]):
+            self.assertIsNone(seat_map.cells(deadline=0.5, chunk=16))
+        self.assertEqual(len(seat_map._cells), 16)
+        cells = seat_map.cells(chunk=16)
+        self.assertEqual(cells, {(s['seat_row'], ord(s['seat_column'])): s['seat_id'] for s in seats})
+        self.assertEqual(pickle.loads(pickle.dumps(seat_map))._cells, {})
+
+    def test_compact_rows_match_dict_rows(self):
+        """SeatMap acepta filas Seat, tuplas en orden SEAT_COLUMNS o diccionarios, y asigna igual"""
+        rng = random.Random(13)
+        seats = make_cabin(15, rng=rng)
+        passengers = make_passengers(80, seats, rng)
+        expected = assign_seats(copy.deepcopy(passengers), seats)
+        for rows in (as_seats(seats), [tuple(s.values()) for s in seats]):
+            seat_map = SeatMap(rows)
+            self.assertTrue(all(isinstance(s, Seat) for s in seat_map.seats))
+            self.assertEqual(assignment(assign_seats(copy.deepcopy(passengers), seat_map)), assignment(expected))
+
+    def test_unknown_seat_type_gets_no_seat(self):
+        seats = make_cabin(2, type_rows=((None, 1),))
+        passengers = make_passengers(3, seats, random.Random(7), preassigned_ratio=0)
+        for p in passengers:
+            p['seat_type_id'] = 99
+        result = assign_seats(passengers, seats)
+        self.assertTrue(all(p['seat_id'] is None for p in result))
+
+
+class TestGroupBlocks(unittest.TestCase):
+
+    def seats_of(self, passengers, seats):
+        by_id = {s['seat_id']: s for s in seats}
+        return [by_id[p['seat_id']] for p in passengers]
+
+    def make_group(self, ages, purchase_id=1, seat_type_id=1):
+        return [{
+            'passenger_id': i + 1, 'dni': str(i), 'name': f"P{i}", 'age': age, 'country': 'Chile',
+            'boarding_pass_id': i + 1, 'purchase_id': purchase_id,
+            'seat_type_id': seat_type_id, 'seat_id': None,
+        } for i, age in enumerate(ages)]
+
+    def test_group_seated_in_one_row_block(self):
+        seats = make_cabin(5, type_rows=((None, 1),))
+        # Ocupar un asiento en la primera fila para que el bloque de 4 no quepa ahí
+        taken = next(s for s in seats if s['seat_row'] == 1 and s['seat_column'] == 'C')
+        passengers = [{'passenger_id': 99, 'dni': '99', 'name': 'X', 'age': 30, 'country': 'Chile',
+                       'boarding_pass_id': 99, 'purchase_id': 99, 'seat_type_id': 1,
+                       'seat_id': taken['seat_id']}]
+        passengers += self.make_group([40, 8, 35, 5])
+        result = assign_seats(passengers, seats)
+        group_seats = self.seats_of([p for p in result if p['purchase_id'] == 1], seats)
+        self.assertEqual({s['seat_row'] for s in group_seats}, {2})
+        self.assertEqual(sorted(s['seat_column'] for s in group_seats), ['A', 'B', 'C', 'D'])
+
+    def test_minors_sit_next_to_an_adult(self):
+        rng = random.Random(5)
+        seats = make_cabin(60, type_rows=((20, 1), (40, 2), (None, 3)), rng=rng)
+        passengers = make_passengers(120, seats, rng, preassigned_ratio=0)
+        result = assign_seats(passengers, seats)
+        by_id = {s['seat_id']: s for s in seats}
+        groups = {}
+        for p in result:
+            groups.setdefault(p['purchase_id'], []).append(p)
+        for group in groups.values():
+            adult_seats = [by_id[p['seat_id']] for p in group if p['age'] >= 18]
+            minors = [p for p in group if p['age'] < 18]
+            if not adult_seats or len(minors) > 2 * len(adult_seats):
+                continue
+            for minor in minors:
+                seat = by_id[minor['seat_id']]
+                self.assertTrue(any(
+                    a['seat_row'] == seat['seat_row'] and abs(ord(a['seat_column']) - ord(seat['seat_column'])) == 1
+                    for a in adult_seats
+                ), f"Menor {minor['passenger_id']} sin adulto al lado")
+
+    def test_group_split_across_adjacent_rows_when_no_block_fits(self):
+        seats = make_cabin(4, columns="ABC", type_rows=((None, 1),))
+        passengers = self.make_group([30, 31, 32, 33, 34])
+        result = assign_seats(passengers, seats)
+        rows = sorted(s['seat_row'] for s in self.seats_of(result, seats))
+        self.assertEqual(rows, [1, 1, 1, 2, 2])
+
+    def test_find_seat_block(self):
+        seats = make_cabin(2, columns="ABCD", type_rows=((None, 1),))
+        available = [s for s in seats if not (s['seat_row'] == 1 and s['seat_column'] == 'B')]
+        block = find_seat_block(available, 3)
+        self.assertEqual([(s.seat_row, s.seat_column) for s in block], [(2, 'A'), (2, 'B'), (2, 'C')])
+        self.assertIsNone(find_seat_block(available, 5))
+
+
+class CountingDict(dict):
+    """Diccionario que anota cada consulta con get()."""
+
+    def __init__(self, data, lookups):
+        super().__init__(data)
+        self.lookups = lookups
+
+    def get(self, key, default=None):
+        self.lookups.append(key)
+        return super().get(key, default)
+
+
+class TestFreeSeatIndex(unittest.TestCase):
+
+    def brute_force_nearest(self, seats, occupied, origins):
+        best_seat = None
+        min_distance = float('inf')
+        for seat in seats:
+            if seat.seat_id in occupied:
+                continue
+            for origin in origins:
+                distance = abs(seat.seat_row - origin.seat_row) + abs(ord(seat.seat_column) - ord(origin.seat_column))
+                if distance < min_distance:
+                    min_distance = distance
+                    best_seat = seat
+        return best_seat
+
+    def test_nearest_free_matches_linear_scan(self):
+        """La búsqueda por anillos devuelve el mismo asiento (incluidos empates) que el recorrido lineal"""
+        rng = random.Random(99)
+        # Cabina con pasillo (sin columna D) y filas de otro tipo intercaladas
+        seats = sorted(as_seats(make_cabin(40, columns="ABCEFGHK", type_rows=((None, 1),))), key=seat_order)
+        for _ in range(200):
+            occupied = {s.seat_id for s in seats if rng.random() < 0.85}
+            index = FreeSeatIndex(seats, occupied)
+            origins = rng.sample(seats, rng.randint(1, 3))
+            self.assertIs(index.nearest_free(origins), self.brute_force_nearest(seats, occupied, origins))
+
+    def test_nearest_free_visits_only_reachable_rows(self):
+        """En una cabina larga y casi llena cada anillo solo recorre las filas que pueden estar a esa distancia"""
+        seats = sorted(as_seats(make_cabin(2000, columns="ABC", type_rows=((None, 1),))), key=seat_order)
+        rng = random.Random(5)
+        for _ in range(20):
+            occupied = {s.seat_id for s in seats if rng.random() < 0.999}
+            index = FreeSeatIndex(seats, occupied)
+            origins = rng.sample(seats, rng.randint(1, 2))
+            self.assertIs(index.nearest_free(origins), self.brute_force_nearest(seats, occupied, origins))
+
+        # Un único asiento libre en el otro extremo: sin el recorte serían millones de consultas
+        index = FreeSeatIndex(seats, {s.seat_id for s in seats[:-1]})
+        lookups = []
+        grid = index.layout.grid
+        index.layout.grid = CountingDict(grid, lookups)
+        try:
+            self.assertIs(index.nearest_free([seats[0]]), seats[-1])
+        finally:
+            index.layout.grid = grid
+        self.assertLess(len(lookups), 20 * 2000)
+
+    def test_find_block_tracks_occupancy(self):
+        """El índice de tramos libres coincide con la búsqueda exhaustiva tras cada asiento ocupado"""
+        rng = random.Random(3)
+        seats = sorted(as_seats(make_cabin(12, columns="ABCEFG", type_rows=((None, 1),))), key=seat_order)
+        index = FreeSeatIndex(seats, set())
+        occupied = set()
+        order = list(seats)
+        rng.shuffle(order)
+        for seat in order:
+            index.mark_occupied(seat.seat_id)
+            occupied.add(seat.seat_id)
+            for size in range(1, 5):
+                expected = None
+                for i in range(len(seats) - size + 1):
+                    window = seats[i:i + size]
+                    if all(s.seat_id not in occupied for s in window) and all(
+                        a.seat_row == b.seat_row and ord(b.seat_column) - ord(a.seat_column) == 1
+                        for a, b in zip(window, window[1:])
+                    ):
+                        expected = window
+                        break
+                self.assertEqual(index.find_block(size), expected)
+
+    def test_first_free_skips_occupied(self):
+        seats = sorted(as_seats(make_cabin(2)), key=seat_order)
+        index = FreeSeatIndex(seats, {seats[0].seat_id})
+        self.assertIs(index.first_free(), seats[1])
+        index.mark_occupied(seats[1].seat_id)
+        self.assertIs(index.first_free(), seats[2])
+
+
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "NumPy no está instalado")
+class TestNumpyEngine(unittest.TestCase):
+
+    def test_same_assignments_as_python_engine(self):
+        """El motor de NumPy produce exactamente las mismas asignaciones que el de Python"""
+        rng = random.Random(42)
+        for rows in (3, 12, 40):
+            seats = make_cabin(rows, columns="ABCEFG", rng=rng)
+            for count in (2, len(seats) // 2, len(seats) + 5):
+                passengers = make_passengers(count, seats, rng)
+                for group_blocks in (True, False):
+                    expected = assign_seats(copy.deepcopy(passengers), copy.deepcopy(seats),
+                                            group_blocks=group_blocks, engine="python")
+                    result = assign_seats(copy.deepcopy(passengers), copy.deepcopy(seats),
+                                          group_blocks=group_blocks, engine="numpy")
+                    self.assertEqual(assignment(result), assignment(expected))
+
+    def test_index_matches_python_index(self):
+        """nearest_free (con la ventana de filas) y los tramos incrementales coinciden con FreeSeatIndex"""
+        from seating_numpy import NumpySeatIndex
+
+        rng = random.Random(5)
+        seats = sorted(as_seats(make_cabin(30, columns="ABCDEF", rng=rng)), key=seat_order)
+        occupied = {s.seat_id for s in seats if rng.random() < 0.7}
+        python_index = FreeSeatIndex(seats, occupied)
+        numpy_index = NumpySeatIndex(seats, occupied)
+        for step in range(len(seats)):
+            origins = rng.sample(seats, rng.randint(1, 3))
+            nearest = python_index.nearest_free(origins)
+            self.assertIs(numpy_index.nearest_free(origins), nearest)
+            self.assertIs(numpy_index.first_free(), python_index.first_free())
+            if step >= 10:
+                size, row = rng.randint(1, 4), rng.randint(1, 30)
+                self.assertEqual(numpy_index.find_block(size), python_index.find_block(size))
+                self.assertEqual(numpy_index.run_near(row, size), python_index.run_near(row, size))
+            seat = nearest if step % 2 else python_index.first_free()
+            if seat is None:
+                break
+            python_index.mark_occupied(seat.seat_id)
+            numpy_index.mark_occupied(seat.seat_id)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            assign_seats(make_passengers(1, make_cabin(1), random.Random(1)), make_cabin(1), engine="fortran")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import unittest
+from dataclasses import asdict
+
+from serialization import (Passenger, FlightData, passenger_json, flight_json,
+                           dumps_flight_response, dumps_flights_response)
+
+
+def make_flight(passenger_count=3):
+    passengers = [
+        Passenger(passengerId=i, dni=str(1000 + i), name=f"Pasajero Ñandú {i}", age=30 + i, country="Perú",
+                  boardingPassId=10 + i, purchaseId=1, seatTypeId=1, seatId=None if i % 2 else i)
+        for i in range(passenger_count)
+    ]
+    return FlightData(flightId=1, takeoffDateTime=1672531200, takeoffAirport='Aeropuerto "SCL"',
+                      landingDateTime=1672538400, landingAirport="EZE", airplaneId=101,
+                      passengers=passengers)
+
+
+class TestSerialization(unittest.TestCase):
+
+    def test_compact_output_matches_json_dumps(self):
+        flight = make_flight()
+        expected = json.dumps(asdict(flight), separators=(',', ':'))
+        self.assertEqual(flight_json(flight), expected)
+        self.assertEqual(passenger_json(flight.passengers[0]),
+                         json.dumps(asdict(flight.passengers[0]), separators=(',', ':')))
+
+    def test_key_order_is_preserved(self):
+        data = json.loads(dumps_flight_response(make_flight()))
+        self.assertEqual(list(data), ["code", "data"])
+        self.assertEqual(list(data["data"]), ["flightId", "takeoffDateTime", "takeoffAirport", "landingDateTime",
+                                              "landingAirport", "airplaneId", "passengers"])
+        self.assertEqual(list(data["data"]["passengers"][0]), list(Passenger.__dataclass_fields__))
+
+    def test_pretty_output_is_the_previous_format(self):
+        flight = make_flight()
+        previous = json.dumps({"code": 200, "data": asdict(flight)}, indent=4)
+        self.assertEqual(dumps_flight_response(flight, pretty=True), previous)
+
+    def test_bulk_response(self):
+        flights = [make_flight(2), make_flight(0)]
+        expected = {"code": 200, "data": [asdict(f) for f in flights], "notFound": [7]}
+        self.assertEqual(json.loads(dumps_flights_response(flights, [7])), expected)
+        self.assertEqual(json.loads(dumps_flights_response(flights, [7], pretty=True)), expected)
+
+    def test_records_use_slots(self):
+        self.assertFalse(hasattr(make_flight().passengers[0], '__dict__'))
+
+
+if __name__ == "__main__":
+    unittest.main()
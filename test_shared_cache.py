@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from seat_maps import SeatMapCache
+from shared_cache import default_path, SharedCache
+from test_seat_maps import FakeLoader, SEATS
+
+
+def set_from_child(path):
+    SharedCache(path=path).set("from_child", {"pid": os.getpid()})
+
+
+class TestSharedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+        self.cache = SharedCache(path=self.path, threshold=3)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_set_and_counters(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", ("body", "etag"))
+        self.assertEqual(self.cache.get("a"), ("body", "etag"))
+        self.assertTrue(self.cache.has("a"))
+        self.assertFalse(self.cache.add("a", "otro"))
+        self.assertTrue(self.cache.delete("a"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 0))
+
+    def test_expiry(self):
+        with mock.patch("shared_cache.time.time", return_value=1000.0):
+            self.cache.set("a", 1, timeout=10)
+        with mock.patch("shared_cache.time.time", return_value=1011.0):
+            self.assertIsNone(self.cache.get("a"))
+            self.assertTrue(self.cache.add("a", 2))
+
+    def test_lru_eviction(self):
+        for i, key in enumerate("abc"):
+            with mock.patch("shared_cache.time.time", return_value=1000.0 + i):
+                self.cache.set(key, i, timeout=0)
+        with mock.patch("shared_cache.time.time", return_value=1010.0):
+            self.cache.get("a")
+            self.cache.set("d", 3, timeout=0)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual([self.cache.get(key) for key in "acd"], [0, 2, 3])
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_pinned_prefixes_are_never_evicted(self):
+        with mock.patch("shared_cache.time.time", return_value=1000.0):
+            self.cache.set("metrics/archive", {"total": 500}, timeout=0)
+        for i, key in enumerate("abcdef"):
+            with mock.patch("shared_cache.time.time", return_value=1001.0 + i):
+                self.cache.set(key, i, timeout=0)
+        # El límite (3) solo cuenta y desaloja las demás entradas
+        self.assertEqual(self.cache.get_prefix("metrics/"), {"metrics/archive": {"total": 500}})
+        self.assertEqual([self.cache.get(key) for key in "def"], [3, 4, 5])
+        self.assertEqual(self.cache.stats()["entries"], 4)
+
+        unpinned = SharedCache(path=self.path, threshold=3, pinned_prefixes=())
+        unpinned.set("g", 6, timeout=0)
+        self.assertEqual(unpinned.get_prefix("metrics/"), {})
+
+    def test_shared_between_processes(self):
+        process = multiprocessing.get_context("fork").Process(target=set_from_child, args=(self.path,))
+        process.start()
+        process.join()
+        self.assertEqual(self.cache.get("from_child"), {"pid": process.pid})
+
+    def test_seat_rows_are_shared_between_seat_map_caches(self):
+        loader = FakeLoader(SEATS)
+        SeatMapCache(ttl=60, store=self.cache).get(1, loader)
+        other_worker = SeatMapCache(ttl=60, store=self.cache)
+        self.assertEqual(len(other_worker.get(1, loader)), 2)
+        self.assertEqual(loader.queries, 1)
+
+        other_worker.invalidate(1)
+        SeatMapCache(ttl=60, store=self.cache).get(1, loader)
+        self.assertEqual(loader.queries, 2)
+
+    def test_default_path_is_private(self):
+        with mock.patch.dict(os.environ, {"SHARED_CACHE_PATH": ""}), \
+                mock.patch("shared_cache.tempfile.gettempdir", return_value=self.tmp.name), \
+                mock.patch("shared_cache.os.path.isdir", return_value=False):
+            path = default_path()
+        directory = os.path.dirname(path)
+        self.assertEqual(os.path.dirname(directory), self.tmp.name)
+        self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+        SharedCache(path=path).set("a", 1)
+
+    def test_refuses_files_others_can_write(self):
+        shared = os.path.join(self.tmp.name, "shared")
+        os.mkdir(shared)
+        os.chmod(shared, 0o1777)
+        with self.assertRaises(PermissionError):
+            SharedCache(path=os.path.join(shared, "cache.sqlite3"))
+
+        os.chmod(self.path, 0o666)
+        with self.assertRaises(PermissionError):
+            SharedCache(path=self.path)
+
+        # Un enlace simbólico en lugar del directorio tampoco vale
+        link = os.path.join(self.tmp.name, "link")
+        os.symlink(self.tmp.name, link)
+        with self.assertRaises(PermissionError):
+            SharedCache(path=os.path.join(link, "cache.sqlite3"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Punto de entrada WSGI de producción (gunicorn -c gunicorn.conf.py wsgi:app).
+
+Al importarse precalienta el proceso para que la primera petición tras un despliegue o
+un arranque en frío de Render cueste lo mismo que una en régimen estable:
+
+1. Importa todos los módulos de la petición (incluido el motor de asientos configurado).
+2. Abre una conexión del pool, lo que comprueba la base de datos.
+3. Carga en la caché los mapas de asientos de los aviones con vuelos más recientes, con
+   los índices estáticos de cada tipo de asiento ya construidos.
+
+Con `preload_app` gunicorn lo hace una sola vez en el proceso maestro y los workers
+heredan las cachés al hacer fork (ver gunicorn.conf.py). Los errores solo se registran:
+el servidor arranca aunque la base de datos no esté disponible.
+"""
+import os
+import time
+
+from app import app, get_db_connection, release_db_connection
+from repository import FlightRepository
+from seat_maps import get_seat_maps
+from seating import get_index_class
+
+
+def prewarm():
+    """Precalienta el proceso actual; devuelve cuántos mapas de asientos quedaron en caché."""
+    start = time.perf_counter()
+    index_class = get_index_class()
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        if conn is None:
+            print("⚠️ Precalentamiento sin base de datos: se omiten los mapas de asientos")
+            return 0
+        repository = FlightRepository(conn)
+        airplane_ids = repository.active_airplane_ids(int(os.getenv("PREWARM_AIRPLANES", 100)))
+        if airplane_ids:
+            for seat_map in get_seat_maps().get_many(airplane_ids, repository.load_seats).values():
+                for seat_type_id in seat_map.by_type:
+                    seat_map.layout(index_class, seat_type_id)
+        print(f"🔥 Precalentamiento: {len(airplane_ids)} mapas de asientos en "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        return len(airplane_ids)
+    except Exception as e:
+        print(f"⚠️ Precalentamiento incompleto: {e}")
+        return 0
+    finally:
+        release_db_connection(conn)
+
+
+if os.getenv("PREWARM", "1") == "1":
+    prewarm()